@@ -16,6 +16,57 @@ def create_app(config=None):
         DATABASE_PATH=os.environ.get('DATABASE_PATH', os.path.expanduser('~/.orchestrator/executions.db')),
         CLAUDE_CLI_PATH=os.environ.get('CLAUDE_CLI_PATH', 'claude'),
         CLAUDE_TIMEOUT=int(os.environ.get('CLAUDE_TIMEOUT', 600)),
+        MAX_CONCURRENT_EXECUTIONS=int(os.environ.get('MAX_CONCURRENT_EXECUTIONS', 3)),
+        MAX_QUEUED_EXECUTIONS=int(os.environ.get('MAX_QUEUED_EXECUTIONS', 50)),
+        EXECUTION_LEASE_SECONDS=int(os.environ.get('EXECUTION_LEASE_SECONDS', 60)),
+        EXECUTION_MAX_ATTEMPTS=int(os.environ.get('EXECUTION_MAX_ATTEMPTS', 2)),
+        OUTPUT_FLUSH_BYTES=int(os.environ.get('OUTPUT_FLUSH_BYTES', 16384)),
+        OUTPUT_FLUSH_SECONDS=float(os.environ.get('OUTPUT_FLUSH_SECONDS', 0.5)),
+        AGENT_CACHE_SECONDS=float(os.environ.get('AGENT_CACHE_SECONDS', 2)),
+        AGENTS_EXTRA_ROOTS=[p for p in os.environ.get('AGENTS_EXTRA_ROOTS', '').split(os.pathsep) if p],
+        AGENT_DISCOVERY_MAX_DEPTH=int(os.environ.get('AGENT_DISCOVERY_MAX_DEPTH', 3)),
+        AGENT_DISCOVERY_WORKERS=int(os.environ.get('AGENT_DISCOVERY_WORKERS', 8)),
+        AGENT_DISCOVERY_EXCLUDE=[g for g in os.environ.get('AGENT_DISCOVERY_EXCLUDE', '').split(',') if g],
+        AGENT_ROUTE_MIN_SCORE=float(os.environ.get('AGENT_ROUTE_MIN_SCORE', 1.0)),
+        MCP_PROBE_TIMEOUT=float(os.environ.get('MCP_PROBE_TIMEOUT', 15)),
+        MCP_PROBE_WORKERS=int(os.environ.get('MCP_PROBE_WORKERS', 8)),
+        # Spawns every configured MCP server each interval: enable in one process per deployment
+        MCP_HEALTH_MONITOR=os.environ.get('MCP_HEALTH_MONITOR', '0') == '1',
+        MCP_HEALTH_INTERVAL=float(os.environ.get('MCP_HEALTH_INTERVAL', 300)),
+        MCP_HEALTH_JITTER=float(os.environ.get('MCP_HEALTH_JITTER', 0.2)),
+        MCP_HEALTH_CONCURRENCY=int(os.environ.get('MCP_HEALTH_CONCURRENCY', 2)),
+        MCP_HEALTH_FAILURES=int(os.environ.get('MCP_HEALTH_FAILURES', 2)),
+        MCP_REJECT_UNHEALTHY=os.environ.get('MCP_REJECT_UNHEALTHY', '1') == '1',
+        MCP_POOL_ENABLED=os.environ.get('MCP_POOL_ENABLED', '0') == '1',
+        MCP_POOL_SOCKET_DIR=os.environ.get('MCP_POOL_SOCKET_DIR') or None,
+        MCP_POOL_IDLE_SECONDS=float(os.environ.get('MCP_POOL_IDLE_SECONDS', 600)),
+        MCP_POOL_MAX_CONCURRENCY=int(os.environ.get('MCP_POOL_MAX_CONCURRENCY', 4)),
+        MCP_POOL_REQUEST_TIMEOUT=float(os.environ.get('MCP_POOL_REQUEST_TIMEOUT', 60)),
+        CLI_POOL_SIZE=int(os.environ.get('CLI_POOL_SIZE', 0)),
+        CLI_POOL_MAX_PROCESSES=int(os.environ.get('CLI_POOL_MAX_PROCESSES', 8)),
+        CLI_POOL_IDLE_SECONDS=float(os.environ.get('CLI_POOL_IDLE_SECONDS', 300)),
+        CLI_POOL_HOT_RUNS=int(os.environ.get('CLI_POOL_HOT_RUNS', 2)),
+        URL_FETCH_TIMEOUT=float(os.environ.get('URL_FETCH_TIMEOUT', 30)),
+        URL_FETCH_DEADLINE=float(os.environ.get('URL_FETCH_DEADLINE', 45)),
+        URL_FETCH_MAX_BYTES=int(os.environ.get('URL_FETCH_MAX_BYTES', 1_000_000)),
+        URL_CONTEXT_MAX_CHARS=int(os.environ.get('URL_CONTEXT_MAX_CHARS', 200_000)),
+        CONTEXT_TOKEN_BUDGET=int(os.environ.get('CONTEXT_TOKEN_BUDGET', 30000)),
+        CONTEXT_CHUNK_CHARS=int(os.environ.get('CONTEXT_CHUNK_CHARS', 2000)),
+        CONTEXT_FILE_MAX_CHARS=int(os.environ.get('CONTEXT_FILE_MAX_CHARS', 1_000_000)),
+        URL_FETCH_WORKERS=int(os.environ.get('URL_FETCH_WORKERS', 8)),
+        URL_CACHE_ENABLED=os.environ.get('URL_CACHE_ENABLED', '1') == '1',
+        URL_CACHE_DIR=os.environ.get('URL_CACHE_DIR') or None,
+        URL_CACHE_TTL=float(os.environ.get('URL_CACHE_TTL', 300)),
+        URL_CACHE_MAX_MB=float(os.environ.get('URL_CACHE_MAX_MB', 64)),
+        DB_POOL_SIZE=int(os.environ.get('DB_POOL_SIZE', 8)),
+        DB_BUSY_TIMEOUT_MS=int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000)),
+        DB_SYNCHRONOUS=os.environ.get('DB_SYNCHRONOUS', 'NORMAL'),
+        # Unset: on only with synchronous=FULL, where batching saves fsyncs; with
+        # NORMAL the hand-off to the writer thread costs more than it saves
+        DB_WRITE_BEHIND=(os.environ['DB_WRITE_BEHIND'] == '1'
+                         if os.environ.get('DB_WRITE_BEHIND') else None),
+        DB_WRITE_BATCH_SIZE=int(os.environ.get('DB_WRITE_BATCH_SIZE', 256)),
+        DB_WRITE_MAX_DELAY_MS=float(os.environ.get('DB_WRITE_MAX_DELAY_MS', 0)),
     )
 
     # Override with provided config
@@ -26,18 +77,156 @@ def create_app(config=None):
     CORS(app, origins=[
         'http://localhost:5173',  # Vite dev server
         'http://localhost:5111',  # Production
-    ])
+    ], expose_headers=['X-Next-Cursor'])
 
     # Ensure database directory exists
     db_dir = os.path.dirname(app.config['DATABASE_PATH'])
     if db_dir:
         os.makedirs(db_dir, exist_ok=True)
 
+    # Pooled connections shared by requests and background threads
+    from app.models.database import close_db, configure_pool, init_db
+    configure_pool(
+        app.config['DATABASE_PATH'],
+        max_idle=app.config['DB_POOL_SIZE'],
+        busy_timeout_ms=app.config['DB_BUSY_TIMEOUT_MS'],
+        synchronous=app.config['DB_SYNCHRONOUS'],
+    )
+    app.teardown_appcontext(close_db)
+
+    # Single writer thread batching execution state transitions
+    from app.models.write_behind import configure_writer
+    write_behind = app.config['DB_WRITE_BEHIND']
+    if write_behind is None:
+        write_behind = app.config['DB_SYNCHRONOUS'].upper() == 'FULL'
+    configure_writer(
+        app.config['DATABASE_PATH'],
+        max_batch=app.config['DB_WRITE_BATCH_SIZE'],
+        max_delay=app.config['DB_WRITE_MAX_DELAY_MS'] / 1000,
+        background=write_behind,
+    )
+
     # Initialize database
-    from app.models.database import init_db
     with app.app_context():
         init_db(app.config['DATABASE_PATH'])
 
+    # Process-wide agent cache over every agent root, revalidated against file mtimes
+    from app.services.agent_registry import AgentRegistry
+    registry = AgentRegistry(
+        app.config['AGENTS_ROOT'],
+        revalidate_seconds=app.config['AGENT_CACHE_SECONDS'],
+        extra_roots=app.config['AGENTS_EXTRA_ROOTS'],
+        max_depth=app.config['AGENT_DISCOVERY_MAX_DEPTH'],
+        exclude=app.config['AGENT_DISCOVERY_EXCLUDE'],
+        parse_workers=app.config['AGENT_DISCOVERY_WORKERS'],
+    )
+    app.extensions['agent_registry'] = registry
+
+    # Opt-in warm MCP servers shared by every execution's CLI
+    mcp_pool = None
+    if app.config['MCP_POOL_ENABLED']:
+        from app.services.claude_settings import get_claude_settings
+        from app.services.mcp_pool import MCPServerPool
+        mcp_pool = MCPServerPool(
+            get_claude_settings().mcp_servers,
+            socket_dir=app.config['MCP_POOL_SOCKET_DIR'],
+            idle_seconds=app.config['MCP_POOL_IDLE_SECONDS'],
+            max_concurrency=app.config['MCP_POOL_MAX_CONCURRENCY'],
+            request_timeout=app.config['MCP_POOL_REQUEST_TIMEOUT'],
+            startup_timeout=app.config['MCP_PROBE_TIMEOUT'] * 2,
+        )
+        app.extensions['mcp_pool'] = mcp_pool
+
+    # Opt-in pre-started CLI processes (CLI_POOL_SIZE per hot agent)
+    cli_pool = None
+    if app.config['CLI_POOL_SIZE'] > 0:
+        from app.services.cli_pool import CLIProcessPool
+        cli_pool = CLIProcessPool(
+            per_agent=app.config['CLI_POOL_SIZE'],
+            max_processes=app.config['CLI_POOL_MAX_PROCESSES'],
+            idle_seconds=app.config['CLI_POOL_IDLE_SECONDS'],
+            hot_runs=app.config['CLI_POOL_HOT_RUNS'],
+        )
+        app.extensions['cli_pool'] = cli_pool
+
+    # Context URLs: one pooled session, concurrent fetches under a deadline,
+    # answered from an on-disk cache with revalidation when enabled
+    from app.services.url_fetcher import URLFetcher
+    url_cache = None
+    if app.config['URL_CACHE_ENABLED']:
+        from app.services.url_cache import URLCache
+        url_cache = URLCache(
+            app.config['URL_CACHE_DIR'] or os.path.join(db_dir or '.', 'url_cache'),
+            ttl=app.config['URL_CACHE_TTL'],
+            max_bytes=int(app.config['URL_CACHE_MAX_MB'] * 1024 * 1024),
+        )
+    url_fetcher = URLFetcher(
+        timeout=app.config['URL_FETCH_TIMEOUT'],
+        deadline=app.config['URL_FETCH_DEADLINE'],
+        max_bytes=app.config['URL_FETCH_MAX_BYTES'],
+        max_chars=app.config['URL_CONTEXT_MAX_CHARS'],
+        max_workers=app.config['URL_FETCH_WORKERS'],
+        cache=url_cache,
+    )
+    app.extensions['url_fetcher'] = url_fetcher
+
+    # Attached documents share one token budget, packed by relevance to the task
+    context_budget = None
+    if app.config['CONTEXT_TOKEN_BUDGET'] > 0:
+        from app.services.context_budget import ContextBudget
+        context_budget = ContextBudget(
+            max_tokens=app.config['CONTEXT_TOKEN_BUDGET'],
+            chunk_chars=app.config['CONTEXT_CHUNK_CHARS'],
+            document_chars=app.config['CONTEXT_FILE_MAX_CHARS'],
+        )
+    app.extensions['context_budget'] = context_budget
+
+    # Process-wide worker pool draining the durable execution queue
+    from app.services.claude_executor import ClaudeExecutor
+    from app.services.execution_pool import ExecutionPool
+
+    def executor_factory():
+        return ClaudeExecutor(
+            agents_root=app.config['AGENTS_ROOT'],
+            claude_cli_path=app.config['CLAUDE_CLI_PATH'],
+            timeout=app.config['CLAUDE_TIMEOUT'],
+            agent_resolver=registry.agent_path,
+            mcp_pool=mcp_pool,
+            cli_pool=cli_pool,
+            url_fetcher=url_fetcher,
+            context_budget=context_budget
+        )
+
+    pool = ExecutionPool(
+        db_path=app.config['DATABASE_PATH'],
+        executor_factory=executor_factory,
+        max_workers=app.config['MAX_CONCURRENT_EXECUTIONS'],
+        max_queue=app.config['MAX_QUEUED_EXECUTIONS'],
+        lease_seconds=app.config['EXECUTION_LEASE_SECONDS'],
+        max_attempts=app.config['EXECUTION_MAX_ATTEMPTS'],
+        output_flush_bytes=app.config['OUTPUT_FLUSH_BYTES'],
+        output_flush_seconds=app.config['OUTPUT_FLUSH_SECONDS'],
+        cli_name=os.path.basename(app.config['CLAUDE_CLI_PATH']),
+    )
+    app.extensions['execution_pool'] = pool
+    pool.start()
+
+    # Opt-in background MCP server health checks, read by listings, /api/health
+    # and execute. Probes the servers the CLI is actually given (the Claude settings).
+    if app.config['MCP_HEALTH_MONITOR']:
+        from app.services.claude_settings import get_claude_settings
+        from app.services.mcp_monitor import MCPHealthMonitor
+        monitor = MCPHealthMonitor(
+            get_claude_settings().mcp_servers,
+            interval=app.config['MCP_HEALTH_INTERVAL'],
+            jitter=app.config['MCP_HEALTH_JITTER'],
+            max_concurrent=app.config['MCP_HEALTH_CONCURRENCY'],
+            timeout=app.config['MCP_PROBE_TIMEOUT'],
+            failure_threshold=app.config['MCP_HEALTH_FAILURES'],
+        )
+        app.extensions['mcp_monitor'] = monitor
+        monitor.start()
+
     # Register blueprints
     from app.routes.agents import agents_bp
     from app.routes.executions import executions_bp
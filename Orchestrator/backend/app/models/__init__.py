@@ -1,5 +1,6 @@
 """Models package."""
 from app.models.database import init_db, get_db
 from app.models.execution import Execution
+from app.models.job_queue import JobQueue
 
-__all__ = ['init_db', 'get_db', 'Execution']
+__all__ = ['init_db', 'get_db', 'Execution', 'JobQueue']
@@ -1,32 +1,163 @@
 """
 Database initialization and connection management.
+
+Connections come from a per-database ``ConnectionPool`` shared by request
+handlers and background threads. The database runs in WAL mode, so readers
+never block the writer (and vice versa), and every connection waits on
+``busy_timeout`` rather than failing with "database is locked" when another
+writer holds the lock.
 """
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
 from flask import g, current_app
 
+# NORMAL is durable against application crashes in WAL mode; only an OS crash
+# or power loss can roll back the last few commits
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# PRAGMA user_version: the one-time data migrations already applied
+#   1 - statistics rollups backfilled
+#   2 - executions.created_at filled in for existing rows
+ROLLUPS_BACKFILLED_VERSION = 1
+CREATED_AT_VERSION = 2
+SCHEMA_VERSION = CREATED_AT_VERSION
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of configured SQLite connections for one database file.
+
+    Idle connections are kept (up to ``max_idle``) and handed out LIFO so the
+    hottest connection - with its statement cache and page cache warm - is
+    reused first. Borrowing never blocks: if no idle connection is available
+    a new one is opened, and surplus connections are closed on release.
+    Connections may be used by one thread at a time, whichever borrowed it.
+    """
+
+    def __init__(self, db_path: str, max_idle: int = 8, busy_timeout_ms: int = 5000,
+                 synchronous: str = 'NORMAL', cached_statements: int = 256):
+        if synchronous.upper() not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous.upper()
+        self.cached_statements = cached_statements
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reused = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the pool's pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection (reusing an idle one if possible)."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked (e.g. gunicorn workers): never share the parent's handles
+                self._idle, self._pid = [], os.getpid()
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self.connect()
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a borrowed connection, resetting any state the borrower left."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.isolation_level = ''
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        """Connection counts for health reporting."""
+        with self._lock:
+            return {'idle': len(self._idle), 'opened': self.opened, 'reused': self.reused}
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def configure_pool(db_path: str, **options) -> ConnectionPool:
+    """(Re)create the pool for a database with the given ConnectionPool options."""
+    with _pools_lock:
+        old = _pools.get(db_path)
+        pool = _pools[db_path] = ConnectionPool(db_path, **options)
+    if old:
+        old.close()
+    return pool
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Get the pool for a database, creating one with defaults if needed."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_path, ConnectionPool(db_path))
+    return pool
+
 
 def get_db():
     """Get database connection for current request."""
     if 'db' not in g:
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE_PATH'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool(current_app.config['DATABASE_PATH']).acquire()
     return g.db
 
 
 def close_db(e=None):
-    """Close database connection at end of request."""
+    """Return the request's database connection to the pool."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        get_pool(current_app.config['DATABASE_PATH']).release(db)
 
 
 def init_db(db_path: str):
     """Initialize the database schema."""
-    conn = sqlite3.connect(db_path)
+    conn = get_pool(db_path).connect()
     conn.executescript('''
         CREATE TABLE IF NOT EXISTS executions (
             id TEXT PRIMARY KEY,
@@ -42,9 +173,67 @@ def init_db(db_path: str):
             pid INTEGER
         );
 
-        CREATE INDEX IF NOT EXISTS idx_executions_agent ON executions(agent_folder);
-        CREATE INDEX IF NOT EXISTS idx_executions_status ON executions(status);
-        CREATE INDEX IF NOT EXISTS idx_executions_started ON executions(started_at);
+        -- Listing indexes (keyset order created_at DESC, id DESC) are created below,
+        -- after the created_at column is added to existing databases
+        DROP INDEX IF EXISTS idx_executions_agent;
+        DROP INDEX IF EXISTS idx_executions_status;
+        DROP INDEX IF EXISTS idx_executions_started;
+        DROP INDEX IF EXISTS idx_executions_started_id;
+        DROP INDEX IF EXISTS idx_executions_agent_started;
+        DROP INDEX IF EXISTS idx_executions_status_started;
+
+        CREATE TABLE IF NOT EXISTS execution_jobs (
+            execution_id TEXT PRIMARY KEY,
+            agent_folder TEXT NOT NULL,
+            task TEXT NOT NULL,
+            context TEXT,
+            state TEXT NOT NULL DEFAULT 'pending',
+            claimed_by TEXT,
+            lease_expires_at REAL,
+            attempt INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 2,
+            enqueued_at REAL NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_execution_jobs_state ON execution_jobs(state, enqueued_at);
+
+        CREATE TABLE IF NOT EXISTS execution_output (
+            execution_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            stream TEXT NOT NULL DEFAULT 'stdout',
+            data TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (execution_id, seq)
+        );
+
+        CREATE TABLE IF NOT EXISTS execution_rollups (
+            bucket TEXT NOT NULL,
+            agent_folder TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            success INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            timeout INTEGER NOT NULL DEFAULT 0,
+            duration_count INTEGER NOT NULL DEFAULT 0,
+            duration_sum REAL NOT NULL DEFAULT 0,
+            duration_min REAL,
+            duration_max REAL,
+            PRIMARY KEY (bucket, agent_folder)
+        );
+
+        CREATE TABLE IF NOT EXISTS execution_duration_bins (
+            bucket TEXT NOT NULL,
+            agent_folder TEXT NOT NULL,
+            bin INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, agent_folder, bin)
+        );
+
+        CREATE TABLE IF NOT EXISTS execution_payloads (
+            execution_id TEXT PRIMARY KEY,
+            output BLOB,
+            error BLOB,
+            context BLOB
+        );
     ''')
     # Add pid column if it doesn't exist (for existing databases)
     try:
@@ -60,16 +249,51 @@ def init_db(db_path: str):
     except sqlite3.OperationalError:
         pass  # Column already exists
 
+    # Add queued_at column if it doesn't exist (for existing databases)
+    try:
+        conn.execute('ALTER TABLE executions ADD COLUMN queued_at TEXT')
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+
+    # Add created_at column if it doesn't exist (for existing databases). Unlike
+    # started_at, which is reset when a queued run starts, it never changes, so
+    # listings are paged on it.
+    try:
+        conn.execute('ALTER TABLE executions ADD COLUMN created_at TEXT')
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+
+    # Composite indexes serve filtered listings in keyset order (created_at DESC, id DESC)
+    conn.executescript('''
+        CREATE INDEX IF NOT EXISTS idx_executions_created_id ON executions(created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_executions_agent_created ON executions(agent_folder, created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_executions_status_created ON executions(status, created_at, id);
+    ''')
+
+    # Move large fields off the executions rows (for existing databases)
+    from app.models.execution_payload import migrate_inline_payloads
+    migrate_inline_payloads(conn)
+
+    # One-time data migrations (for existing databases), recorded in user_version:
+    # the rollups can legitimately stay empty (e.g. no timed runs yet)
+    from app.models.execution_stats import rebuild_rollups
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < ROLLUPS_BACKFILLED_VERSION:
+        rebuild_rollups(conn)
+    if version < CREATED_AT_VERSION:
+        # Creation time is queued_at (always set on create) or, for older rows, the original started_at
+        conn.execute('UPDATE executions SET created_at = COALESCE(queued_at, started_at) WHERE created_at IS NULL')
+    if version < SCHEMA_VERSION:
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
     conn.commit()
     conn.close()
 
 
 @contextmanager
 def get_db_connection(db_path: str):
-    """Context manager for database connections outside request context."""
-    conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-    conn.row_factory = sqlite3.Row
-    try:
+    """Context manager for pooled database connections outside request context."""
+    with get_pool(db_path).connection() as conn:
         yield conn
-    finally:
-        conn.close()
@@ -3,11 +3,82 @@ Execution model for tracking agent runs.
 """
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional
+import sqlite3
 import uuid
 import os
+import signal
+
+from flask import current_app
 
 from app.models.database import get_db
+from app.models.execution_payload import PAYLOAD_FIELDS, read_payloads, write_payload
+from app.models.execution_stats import query_latency, query_stats, record_rollup
+from app.models.write_behind import WriteBehind, get_writer
+
+# Columns returned by listings unless more are requested (no large payloads)
+SUMMARY_FIELDS = (
+    'id', 'agent_folder', 'task', 'status', 'started_at', 'completed_at',
+    'duration_seconds', 'triggered_by', 'pid', 'queued_at', 'created_at'
+)
+
+
+def finish_execution(conn: sqlite3.Connection, execution_id: str, status: str,
+                     output: Optional[str] = None, error: Optional[str] = None,
+                     from_statuses: tuple = ('queued', 'running')) -> Optional[dict]:
+    """
+    Move an execution to a terminal status and count it in the rollups.
+
+    The update is guarded on the current status, so a run that was already
+    finished (e.g. killed by the user) is neither overwritten nor counted
+    twice. Does not commit.
+
+    Args:
+        conn: Open database connection
+        execution_id: Execution to finish
+        status: 'success', 'failed' or 'timeout'
+        output: Output payload to store
+        error: Error payload to store
+        from_statuses: Statuses the execution may be finished from
+
+    Returns:
+        Dict with the stored completed_at and duration_seconds, or None if
+        the execution was not in one of ``from_statuses``
+    """
+    row = conn.execute(
+        'SELECT agent_folder, status, started_at FROM executions WHERE id = ?',
+        (execution_id,)
+    ).fetchone()
+    if not row or row[1] not in from_statuses:
+        return None
+    agent_folder, previous, started_at = row
+
+    completed_at = datetime.utcnow().isoformat()
+    duration = None  # Never started (cancelled while queued)
+    if previous == 'running' and started_at:
+        start = datetime.fromisoformat(started_at)
+        duration = max(0.0, (datetime.fromisoformat(completed_at) - start).total_seconds())
+
+    cursor = conn.execute('''
+        UPDATE executions SET status = ?, completed_at = ?, duration_seconds = ?
+        WHERE id = ? AND status = ?
+    ''', (status, completed_at, duration, execution_id, previous))
+    if cursor.rowcount != 1:
+        return None
+
+    fields = {}
+    if output is not None:
+        fields['output'] = output
+    if error is not None:
+        fields['error'] = error
+    write_payload(conn, execution_id, **fields)
+    record_rollup(conn, agent_folder, started_at or completed_at, status, duration)
+    return {'completed_at': completed_at, 'duration_seconds': duration}
+
+
+def _writer() -> WriteBehind:
+    """Batched writer for the app's database."""
+    return get_writer(current_app.config['DATABASE_PATH'])
 
 
 @dataclass
@@ -16,7 +87,7 @@ class Execution:
     id: str
     agent_folder: str
     task: str
-    status: str  # 'running', 'success', 'failed', 'timeout'
+    status: str  # 'queued', 'running', 'success', 'failed', 'timeout'
     output: Optional[str] = None
     error: Optional[str] = None
     started_at: Optional[str] = None
@@ -25,65 +96,78 @@ class Execution:
     triggered_by: str = 'manual'
     pid: Optional[int] = None
     context: Optional[str] = None  # JSON string with URLs, file paths, images metadata
+    queued_at: Optional[str] = None
+    created_at: Optional[str] = None  # Never changes (unlike started_at); listing order
 
     @classmethod
     def create(cls, agent_folder: str, task: str, triggered_by: str = 'manual',
-               context: Optional[str] = None) -> 'Execution':
+               context: Optional[str] = None, status: str = 'running') -> 'Execution':
         """Create a new execution record."""
+        now = datetime.utcnow().isoformat()
         execution = cls(
             id=f"exec_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
             agent_folder=agent_folder,
             task=task,
-            status='running',
-            started_at=datetime.utcnow().isoformat(),
+            status=status,
+            started_at=now,
             triggered_by=triggered_by,
-            context=context
+            context=context,
+            queued_at=now,
+            created_at=now
         )
         execution.save()
         return execution
 
     def save(self):
-        """Save execution to database."""
-        db = get_db()
+        """Save execution to database (large fields go to execution_payloads)."""
+        _writer().run(self._write)
+
+    def _write(self, db: sqlite3.Connection):
+        """Write this record within an open transaction."""
         db.execute('''
             INSERT OR REPLACE INTO executions
-            (id, agent_folder, task, status, output, error, started_at, completed_at, duration_seconds, triggered_by, pid, context)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (id, agent_folder, task, status, started_at, completed_at, duration_seconds, triggered_by, pid,
+             queued_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             self.id, self.agent_folder, self.task, self.status,
-            self.output, self.error, self.started_at, self.completed_at,
-            self.duration_seconds, self.triggered_by, self.pid, self.context
+            self.started_at, self.completed_at, self.duration_seconds,
+            self.triggered_by, self.pid, self.queued_at, self.created_at
         ))
-        db.commit()
+        # Skip unset fields so saving a record never wipes a stored payload
+        write_payload(db, self.id, **{
+            name: getattr(self, name) for name in PAYLOAD_FIELDS if getattr(self, name) is not None
+        })
 
     def complete(self, output: str, status: str = 'success'):
         """Mark execution as complete."""
-        self.status = status
-        self.output = output
-        self.completed_at = datetime.utcnow().isoformat()
-        if self.started_at:
-            start = datetime.fromisoformat(self.started_at)
-            end = datetime.fromisoformat(self.completed_at)
-            self.duration_seconds = (end - start).total_seconds()
-        self.save()
+        self._finish(status, output=output)
 
     def fail(self, error: str):
         """Mark execution as failed."""
-        self.status = 'failed'
-        self.error = error
-        self.completed_at = datetime.utcnow().isoformat()
-        if self.started_at:
-            start = datetime.fromisoformat(self.started_at)
-            end = datetime.fromisoformat(self.completed_at)
-            self.duration_seconds = (end - start).total_seconds()
-        self.save()
+        self._finish('failed', error=error)
+
+    def _finish(self, status: str, output: Optional[str] = None, error: Optional[str] = None,
+                from_statuses: tuple = ('queued', 'running')) -> bool:
+        """Finish via finish_execution and mirror the result on this instance."""
+        finished = _writer().run(lambda conn: finish_execution(
+            conn, self.id, status, output=output, error=error, from_statuses=from_statuses
+        ))
+        if not finished:
+            return False
+        self.status = status
+        if output is not None:
+            self.output = output
+        if error is not None:
+            self.error = error
+        self.completed_at = finished['completed_at']
+        self.duration_seconds = finished['duration_seconds']
+        return True
 
     def set_pid(self, pid: int):
         """Set the process ID for this execution."""
         self.pid = pid
-        db = get_db()
-        db.execute('UPDATE executions SET pid = ? WHERE id = ?', (pid, self.id))
-        db.commit()
+        _writer().set_fields(self.id, pid=pid)
 
     def is_process_alive(self) -> bool:
         """Check if the execution process is still running."""
@@ -100,47 +184,100 @@ class Execution:
         if not self.pid or self.status != 'running':
             return False
         try:
-            os.kill(self.pid, 9)  # SIGKILL
-            self.status = 'failed'
-            self.error = 'Process killed by user'
-            self.completed_at = datetime.utcnow().isoformat()
-            if self.started_at:
-                start = datetime.fromisoformat(self.started_at)
-                end = datetime.fromisoformat(self.completed_at)
-                self.duration_seconds = (end - start).total_seconds()
-            self.save()
-            return True
-        except (OSError, ProcessLookupError):
+            # The CLI leads its own process group, so its MCP servers go with it
+            os.killpg(self.pid, signal.SIGKILL)
+        except OSError:
+            try:
+                os.kill(self.pid, signal.SIGKILL)  # Not a group leader (started before process groups)
+            except (OSError, ProcessLookupError):
+                return False
+        self._finish('failed', error='Process killed by user', from_statuses=('running',))
+        return True
+
+    def cancel(self, reason: str = 'Cancelled before start') -> bool:
+        """Cancel a queued execution. Returns True if it was still queued."""
+        if self.status != 'queued':
             return False
+        return self._finish('failed', error=reason, from_statuses=('queued',))
+
+    @property
+    def cursor(self) -> str:
+        """Keyset pagination cursor for this row (``created_at,id``)."""
+        return f"{self.created_at},{self.id}"
 
-    def to_dict(self) -> dict:
-        """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+    @staticmethod
+    def parse_cursor(cursor: str) -> tuple[str, str]:
+        """Split a ``created_at,id`` cursor. Raises ValueError if malformed."""
+        created_at, sep, execution_id = cursor.partition(',')
+        if not sep or not created_at or not execution_id:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        datetime.fromisoformat(created_at)
+        return created_at, execution_id
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Seconds spent queued before a worker picked the execution up."""
+        if not self.queued_at:
+            return None
+        start = datetime.fromisoformat(self.queued_at)
+        end = datetime.utcnow() if self.status == 'queued' else datetime.fromisoformat(self.started_at)
+        return max(0.0, (end - start).total_seconds())
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> dict:
+        """
+        Convert to dictionary for JSON serialization.
+
+        Args:
+            fields: Extra fields to include on top of the summary projection;
+                None includes everything
+        """
+        data = asdict(self)
+        if fields is not None:
+            keep = set(SUMMARY_FIELDS) | set(fields)
+            data = {k: v for k, v in data.items() if k in keep}
+        data['wait_seconds'] = self.wait_seconds
+        return data
 
     def delete(self) -> bool:
         """Delete this execution from the database. Returns True if deleted."""
         db = get_db()
+        db.execute('DELETE FROM execution_output WHERE execution_id = ?', (self.id,))
+        db.execute('DELETE FROM execution_payloads WHERE execution_id = ?', (self.id,))
         db.execute('DELETE FROM executions WHERE id = ?', (self.id,))
         db.commit()
         return True
 
     @classmethod
     def get_by_id(cls, execution_id: str) -> Optional['Execution']:
-        """Fetch execution by ID."""
+        """Fetch execution by ID, including its payload."""
         db = get_db()
         row = db.execute(
-            'SELECT * FROM executions WHERE id = ?',
+            f'SELECT {", ".join(SUMMARY_FIELDS)} FROM executions WHERE id = ?',
             (execution_id,)
         ).fetchone()
-        if row:
-            return cls(**dict(row))
-        return None
+        if not row:
+            return None
+        payload = read_payloads(db, [execution_id]).get(execution_id, {})
+        return cls(**dict(row), **payload)
 
     @classmethod
-    def list_all(cls, agent_folder: str = None, status: str = None, limit: int = 50, offset: int = 0) -> list:
-        """List executions with optional filters."""
+    def list_all(cls, agent_folder: str = None, status: str = None, limit: int = 50, offset: int = 0,
+                 fields: Optional[Iterable[str]] = None,
+                 after: Optional[tuple[str, str]] = None) -> list:
+        """
+        List executions with optional filters, most recently created first.
+
+        Only the summary columns are read unless ``fields`` names payload
+        fields (output, error, context) to load as well.
+
+        Pass ``after`` (the ``cursor`` of the last row of the previous page)
+        for keyset pagination; it seeks straight to the page via the
+        composite indexes, so deep pages cost the same as the first. Pages
+        are keyed on the immutable ``created_at``, so a queued run starting
+        while someone pages never moves between pages.
+        """
         db = get_db()
-        query = 'SELECT * FROM executions WHERE 1=1'
+        query = f'SELECT {", ".join(SUMMARY_FIELDS)} FROM executions WHERE 1=1'
         params = []
 
         if agent_folder:
@@ -149,31 +286,36 @@ class Execution:
         if status:
             query += ' AND status = ?'
             params.append(status)
+        if after:
+            query += ' AND (created_at, id) < (?, ?)'
+            params.extend(after)
 
-        query += ' ORDER BY started_at DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
+        query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+        params.append(limit)
+        if offset and not after:
+            query += ' OFFSET ?'
+            params.append(offset)
 
         rows = db.execute(query, params).fetchall()
-        return [cls(**dict(row)) for row in rows]
+        executions = [cls(**dict(row)) for row in rows]
+
+        payload_fields = [f for f in (fields or ()) if f in PAYLOAD_FIELDS]
+        if payload_fields and executions:
+            payloads = read_payloads(db, [e.id for e in executions], payload_fields)
+            for execution in executions:
+                for name, value in payloads.get(execution.id, {}).items():
+                    setattr(execution, name, value)
+        return executions
 
     @classmethod
-    def get_stats(cls, hours: int = 24) -> dict:
-        """Get execution statistics."""
-        db = get_db()
-        cutoff = datetime.utcnow().isoformat()[:10]  # Today's date
-
-        total = db.execute('SELECT COUNT(*) FROM executions').fetchone()[0]
-        running = db.execute("SELECT COUNT(*) FROM executions WHERE status = 'running'").fetchone()[0]
-        recent = db.execute(
-            "SELECT COUNT(*) FROM executions WHERE started_at >= datetime('now', '-24 hours')"
-        ).fetchone()[0]
-        failed = db.execute(
-            "SELECT COUNT(*) FROM executions WHERE status = 'failed' AND started_at >= datetime('now', '-24 hours')"
-        ).fetchone()[0]
-
-        return {
-            'total': total,
-            'running': running,
-            'recent_24h': recent,
-            'failed_24h': failed
-        }
+    def get_stats(cls, hours: int = 24, agent_folder: Optional[str] = None,
+                  by_agent: bool = False) -> dict:
+        """Get execution statistics (served from the hourly rollups)."""
+        return query_stats(get_db(), hours=hours, agent_folder=agent_folder, by_agent=by_agent)
+
+    @classmethod
+    def get_latency(cls, hours: int = 24, agent_folder: Optional[str] = None,
+                    interval: Optional[str] = None, include_histogram: bool = False) -> dict:
+        """Get duration percentiles (served from the histogram sketches)."""
+        return query_latency(get_db(), hours=hours, agent_folder=agent_folder,
+                             interval=interval, include_histogram=include_histogram)
@@ -0,0 +1,131 @@
+"""
+Incremental execution output, stored as it is produced.
+
+A running CLI's stdout and stderr are appended to ``execution_output`` in
+numbered segments (flushed every few KB or fraction of a second), so clients
+can tail a run - resuming from the last segment they saw - and partial output
+survives a crash, while the orchestrator only ever holds one unflushed
+segment per run in memory.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+
+from app.models.database import get_pool
+
+
+def next_seq(conn: sqlite3.Connection, execution_id: str) -> int:
+    """Next free sequence number for an execution (re-dispatched runs append)."""
+    row = conn.execute(
+        'SELECT COALESCE(MAX(seq), 0) FROM execution_output WHERE execution_id = ?',
+        (execution_id,)
+    ).fetchone()
+    return row[0] + 1
+
+
+def read_output(conn: sqlite3.Connection, execution_id: str, after_seq: int = 0,
+                limit: int = 500) -> list:
+    """Output segments with sequence numbers greater than ``after_seq``, in order."""
+    return conn.execute('''
+        SELECT seq, stream, data, created_at FROM execution_output
+        WHERE execution_id = ? AND seq > ?
+        ORDER BY seq LIMIT ?
+    ''', (execution_id, after_seq, limit)).fetchall()
+
+
+class OutputCapture:
+    """
+    Buffers output lines for one execution and appends them as segments.
+
+    A segment is flushed when the buffer reaches ``flush_bytes`` or, from a
+    background thread, every ``flush_interval`` seconds - whichever comes
+    first. Safe to write from several threads (stdout and stderr readers).
+    """
+
+    # Unflushed data beyond this many segments' worth is dropped if the
+    # database stays unwritable, so memory stays bounded no matter what.
+    MAX_PENDING_SEGMENTS = 8
+
+    def __init__(self, db_path: str, execution_id: str,
+                 flush_bytes: int = 16384, flush_interval: float = 0.5):
+        self.execution_id = execution_id
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self._pool = get_pool(db_path)
+        self._conn = self._pool.acquire()  # Held for the run; returned on close()
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[str]] = {}  # stream -> lines
+        self._pending_bytes = 0
+        self._seq = next_seq(self._conn, execution_id)
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def write(self, stream: str, line: str):
+        """Buffer one line of ``stream`` ('stdout' or 'stderr'). Dropped once closed."""
+        with self._lock:
+            if self._conn is None:
+                # Late line (e.g. a reader outliving the run); the connection is back in the pool
+                self.bytes_dropped += len(line) + 1
+                return
+            self._pending.setdefault(stream, []).append(line)
+            self._pending_bytes += len(line) + 1
+            if self._pending_bytes >= self.flush_bytes:
+                self._flush_locked()
+
+    def flush(self):
+        """Write any buffered lines now (no-op once closed)."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_locked()
+
+    def close(self):
+        """Stop the background flusher and write the final segment."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join(timeout=self.flush_interval * 4)
+        with self._lock:
+            self._flush_locked()
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def __enter__(self) -> 'OutputCapture':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self):
+        """Append one segment per stream with buffered data (caller holds the lock)."""
+        if not self._pending:
+            return
+        now = datetime.utcnow().isoformat()
+        rows = []
+        seq = self._seq
+        for stream, lines in self._pending.items():
+            rows.append((self.execution_id, seq, stream, '\n'.join(lines), now))
+            seq += 1
+        try:
+            self._conn.executemany('''
+                INSERT INTO execution_output (execution_id, seq, stream, data, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self._conn.commit()
+        except sqlite3.Error:
+            self._conn.rollback()
+            if self._pending_bytes > self.flush_bytes * self.MAX_PENDING_SEGMENTS:
+                self.bytes_dropped += self._pending_bytes
+                self._pending.clear()
+                self._pending_bytes = 0
+            return  # Otherwise keep the buffer and retry on the next flush
+        self._seq = seq
+        self.bytes_written += self._pending_bytes
+        self._pending.clear()
+        self._pending_bytes = 0
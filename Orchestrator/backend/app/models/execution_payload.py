@@ -0,0 +1,91 @@
+"""
+Out-of-row storage for large execution fields.
+
+``output``, ``error`` and ``context`` can be megabytes each, so they live
+zlib-compressed in ``execution_payloads`` (one row per execution) instead of
+on the ``executions`` row. Listings read only the narrow executions table;
+the payload is joined in when a caller asks for it.
+"""
+import sqlite3
+import zlib
+from typing import Iterable, Optional
+
+PAYLOAD_FIELDS = ('output', 'error', 'context')
+
+
+def compress(value: Optional[str]) -> Optional[bytes]:
+    """Compress a text value for storage."""
+    if value is None:
+        return None
+    return zlib.compress(value.encode('utf-8'), 6)
+
+
+def decompress(value) -> Optional[str]:
+    """Inverse of compress (plain text from older rows passes through)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    return zlib.decompress(value).decode('utf-8')
+
+
+def write_payload(conn: sqlite3.Connection, execution_id: str, **fields):
+    """
+    Store payload fields for an execution (does not commit).
+
+    Only the fields passed are written; e.g. ``write_payload(conn, id,
+    error='...')`` leaves an existing output untouched.
+    """
+    unknown = set(fields) - set(PAYLOAD_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown payload fields: {', '.join(sorted(unknown))}")
+    if not fields:
+        return
+    conn.execute(
+        'INSERT INTO execution_payloads (execution_id) VALUES (?) ON CONFLICT(execution_id) DO NOTHING',
+        (execution_id,)
+    )
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    conn.execute(
+        f'UPDATE execution_payloads SET {assignments} WHERE execution_id = ?',
+        (*(compress(v) for v in fields.values()), execution_id)
+    )
+
+
+def read_payloads(conn: sqlite3.Connection, execution_ids: list[str],
+                  fields: Iterable[str] = PAYLOAD_FIELDS) -> dict[str, dict]:
+    """Load payload fields for several executions: {execution_id: {field: value}}."""
+    fields = [f for f in PAYLOAD_FIELDS if f in set(fields)]
+    if not execution_ids or not fields:
+        return {}
+    placeholders = ','.join('?' * len(execution_ids))
+    rows = conn.execute(
+        f'SELECT execution_id, {", ".join(fields)} FROM execution_payloads '
+        f'WHERE execution_id IN ({placeholders})',
+        execution_ids
+    ).fetchall()
+    return {
+        row[0]: {name: decompress(row[i + 1]) for i, name in enumerate(fields)}
+        for row in rows
+    }
+
+
+def migrate_inline_payloads(conn: sqlite3.Connection, batch_size: int = 500) -> int:
+    """Move output/error/context still stored on executions rows into the side table."""
+    moved = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, output, error, context FROM executions
+            WHERE output IS NOT NULL OR error IS NOT NULL OR context IS NOT NULL
+            LIMIT ?
+        ''', (batch_size,)).fetchall()
+        if not rows:
+            return moved
+        for execution_id, output, error, context in rows:
+            write_payload(conn, execution_id, output=output, error=error, context=context)
+            conn.execute(
+                'UPDATE executions SET output = NULL, error = NULL, context = NULL WHERE id = ?',
+                (execution_id,)
+            )
+        conn.commit()
+        moved += len(rows)
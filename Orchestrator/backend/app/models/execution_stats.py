@@ -0,0 +1,289 @@
+"""
+Pre-aggregated execution statistics.
+
+Each finished execution increments one row of ``execution_rollups`` - keyed by
+the hour it started and its agent - so dashboard statistics are a scan over
+(hours x agents) small rows instead of over the whole execution history.
+Rollups are history: deleting an execution does not decrement them.
+
+Durations are also counted into log-scale histogram bins per (hour, agent)
+in ``execution_duration_bins``. Bin ``i`` covers ``(GAMMA**(i-1), GAMMA**i]``
+seconds, so any set of bins merges by summing counts and percentiles read
+from the merged histogram are within ``(GAMMA-1)/(GAMMA+1)`` (~2.4%) of the
+true value.
+"""
+import math
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Optional
+
+TERMINAL_STATUSES = ('success', 'failed', 'timeout')
+
+# Histogram sketch parameters
+GAMMA = 1.05
+MIN_DURATION = 0.01  # Seconds; shorter durations share the lowest bin
+PERCENTILES = (50, 90, 95, 99)
+
+
+def hour_bucket(timestamp: str) -> str:
+    """Rollup bucket (UTC hour start, ISO format) for an ISO timestamp."""
+    return datetime.fromisoformat(timestamp).strftime('%Y-%m-%dT%H:00:00')
+
+
+def duration_bin(duration: Optional[float]) -> Optional[int]:
+    """Histogram bin index for a duration in seconds (None if no duration)."""
+    if duration is None:
+        return None
+    return math.ceil(math.log(max(duration, MIN_DURATION), GAMMA) - 1e-9)
+
+
+def bin_bounds(index: int) -> tuple[float, float]:
+    """Lower (exclusive) and upper (inclusive) bound in seconds of a bin."""
+    return GAMMA ** (index - 1), GAMMA ** index
+
+
+def bin_value(index: int) -> float:
+    """Representative duration of a bin (minimises worst-case relative error)."""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def record_rollup(conn: sqlite3.Connection, agent_folder: str, started_at: str,
+                  status: str, duration: Optional[float]):
+    """Add one finished execution to its hourly rollup and histogram (does not commit)."""
+    conn.execute('''
+        INSERT INTO execution_rollups
+        (bucket, agent_folder, count, success, failed, timeout,
+         duration_count, duration_sum, duration_min, duration_max)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(bucket, agent_folder) DO UPDATE SET
+            count = count + 1,
+            success = success + excluded.success,
+            failed = failed + excluded.failed,
+            timeout = timeout + excluded.timeout,
+            duration_count = duration_count + excluded.duration_count,
+            duration_sum = duration_sum + excluded.duration_sum,
+            duration_min = MIN(COALESCE(duration_min, excluded.duration_min),
+                               COALESCE(excluded.duration_min, duration_min)),
+            duration_max = MAX(COALESCE(duration_max, excluded.duration_max),
+                               COALESCE(excluded.duration_max, duration_max))
+    ''', (
+        hour_bucket(started_at), agent_folder,
+        int(status == 'success'), int(status == 'failed'), int(status == 'timeout'),
+        int(duration is not None), duration or 0.0, duration, duration
+    ))
+    if duration is not None:
+        conn.execute('''
+            INSERT INTO execution_duration_bins (bucket, agent_folder, bin, count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT(bucket, agent_folder, bin) DO UPDATE SET count = count + 1
+        ''', (hour_bucket(started_at), agent_folder, duration_bin(duration)))
+
+
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Recompute all rollups from the executions table (does not commit)."""
+    conn.execute('DELETE FROM execution_rollups')
+    conn.execute(f'''
+        INSERT INTO execution_rollups
+        (bucket, agent_folder, count, success, failed, timeout,
+         duration_count, duration_sum, duration_min, duration_max)
+        SELECT strftime('%Y-%m-%dT%H:00:00', started_at), agent_folder, COUNT(*),
+               SUM(status = 'success'), SUM(status = 'failed'), SUM(status = 'timeout'),
+               COUNT(duration_seconds), COALESCE(SUM(duration_seconds), 0),
+               MIN(duration_seconds), MAX(duration_seconds)
+        FROM executions
+        WHERE status IN ({','.join('?' * len(TERMINAL_STATUSES))})
+        GROUP BY 1, 2
+    ''', TERMINAL_STATUSES)
+
+    conn.execute('DELETE FROM execution_duration_bins')
+    conn.create_function('duration_bin', 1, duration_bin, deterministic=True)
+    conn.execute(f'''
+        INSERT INTO execution_duration_bins (bucket, agent_folder, bin, count)
+        SELECT strftime('%Y-%m-%dT%H:00:00', started_at), agent_folder,
+               duration_bin(duration_seconds), COUNT(*)
+        FROM executions
+        WHERE status IN ({','.join('?' * len(TERMINAL_STATUSES))})
+          AND duration_seconds IS NOT NULL
+        GROUP BY 1, 2, 3
+    ''', TERMINAL_STATUSES)
+
+
+def query_stats(conn: sqlite3.Connection, hours: int = 24, agent_folder: Optional[str] = None,
+                by_agent: bool = False) -> dict:
+    """
+    Execution statistics from the rollups.
+
+    Windows are aligned to whole hours: ``hours=24`` covers the current hour
+    plus the 23 before it.
+
+    Args:
+        hours: Size of the time window
+        agent_folder: Restrict to one agent
+        by_agent: Include a per-agent breakdown for the window
+    """
+    now = datetime.utcnow()
+    window_start = (now - timedelta(hours=hours - 1)).strftime('%Y-%m-%dT%H:00:00')
+    day_start = (now - timedelta(hours=23)).strftime('%Y-%m-%dT%H:00:00')
+
+    agent_filter = ' AND agent_folder = ?' if agent_folder else ''
+    agent_params = [agent_folder] if agent_folder else []
+
+    totals = conn.execute(f'''
+        SELECT
+            COALESCE(SUM(count), 0),
+            COALESCE(SUM(CASE WHEN bucket >= ? THEN count END), 0),
+            COALESCE(SUM(CASE WHEN bucket >= ? THEN failed + timeout END), 0)
+        FROM execution_rollups WHERE 1=1{agent_filter}
+    ''', [day_start, day_start, *agent_params]).fetchone()
+
+    window_sql = f'''
+        SELECT {'agent_folder,' if by_agent else ''}
+               SUM(count), SUM(success), SUM(failed), SUM(timeout),
+               SUM(duration_count), SUM(duration_sum), MIN(duration_min), MAX(duration_max)
+        FROM execution_rollups WHERE bucket >= ?{agent_filter}
+        {'GROUP BY agent_folder ORDER BY SUM(count) DESC' if by_agent else ''}
+    '''
+    window_rows = conn.execute(window_sql, [window_start, *agent_params]).fetchall()
+
+    # Live counts come straight from the (status, started_at) index
+    live = dict(conn.execute(f'''
+        SELECT status, COUNT(*) FROM executions
+        WHERE status IN ('queued', 'running'){agent_filter}
+        GROUP BY status
+    ''', agent_params).fetchall())
+
+    stats = {
+        'total': totals[0],
+        'running': live.get('running', 0),
+        'queued': live.get('queued', 0),
+        'recent_24h': totals[1],
+        'failed_24h': totals[2],
+    }
+    if by_agent:
+        stats['window'] = _summarize(_sum_rows(window_rows), hours)
+        stats['agents'] = [
+            {'agent_folder': row[0], **_summarize(tuple(row[1:]), hours)}
+            for row in window_rows
+        ]
+    else:
+        stats['window'] = _summarize(tuple(window_rows[0]), hours)
+    return stats
+
+
+def _sum_rows(rows: list) -> tuple:
+    """Combine per-agent window rows (agent_folder first) into one."""
+    sums = [0, 0, 0, 0, 0, 0.0]
+    duration_min = duration_max = None
+    for row in rows:
+        for i in range(6):
+            sums[i] += row[i + 1] or 0
+        if row[7] is not None:
+            duration_min = row[7] if duration_min is None else min(duration_min, row[7])
+        if row[8] is not None:
+            duration_max = row[8] if duration_max is None else max(duration_max, row[8])
+    return (*sums, duration_min, duration_max)
+
+
+def _summarize(row: tuple, hours: int) -> dict:
+    """Shape one aggregate row (count, success, failed, timeout, n, sum, min, max)."""
+    count, success, failed, timeout, duration_count, duration_sum, duration_min, duration_max = row
+    count = count or 0
+    return {
+        'hours': hours,
+        'total': count,
+        'success': success or 0,
+        'failed': failed or 0,
+        'timeout': timeout or 0,
+        'success_rate': round((success or 0) / count, 4) if count else None,
+        'avg_duration_seconds': round(duration_sum / duration_count, 3) if duration_count else None,
+        'min_duration_seconds': duration_min,
+        'max_duration_seconds': duration_max,
+    }
+
+
+def query_latency(conn: sqlite3.Connection, hours: int = 24, agent_folder: Optional[str] = None,
+                  interval: Optional[str] = None, include_histogram: bool = False) -> dict:
+    """
+    Duration percentiles merged from the histogram sketches.
+
+    Args:
+        hours: Size of the time window (aligned to whole hours)
+        agent_folder: Restrict to one agent
+        interval: Also break the window down by 'hour' or 'day'
+        include_histogram: Include the non-empty bins of each histogram
+
+    Returns:
+        Dict with the overall distribution, one per agent, and (with
+        ``interval``) one per time bucket
+    """
+    window_start = (datetime.utcnow() - timedelta(hours=hours - 1)).strftime('%Y-%m-%dT%H:00:00')
+    agent_filter = ' AND agent_folder = ?' if agent_folder else ''
+    params = [window_start, *([agent_folder] if agent_folder else [])]
+
+    # Only bins are read - at most (hours x agents x occupied bins) rows
+    rows = conn.execute(f'''
+        SELECT bucket, agent_folder, bin, count FROM execution_duration_bins
+        WHERE bucket >= ?{agent_filter}
+    ''', params).fetchall()
+
+    overall: dict[int, int] = {}
+    by_agent: dict[str, dict[int, int]] = {}
+    by_time: dict[str, dict[int, int]] = {}
+    for bucket, agent, index, count in rows:
+        overall[index] = overall.get(index, 0) + count
+        agent_bins = by_agent.setdefault(agent, {})
+        agent_bins[index] = agent_bins.get(index, 0) + count
+        if interval:
+            key = bucket[:10] if interval == 'day' else bucket
+            time_bins = by_time.setdefault(key, {})
+            time_bins[index] = time_bins.get(index, 0) + count
+
+    result = {
+        'hours': hours,
+        'relative_accuracy': round((GAMMA - 1) / (GAMMA + 1), 4),
+        'overall': _distribution(overall, include_histogram),
+        'agents': sorted(
+            ({'agent_folder': agent, **_distribution(bins, include_histogram)}
+             for agent, bins in by_agent.items()),
+            key=lambda a: a['p95'] or 0, reverse=True
+        ),
+    }
+    if interval:
+        result['interval'] = interval
+        result['buckets'] = [
+            {'bucket': key, **_distribution(by_time[key], include_histogram)}
+            for key in sorted(by_time)
+        ]
+    return result
+
+
+def _distribution(bins: dict[int, int], include_histogram: bool) -> dict:
+    """Count, percentiles and (optionally) histogram of one merged sketch."""
+    total = sum(bins.values())
+    data = {'count': total}
+    ordered = sorted(bins.items())
+    for p in PERCENTILES:
+        data[f'p{p}'] = _percentile(ordered, total, p)
+    if include_histogram:
+        data['histogram'] = [
+            {
+                'lower': round(bin_bounds(index)[0], 4) if index > duration_bin(MIN_DURATION) else 0.0,
+                'upper': round(bin_bounds(index)[1], 4),
+                'count': count,
+            }
+            for index, count in ordered
+        ]
+    return data
+
+
+def _percentile(ordered: list[tuple[int, int]], total: int, p: float) -> Optional[float]:
+    """Nearest-rank percentile over sorted (bin, count) pairs."""
+    if not total:
+        return None
+    rank = max(1, math.ceil(p / 100 * total))
+    seen = 0
+    for index, count in ordered:
+        seen += count
+        if seen >= rank:
+            return round(bin_value(index), 3)
+    return round(bin_value(ordered[-1][0]), 3)
@@ -0,0 +1,357 @@
+"""
+Durable execution job queue backed by SQLite.
+
+Every queued execution has a row in ``execution_jobs``. Workers (in any
+process sharing the database) claim the oldest pending job atomically and hold
+a time-limited lease on it, renewing the lease while the run is in progress.
+If a worker dies its lease expires and the job is re-dispatched, so queued
+intent survives restarts and deploys.
+"""
+import os
+import signal
+import socket
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.models.database import get_db_connection
+from app.models.execution import finish_execution
+from app.models.write_behind import get_writer
+
+
+class QueueFullError(Exception):
+    """Raised when the pending queue has no room for another execution."""
+
+
+@dataclass
+class ExecutionJob:
+    """A queued (or claimed) execution."""
+    execution_id: str
+    agent_folder: str
+    task: str
+    context: Optional[str] = None  # JSON string, as stored on the execution
+    state: str = 'pending'  # 'pending', 'claimed'
+    claimed_by: Optional[str] = None
+    lease_expires_at: Optional[float] = None  # Unix timestamp
+    attempt: int = 0
+    max_attempts: int = 2
+    enqueued_at: Optional[float] = None  # Unix timestamp
+
+
+class JobQueue:
+    """
+    Atomic enqueue/claim/renew/complete operations on ``execution_jobs``.
+
+    Args:
+        db_path: SQLite database path
+        max_queue: Most pending jobs
+        max_attempts: Claims per job before it is failed
+        cli_name: Executable name of the CLI, used to recognise a dead
+            worker's leftover process before killing it
+        holder_grace: How long past its lease a job whose claiming process
+            is still alive on this host is left to that process (seconds)
+    """
+
+    def __init__(self, db_path: str, max_queue: int = 50, max_attempts: int = 2,
+                 cli_name: str = 'claude', holder_grace: float = 600):
+        self.db_path = db_path
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.cli_name = cli_name
+        self.holder_grace = holder_grace
+
+    def enqueue(self, execution_id: str, agent_folder: str, task: str,
+                context: Optional[str] = None) -> int:
+        """
+        Add a job to the queue.
+
+        Returns:
+            The job's position in the pending queue (0 = next to start)
+
+        Raises:
+            QueueFullError: If the pending queue is at capacity
+        """
+        def insert(conn) -> int:
+            # The single writer serialises this check with every other enqueue
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM execution_jobs WHERE state = 'pending'"
+            ).fetchone()[0]
+            if pending >= self.max_queue:
+                raise QueueFullError(f"Execution queue is full ({pending} pending)")
+            conn.execute('''
+                INSERT INTO execution_jobs
+                (execution_id, agent_folder, task, context, state, attempt, max_attempts, enqueued_at)
+                VALUES (?, ?, ?, ?, 'pending', 0, ?, ?)
+            ''', (execution_id, agent_folder, task, context, self.max_attempts, time.time()))
+            return pending
+
+        return get_writer(self.db_path).run(insert)
+
+    def claim(self, worker_id: str, lease_seconds: float,
+              max_in_flight: Optional[int] = None) -> Optional[ExecutionJob]:
+        """
+        Atomically claim the oldest pending job.
+
+        Args:
+            worker_id: Identifier recorded in claimed_by
+            lease_seconds: How long the claim is valid without renewal
+            max_in_flight: Global cap on live claims across all workers
+
+        Returns:
+            The claimed job, or None if nothing is runnable
+        """
+        now = time.time()
+        with get_db_connection(self.db_path) as conn:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if max_in_flight is not None:
+                    in_flight = conn.execute(
+                        "SELECT COUNT(*) FROM execution_jobs WHERE state = 'claimed' AND lease_expires_at > ?",
+                        (now,)
+                    ).fetchone()[0]
+                    if in_flight >= max_in_flight:
+                        conn.execute('ROLLBACK')
+                        return None
+
+                row = conn.execute(
+                    "SELECT * FROM execution_jobs WHERE state = 'pending' ORDER BY enqueued_at LIMIT 1"
+                ).fetchone()
+                if not row:
+                    conn.execute('ROLLBACK')
+                    return None
+
+                conn.execute('''
+                    UPDATE execution_jobs
+                    SET state = 'claimed', claimed_by = ?, lease_expires_at = ?, attempt = attempt + 1
+                    WHERE execution_id = ?
+                ''', (worker_id, now + lease_seconds, row['execution_id']))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        job = ExecutionJob(**dict(row))
+        job.state = 'claimed'
+        job.claimed_by = worker_id
+        job.lease_expires_at = now + lease_seconds
+        job.attempt += 1
+        return job
+
+    def renew(self, execution_ids: list[str], worker_id: str, lease_seconds: float) -> int:
+        """Extend the leases held by a worker. Returns the number renewed."""
+        if not execution_ids:
+            return 0
+        placeholders = ','.join('?' * len(execution_ids))
+        with get_db_connection(self.db_path) as conn:
+            cursor = conn.execute(f'''
+                UPDATE execution_jobs SET lease_expires_at = ?
+                WHERE claimed_by = ? AND state = 'claimed' AND execution_id IN ({placeholders})
+            ''', (time.time() + lease_seconds, worker_id, *execution_ids))
+            conn.commit()
+            return cursor.rowcount
+
+    def complete(self, execution_id: str, worker_id: str) -> bool:
+        """Drop a finished job. Returns False if the worker no longer held it."""
+        return get_writer(self.db_path).run(lambda conn: conn.execute(
+            'DELETE FROM execution_jobs WHERE execution_id = ? AND claimed_by = ?',
+            (execution_id, worker_id)
+        ).rowcount == 1)
+
+    def cancel(self, execution_id: str) -> bool:
+        """Remove a job that has not been claimed yet. Returns True if removed."""
+        with get_db_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM execution_jobs WHERE execution_id = ? AND state = 'pending'",
+                (execution_id,)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def position(self, execution_id: str) -> Optional[int]:
+        """Get a job's position in the pending queue, or None if not pending."""
+        with get_db_connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT enqueued_at FROM execution_jobs WHERE execution_id = ? AND state = 'pending'",
+                (execution_id,)
+            ).fetchone()
+            if not row:
+                return None
+            return conn.execute(
+                "SELECT COUNT(*) FROM execution_jobs WHERE state = 'pending' AND enqueued_at < ?",
+                (row['enqueued_at'],)
+            ).fetchone()[0]
+
+    def requeue_expired(self) -> dict:
+        """
+        Re-dispatch jobs whose lease expired (their worker died or hung).
+
+        Jobs with attempts left go back to 'pending' and their execution back
+        to 'queued'; the rest are dropped and their execution marked failed.
+        Any CLI process the dead worker left behind is killed first, with its
+        process group (MCP servers), once it is confirmed to still be that CLI.
+
+        A job whose claiming process is still alive on this host (it missed
+        renewals, e.g. while the database was busy) is left to it until
+        ``holder_grace`` past the lease: re-running a live execution would
+        repeat its side effects.
+
+        Returns:
+            Dict with 'requeued' and 'failed' execution IDs
+        """
+        now = time.time()
+        requeued, failed = [], []
+        with get_db_connection(self.db_path) as conn:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute('''
+                    SELECT j.execution_id, j.attempt, j.max_attempts, j.claimed_by,
+                           j.lease_expires_at, e.pid, e.status
+                    FROM execution_jobs j LEFT JOIN executions e ON e.id = j.execution_id
+                    WHERE j.state = 'claimed' AND j.lease_expires_at <= ?
+                ''', (now,)).fetchall()
+
+                for row in rows:
+                    if row['status'] not in ('queued', 'running'):
+                        # Finished (or deleted) but the worker died before dropping the job
+                        conn.execute('DELETE FROM execution_jobs WHERE execution_id = ?', (row['execution_id'],))
+                        continue
+                    if now - row['lease_expires_at'] < self.holder_grace and _holder_alive(row['claimed_by']):
+                        continue
+                    _kill_orphan(row['pid'], self.cli_name)
+                    if row['attempt'] < row['max_attempts']:
+                        conn.execute('''
+                            UPDATE execution_jobs
+                            SET state = 'pending', claimed_by = NULL, lease_expires_at = NULL
+                            WHERE execution_id = ?
+                        ''', (row['execution_id'],))
+                        conn.execute(
+                            "UPDATE executions SET status = 'queued', pid = NULL WHERE id = ?",
+                            (row['execution_id'],)
+                        )
+                        requeued.append(row['execution_id'])
+                    else:
+                        conn.execute('DELETE FROM execution_jobs WHERE execution_id = ?', (row['execution_id'],))
+                        _fail_execution(conn, row['execution_id'],
+                                        f"Worker lost after {row['attempt']} attempt(s)")
+                        failed.append(row['execution_id'])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return {'requeued': requeued, 'failed': failed}
+
+    def fail_orphans(self, grace_seconds: float = 60) -> list[str]:
+        """
+        Fail queued/running executions that have no job row.
+
+        These were started by an older orchestrator (or lost mid-enqueue) and
+        nothing will ever finish them. Runs whose CLI process is still alive
+        (checked as in ``_kill_orphan``, so a reused pid does not count), and
+        rows younger than the grace period (possibly mid-enqueue in another
+        process), are left alone.
+
+        Returns:
+            IDs of executions marked failed
+        """
+        cutoff = datetime.utcfromtimestamp(time.time() - grace_seconds).isoformat()
+        failed = []
+        with get_db_connection(self.db_path) as conn:
+            rows = conn.execute('''
+                SELECT e.id, e.pid FROM executions e
+                LEFT JOIN execution_jobs j ON j.execution_id = e.id
+                WHERE e.status IN ('queued', 'running') AND j.execution_id IS NULL
+                  AND COALESCE(e.queued_at, e.started_at) < ?
+            ''', (cutoff,)).fetchall()
+            for row in rows:
+                if _pid_alive(row['pid']) and _is_cli_process(row['pid'], self.cli_name):
+                    continue
+                _fail_execution(conn, row['id'], 'Orchestrator restarted before the execution finished')
+                failed.append(row['id'])
+            conn.commit()
+        return failed
+
+    def stats(self) -> dict:
+        """Queue depth, live claims, and the oldest pending wait."""
+        now = time.time()
+        with get_db_connection(self.db_path) as conn:
+            row = conn.execute('''
+                SELECT
+                    SUM(state = 'pending') AS queued,
+                    SUM(state = 'claimed' AND lease_expires_at > ?) AS running,
+                    SUM(state = 'claimed' AND lease_expires_at <= ?) AS expired,
+                    MIN(CASE WHEN state = 'pending' THEN enqueued_at END) AS oldest
+                FROM execution_jobs
+            ''', (now, now)).fetchone()
+            pending = conn.execute('''
+                SELECT execution_id, agent_folder, enqueued_at, attempt FROM execution_jobs
+                WHERE state = 'pending' ORDER BY enqueued_at LIMIT 100
+            ''').fetchall()
+        return {
+            'queued': row['queued'] or 0,
+            'running': row['running'] or 0,
+            'expired_leases': row['expired'] or 0,
+            'oldest_wait_seconds': round(now - row['oldest'], 3) if row['oldest'] else 0.0,
+            'pending': [
+                {
+                    'execution_id': p['execution_id'],
+                    'agent_folder': p['agent_folder'],
+                    'wait_seconds': round(now - p['enqueued_at'], 3),
+                    'attempt': p['attempt'],
+                }
+                for p in pending
+            ],
+        }
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Check whether a process exists."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, ProcessLookupError):
+        return False
+
+
+def _holder_alive(claimed_by: Optional[str]) -> bool:
+    """Whether the process that claimed a job (``host:pid:worker``) is running on this host."""
+    host, _, rest = (claimed_by or '').rpartition(':')[0].rpartition(':')
+    return host == socket.gethostname() and rest.isdigit() and _pid_alive(int(rest))
+
+
+def _is_cli_process(pid: int, cli_name: str) -> bool:
+    """
+    Whether a pid is still a CLI run rather than an unrelated process that
+    reused the number: runs are started in their own session, so the CLI
+    leads its process group, and always in ``--print`` mode.
+    """
+    try:
+        out = subprocess.run(['ps', '-ww', '-o', 'pgid=', '-o', 'command=', '-p', str(pid)],
+                             capture_output=True, text=True, timeout=5).stdout.split(None, 1)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    if len(out) != 2 or not out[0].isdigit():
+        return False
+    pgid, command = int(out[0]), out[1]
+    return pgid == pid and cli_name in command and '--print' in command
+
+
+def _kill_orphan(pid: Optional[int], cli_name: str) -> bool:
+    """SIGKILL the process group of a CLI left behind by a dead worker. Returns True if killed."""
+    if not _pid_alive(pid) or not _is_cli_process(pid, cli_name):
+        return False
+    try:
+        os.killpg(pid, signal.SIGKILL)
+        return True
+    except (OSError, ProcessLookupError):
+        return False
+
+
+def _fail_execution(conn, execution_id: str, error: str):
+    """Mark an execution failed within an open connection."""
+    finish_execution(conn, execution_id, 'failed', error=error)
@@ -1,11 +1,20 @@
 """MCP Server model for managing MCP configurations."""
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, TypeVar
+import fcntl
 import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 # Path to orchestrator-managed MCP config
-MCP_CONFIG_PATH = Path(__file__).parent.parent.parent / 'mcp_servers.json'
+MCP_CONFIG_PATH = Path(os.environ.get(
+    'MCP_CONFIG_PATH', Path(__file__).parent.parent.parent / 'mcp_servers.json'
+))
+
+T = TypeVar('T')
 
 
 @dataclass
@@ -18,107 +27,90 @@ class MCPServer:
 
     @classmethod
     def load_all(cls) -> Dict[str, 'MCPServer']:
-        """Load all orchestrator-managed MCP servers from config file."""
-        if not MCP_CONFIG_PATH.exists():
-            return {}
-        try:
-            with open(MCP_CONFIG_PATH) as f:
-                data = json.load(f)
-            return {
-                name: cls(
-                    name=name,
-                    command=config.get('command', ''),
-                    args=config.get('args', []),
-                    env=config.get('env', {})
-                )
-                for name, config in data.get('mcpServers', {}).items()
-            }
-        except (json.JSONDecodeError, KeyError):
-            return {}
+        """Load all orchestrator-managed MCP servers (cached until the file changes)."""
+        return get_store().load()
 
     @classmethod
     def save_all(cls, servers: Dict[str, 'MCPServer']) -> None:
-        """Persist all servers to config file."""
-        data = {
-            'mcpServers': {
-                name: {
-                    'command': s.command,
-                    'args': s.args,
-                    'env': s.env
-                }
-                for name, s in servers.items()
-            }
-        }
-        with open(MCP_CONFIG_PATH, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Persist all servers to config file (atomically, under the file lock)."""
+        def apply(current: Dict[str, 'MCPServer']) -> None:
+            current.clear()
+            current.update(servers)
+
+        get_store().modify(apply)
 
     @classmethod
     def get(cls, name: str) -> Optional['MCPServer']:
         """Get a specific server by name."""
-        servers = cls.load_all()
-        return servers.get(name)
+        return get_store().get(name)
 
     @classmethod
     def create(cls, name: str, command: str, args: Optional[List[str]] = None,
                env: Optional[Dict[str, str]] = None) -> 'MCPServer':
         """Create a new MCP server configuration."""
-        servers = cls.load_all()
-        if name in servers:
-            raise ValueError(f"Server '{name}' already exists")
         server = cls(
             name=name,
             command=command,
             args=args if args is not None else [],
             env=env if env is not None else {}
         )
-        servers[name] = server
-        cls.save_all(servers)
-        return server
+
+        def apply(servers: Dict[str, 'MCPServer']) -> 'MCPServer':
+            if name in servers:
+                raise ValueError(f"Server '{name}' already exists")
+            servers[name] = server
+            return server
+
+        return get_store().modify(apply)
 
     @classmethod
     def update(cls, name: str, command: str, args: Optional[List[str]] = None,
                env: Optional[Dict[str, str]] = None) -> 'MCPServer':
         """Update an existing MCP server configuration."""
-        servers = cls.load_all()
-        if name not in servers:
-            raise ValueError(f"Server '{name}' not found")
         server = cls(
             name=name,
             command=command,
             args=args if args is not None else [],
             env=env if env is not None else {}
         )
-        servers[name] = server
-        cls.save_all(servers)
-        return server
+
+        def apply(servers: Dict[str, 'MCPServer']) -> 'MCPServer':
+            if name not in servers:
+                raise ValueError(f"Server '{name}' not found")
+            servers[name] = server
+            return server
+
+        return get_store().modify(apply)
 
     @classmethod
     def delete(cls, name: str) -> None:
         """Delete an MCP server configuration."""
-        servers = cls.load_all()
-        if name not in servers:
-            raise ValueError(f"Server '{name}' not found")
-        del servers[name]
-        cls.save_all(servers)
+        def apply(servers: Dict[str, 'MCPServer']) -> None:
+            if name not in servers:
+                raise ValueError(f"Server '{name}' not found")
+            del servers[name]
+
+        get_store().modify(apply)
 
     @classmethod
     def copy(cls, source_name: str, new_name: str) -> 'MCPServer':
         """Copy an existing server to a new name."""
-        servers = cls.load_all()
-        if source_name not in servers:
-            raise ValueError(f"Server '{source_name}' not found")
-        if new_name in servers:
-            raise ValueError(f"Server '{new_name}' already exists")
-        source = servers[source_name]
-        new_server = cls(
-            name=new_name,
-            command=source.command,
-            args=source.args.copy(),
-            env=source.env.copy()
-        )
-        servers[new_name] = new_server
-        cls.save_all(servers)
-        return new_server
+        def apply(servers: Dict[str, 'MCPServer']) -> 'MCPServer':
+            if source_name not in servers:
+                raise ValueError(f"Server '{source_name}' not found")
+            if new_name in servers:
+                raise ValueError(f"Server '{new_name}' already exists")
+            source = servers[source_name]
+            new_server = cls(
+                name=new_name,
+                command=source.command,
+                args=source.args.copy(),
+                env=source.env.copy()
+            )
+            servers[new_name] = new_server
+            return new_server
+
+        return get_store().modify(apply)
 
     def to_dict(self) -> dict:
         """Convert server to dictionary."""
@@ -128,3 +120,140 @@ class MCPServer:
             'args': self.args,
             'env': self.env
         }
+
+
+class MCPServerStore:
+    """
+    In-memory copy of an MCP config file, safe across threads and processes.
+
+    Reads are served from memory and re-parse the file only when its
+    inode, size or mtime changed (e.g. another gunicorn worker saved it).
+    Changes take an exclusive ``fcntl`` lock on a sidecar ``.lock`` file,
+    re-read the latest contents, apply the change, and replace the file
+    atomically (write to a temp file, fsync, rename), so concurrent writers
+    never lose each other's updates and readers never see a partial file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.RLock()
+        self._signature: Optional[tuple] = None
+        self._servers: Dict[str, MCPServer] = {}
+        self.loads = 0
+
+    def load(self) -> Dict[str, MCPServer]:
+        """All servers, re-read only if the file changed. Returns a new dict."""
+        with self._lock:
+            self._revalidate()
+            return dict(self._servers)
+
+    def get(self, name: str) -> Optional[MCPServer]:
+        """One server by name, re-reading the file only if it changed."""
+        with self._lock:
+            self._revalidate()
+            return self._servers.get(name)
+
+    def modify(self, fn: Callable[[Dict[str, MCPServer]], T]) -> T:
+        """
+        Apply ``fn`` to the latest servers and persist the result.
+
+        ``fn`` mutates the dict it is given; if it raises, nothing is written.
+
+        Returns:
+            Whatever ``fn`` returns
+        """
+        with self._lock, self._file_lock():
+            self._revalidate()
+            servers = dict(self._servers)
+            result = fn(servers)
+            self._write(servers)
+            self._servers = servers
+            return result
+
+    def _revalidate(self):
+        """Re-parse the file if its signature changed. Caller holds the lock."""
+        signature = _file_signature(self.path)
+        if signature == self._signature:
+            return
+        self._servers = self._read() if signature else {}
+        self._signature = signature
+
+    def _read(self) -> Dict[str, MCPServer]:
+        self.loads += 1
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return {
+                name: MCPServer(
+                    name=name,
+                    command=config.get('command', ''),
+                    args=config.get('args', []),
+                    env=config.get('env', {})
+                )
+                for name, config in data.get('mcpServers', {}).items()
+            }
+        except (json.JSONDecodeError, KeyError, FileNotFoundError):
+            return {}
+
+    def _write(self, servers: Dict[str, MCPServer]):
+        """Atomically replace the file. Caller holds both locks."""
+        data = {
+            'mcpServers': {
+                name: {
+                    'command': s.command,
+                    'args': s.args,
+                    'env': s.env
+                }
+                for name, s in servers.items()
+            }
+        }
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{self.path.name}.', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.path.exists():
+                os.chmod(temp_path, self.path.stat().st_mode & 0o777)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._signature = _file_signature(self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using the same file."""
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    """(inode, size, mtime) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+_stores: Dict[Path, MCPServerStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: Optional[Path] = None) -> MCPServerStore:
+    """The process-wide store for a config file (default MCP_CONFIG_PATH)."""
+    path = Path(path or MCP_CONFIG_PATH)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, MCPServerStore(path))
+    return store
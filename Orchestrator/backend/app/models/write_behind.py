@@ -0,0 +1,258 @@
+"""
+Write-behind batching of execution state transitions.
+
+Instead of every state change (create, enqueue, running, PID, finish) being
+its own committed transaction - and its own fsync - callers hand writes to a
+single writer thread per database. The writer takes everything that arrived
+while it was committing the previous batch (group commit) - optionally
+lingering up to ``max_delay`` seconds for more, at most ``max_batch`` writes -
+and applies the lot in one transaction. A write therefore waits at most for
+the batch in flight plus its own, however busy the database is. Each write runs
+under its own savepoint, so a failing write is rolled back and reported to its
+caller without affecting the rest of the batch.
+
+Callers that need the outcome (or read-your-writes) wait on the returned
+Future; fire-and-forget field updates for the same execution are coalesced
+into a single UPDATE.
+
+With ``background=False`` each write is instead committed immediately in the
+calling thread - the same API, no batching - which is cheaper where fsync is
+fast and many CPU-bound threads compete for the GIL.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from app.models.database import get_pool
+
+# Columns that may be set through WriteBehind.set_fields
+UPDATABLE_FIELDS = ('status', 'pid', 'started_at')
+
+
+class _PendingWrite:
+    """One queued write: a function of the connection, or coalesced field updates."""
+    __slots__ = ('fn', 'fields', 'key', 'future')
+
+    def __init__(self, fn: Optional[Callable[[sqlite3.Connection], Any]] = None,
+                 fields: Optional[dict] = None, key: Optional[str] = None):
+        self.fn = fn
+        self.fields = fields
+        self.key = key
+        self.future: Future = Future()
+
+
+class WriteBehind:
+    """
+    Single writer thread that commits queued writes in batches.
+
+    Args:
+        db_path: Database to write to (connections come from its pool)
+        max_batch: Most writes applied in one transaction
+        max_delay: Extra time a batch waits for more writes to join (seconds);
+            worth raising only where fsync is slow
+        background: Batch on a writer thread (False: commit each write inline)
+    """
+
+    def __init__(self, db_path: str, max_batch: int = 256, max_delay: float = 0.0,
+                 background: bool = True):
+        self.db_path = db_path
+        self.background = background
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay)
+        self._cond = threading.Condition()
+        self._pending: list[_PendingWrite] = []
+        self._coalesce: dict[str, _PendingWrite] = {}  # execution_id -> pending set_fields
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stopped = False
+        self.batches = 0
+        self.writes = 0
+        self.coalesced = 0
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        Queue ``fn(conn)`` to run inside the next batch transaction.
+
+        ``fn`` must not commit or roll back. Its return value (or exception)
+        is delivered through the Future once the batch has committed.
+        """
+        return self._enqueue(_PendingWrite(fn=fn))
+
+    def set_fields(self, execution_id: str, **fields) -> Future:
+        """
+        Queue an update of columns on an execution row.
+
+        Updates for the same execution that are still waiting are merged,
+        later values winning, so a burst of changes costs one UPDATE.
+        """
+        unknown = set(fields) - set(UPDATABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot set execution fields: {', '.join(sorted(unknown))}")
+        with self._cond:
+            pending = self._coalesce.get(execution_id)
+            if pending is not None:
+                pending.fields.update(fields)
+                self.coalesced += 1
+                return pending.future
+        return self._enqueue(_PendingWrite(fields=dict(fields), key=execution_id))
+
+    def run(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = 30) -> Any:
+        """Submit ``fn`` and wait for its batch to commit. Returns its result."""
+        return self.submit(fn).result(timeout)
+
+    def flush(self, timeout: Optional[float] = 30):
+        """Wait until everything queued so far has been committed."""
+        self.submit(lambda conn: None).result(timeout)
+
+    def stop(self, timeout: float = 5):
+        """Commit outstanding writes and stop the writer thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Batching counters for health reporting."""
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'batches': self.batches,
+                'writes': self.writes,
+                'coalesced': self.coalesced,
+                'avg_batch_size': round(self.writes / self.batches, 2) if self.batches else 0.0,
+            }
+
+    def _enqueue(self, write: _PendingWrite) -> Future:
+        if not self.background:
+            self._commit([write])
+            return write.future
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError('Write-behind writer is stopped')
+            self._ensure_thread()
+            self._pending.append(write)
+            if write.key is not None:
+                self._coalesce[write.key] = write
+            self._cond.notify()
+        return write.future
+
+    def _ensure_thread(self):
+        """Start the writer thread (again, after a fork). Caller holds the lock."""
+        if self._pid != os.getpid():
+            # Forked: the parent's thread and queue do not exist in this process
+            self._pid, self._thread = os.getpid(), None
+            self._pending, self._coalesce = [], {}
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self) -> list[_PendingWrite]:
+        """Wait for work, linger up to max_delay for more, and take a batch."""
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_delay
+            while len(self._pending) < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            for write in batch:
+                if write.key is not None and self._coalesce.get(write.key) is write:
+                    del self._coalesce[write.key]
+            return batch
+
+    def _writer_loop(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return  # Stopped and drained
+            self._commit(batch)
+
+    def _commit(self, batch: list[_PendingWrite]):
+        """Apply a batch and resolve its futures."""
+        try:
+            results = self._apply(batch)
+        except Exception as e:
+            for write in batch:
+                write.future.set_exception(e)
+            return
+        with self._cond:
+            self.batches += 1
+            self.writes += len(batch)
+        for write, (ok, value) in zip(batch, results):
+            if ok:
+                write.future.set_result(value)
+            else:
+                write.future.set_exception(value)
+
+    def _apply(self, batch: list[_PendingWrite]) -> list[tuple[bool, Any]]:
+        """Run a batch in one transaction, isolating each write in a savepoint."""
+        results = []
+        with get_pool(self.db_path).connection() as conn:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for write in batch:
+                    conn.execute('SAVEPOINT write')
+                    try:
+                        value = write.fn(conn) if write.fn else _update_fields(conn, write.key, write.fields)
+                        conn.execute('RELEASE write')
+                        results.append((True, value))
+                    except Exception as e:
+                        conn.execute('ROLLBACK TO write')
+                        conn.execute('RELEASE write')
+                        results.append((False, e))
+                conn.execute('COMMIT')
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+        return results
+
+
+def _update_fields(conn: sqlite3.Connection, execution_id: str, fields: dict) -> bool:
+    """Apply coalesced column updates. Returns True if the row exists."""
+    assignments = ', '.join(f'{name} = ?' for name in fields)
+    cursor = conn.execute(
+        f'UPDATE executions SET {assignments} WHERE id = ?',
+        (*fields.values(), execution_id)
+    )
+    return cursor.rowcount == 1
+
+
+_writers: dict[str, WriteBehind] = {}
+_writers_lock = threading.Lock()
+
+
+def configure_writer(db_path: str, **options) -> WriteBehind:
+    """(Re)create the writer for a database with the given WriteBehind options."""
+    with _writers_lock:
+        old = _writers.get(db_path)
+        writer = _writers[db_path] = WriteBehind(db_path, **options)
+    if old:
+        old.stop()
+    return writer
+
+
+def get_writer(db_path: str) -> WriteBehind:
+    """Get the writer for a database, creating one with defaults if needed."""
+    writer = _writers.get(db_path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.setdefault(db_path, WriteBehind(db_path))
+    return writer
+
+
+@atexit.register
+def _flush_writers():
+    """Commit queued writes before the interpreter exits."""
+    for writer in list(_writers.values()):
+        writer.stop()
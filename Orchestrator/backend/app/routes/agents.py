@@ -5,19 +5,24 @@ import subprocess
 import json
 import os
 import tempfile
+import time
+from typing import Optional
 from flask import Blueprint, jsonify, request, current_app
 from werkzeug.utils import secure_filename
 from app.services.agent_registry import AgentRegistry
+from app.services.agent_search import SearchUnavailableError
 from app.services.claude_executor import ClaudeExecutor
+from app.services.execution_pool import ExecutionPool
 from app.services.git_service import GitService
 from app.models.execution import Execution
+from app.models.job_queue import QueueFullError
 
 agents_bp = Blueprint('agents', __name__)
 
 
 def get_registry() -> AgentRegistry:
-    """Get agent registry instance."""
-    return AgentRegistry(current_app.config['AGENTS_ROOT'])
+    """Get the process-wide (cached) agent registry."""
+    return current_app.extensions['agent_registry']
 
 
 def get_executor() -> ClaudeExecutor:
@@ -25,13 +30,24 @@ def get_executor() -> ClaudeExecutor:
     return ClaudeExecutor(
         agents_root=current_app.config['AGENTS_ROOT'],
         claude_cli_path=current_app.config['CLAUDE_CLI_PATH'],
-        timeout=current_app.config['CLAUDE_TIMEOUT']
+        timeout=current_app.config['CLAUDE_TIMEOUT'],
+        agent_resolver=get_registry().agent_path,
+        mcp_pool=current_app.extensions.get('mcp_pool'),
+        cli_pool=current_app.extensions.get('cli_pool'),
+        url_fetcher=current_app.extensions.get('url_fetcher'),
+        context_budget=current_app.extensions.get('context_budget')
     )
 
 
-def get_git_service() -> GitService:
-    """Get git service instance."""
-    return GitService(current_app.config['AGENTS_ROOT'])
+def get_pool() -> ExecutionPool:
+    """Get the process-wide execution pool."""
+    return current_app.extensions['execution_pool']
+
+
+def get_git_service(folder: Optional[str] = None) -> GitService:
+    """Get git service for the agent root holding ``folder`` (default: the first root)."""
+    root = get_registry().agent_root(folder) if folder else None
+    return GitService(str(root or current_app.config['AGENTS_ROOT']))
 
 
 # ============================================================================
@@ -51,7 +67,46 @@ def list_agents():
     return jsonify([agent.to_dict() for agent in agents])
 
 
-@agents_bp.route('/agents/<folder>', methods=['GET'])
+@agents_bp.route('/agents/search', methods=['GET'])
+def search_agents():
+    """
+    Full-text search over agents.
+
+    Query params:
+        - q: Search query (required); the last word also matches as a prefix
+        - limit: Maximum results (default 20, max 100)
+
+    Returns:
+        JSON object with ranked results (agent objects plus a relevance score)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'error': 'Query parameter q is required',
+            'code': 'MISSING_QUERY'
+        }), 400
+
+    limit = min(max(request.args.get('limit', 20, type=int) or 20, 1), 100)
+
+    registry = get_registry()
+    started = time.perf_counter()
+    try:
+        results = registry.search(query, limit=limit)
+    except SearchUnavailableError as e:
+        return jsonify({
+            'error': str(e),
+            'code': 'SEARCH_UNAVAILABLE'
+        }), 503
+    took_ms = (time.perf_counter() - started) * 1000
+
+    return jsonify({
+        'query': query,
+        'results': [{**agent.to_dict(), 'score': score} for agent, score in results],
+        'took_ms': round(took_ms, 2),
+    })
+
+
+@agents_bp.route('/agents/<path:folder>', methods=['GET'])
 def get_agent(folder: str):
     """
     Get a specific agent by folder name.
@@ -140,7 +195,7 @@ def create_agent():
         }), 400
 
 
-@agents_bp.route('/agents/<folder>', methods=['PUT'])
+@agents_bp.route('/agents/<path:folder>', methods=['PUT'])
 def update_agent(folder: str):
     """
     Update an agent's files.
@@ -166,7 +221,7 @@ def update_agent(folder: str):
     registry = get_registry()
 
     # Check agent exists
-    existing = registry.get_agent(folder)
+    existing = registry.get_agent(folder, include_content=False)
     if not existing:
         return jsonify({
             'error': 'Agent not found',
@@ -181,7 +236,7 @@ def update_agent(folder: str):
         )
 
         # Auto-commit changes
-        git_service = get_git_service()
+        git_service = get_git_service(folder)
         git_service.auto_commit(folder, f"Update agent: {agent.name}")
 
         return jsonify(agent.to_dict(include_content=True))
@@ -193,7 +248,7 @@ def update_agent(folder: str):
         }), 400
 
 
-@agents_bp.route('/admin/agents/<folder>', methods=['DELETE'])
+@agents_bp.route('/admin/agents/<path:folder>', methods=['DELETE'])
 def delete_agent(folder: str):
     """
     Delete an agent (requires confirmation).
@@ -221,7 +276,7 @@ def delete_agent(folder: str):
     registry = get_registry()
 
     # Check agent exists
-    existing = registry.get_agent(folder)
+    existing = registry.get_agent(folder, include_content=False)
     if not existing:
         return jsonify({
             'error': 'Agent not found',
@@ -262,24 +317,13 @@ def save_temp_image(file) -> str:
     return filepath
 
 
-@agents_bp.route('/agents/<folder>/execute', methods=['POST'])
-def execute_agent(folder: str):
+def parse_execute_request():
     """
-    Execute an agent with a task (async - returns immediately).
-
-    Args:
-        folder: Agent folder name
-
-    Request body (JSON or FormData):
-        - task: Task description (required)
-        - urls: List of URLs to fetch content from (optional)
-        - file_paths: List of local file paths to include (optional)
-        - image_N: Uploaded images (FormData only, optional)
+    Read the task and context of an execute request (JSON or FormData).
 
     Returns:
-        Execution record with status 'running'
+        (task, urls, file_paths, images, error response or None)
     """
-    # Parse request - handle both JSON and FormData
     content_type = request.content_type or ''
 
     if content_type.startswith('multipart/form-data'):
@@ -300,10 +344,10 @@ def execute_agent(folder: str):
         # JSON request
         data = request.get_json()
         if not data:
-            return jsonify({
+            return None, None, None, None, (jsonify({
                 'error': 'Request body required',
                 'code': 'MISSING_BODY'
-            }), 400
+            }), 400)
 
         task = data.get('task', '').strip()
         urls = data.get('urls', []) or []
@@ -311,21 +355,22 @@ def execute_agent(folder: str):
         images = []
 
     if not task:
-        return jsonify({
+        return None, None, None, None, (jsonify({
             'error': 'Task is required',
             'code': 'MISSING_TASK'
-        }), 400
+        }), 400)
 
-    registry = get_registry()
+    return task, urls, file_paths, images, None
 
-    # Check agent exists
-    agent = registry.get_agent(folder)
-    if not agent:
-        return jsonify({
-            'error': 'Agent not found',
-            'code': 'AGENT_NOT_FOUND'
-        }), 404
 
+def queue_execution(folder: str, task: str, urls: list, file_paths: list, images: list,
+                    triggered_by: str = 'manual'):
+    """
+    Create an execution record and queue it.
+
+    Returns:
+        (execution, queue position, error response or None)
+    """
     # Build context dict
     context = {
         'urls': urls if urls else None,
@@ -340,56 +385,195 @@ def execute_agent(folder: str):
     execution = Execution.create(
         agent_folder=folder,
         task=task,
-        triggered_by='manual',
-        context=context_json
+        triggered_by=triggered_by,
+        context=context_json,
+        status='queued'
     )
 
-    # Capture values needed for background thread
-    execution_id = execution.id
-    db_path = current_app.config['DATABASE_PATH']
-
-    def on_pid(pid: int):
-        """Callback when process starts - saves PID for status checking."""
-        from app.models.database import get_db_connection
-        # Use context manager for thread-safe DB access
-        with get_db_connection(db_path) as conn:
-            conn.execute('UPDATE executions SET pid = ? WHERE id = ?', (pid, execution_id))
-            conn.commit()
-
-    def on_complete(result):
-        """Callback when execution finishes - runs in background thread."""
-        from app.models.database import get_db_connection
-        # Use context manager for thread-safe DB access
-        with get_db_connection(db_path) as conn:
-            if result.success:
-                conn.execute('''
-                    UPDATE executions
-                    SET status = 'success', output = ?, completed_at = datetime('now'),
-                        duration_seconds = (julianday(datetime('now')) - julianday(started_at)) * 86400
-                    WHERE id = ?
-                ''', (result.output, execution_id))
-            else:
-                conn.execute('''
-                    UPDATE executions
-                    SET status = 'failed', error = ?, completed_at = datetime('now'),
-                        duration_seconds = (julianday(datetime('now')) - julianday(started_at)) * 86400
-                    WHERE id = ?
-                ''', (result.error or 'Unknown error', execution_id))
-            conn.commit()
+    # Queue on the durable execution queue
+    try:
+        position = get_pool().submit(execution.id, folder, task, context_json)
+    except QueueFullError as e:
+        execution.delete()
+        return None, None, (jsonify({
+            'error': str(e),
+            'code': 'QUEUE_FULL'
+        }), 429, {'Retry-After': '30'})
+
+    return execution, position, None
+
+
+def unavailable_mcp_servers(agent) -> list[str]:
+    """MCP servers the agent needs that the health monitor reports as unhealthy."""
+    monitor = current_app.extensions.get('mcp_monitor')
+    if not monitor or not current_app.config['MCP_REJECT_UNHEALTHY'] or not agent.mcp_servers:
+        return []
+    if not monitor.running:
+        return []  # No current probes in this process - never reject on stale results
+    return monitor.unavailable(agent.mcp_servers)
 
-    # Execute asynchronously in background thread
-    executor = get_executor()
-    executor.execute_async(folder, task, on_complete, on_pid, context=context if context else None)
 
-    # Return immediately with 'running' status
-    return jsonify(execution.to_dict()), 202
+def mcp_unavailable_response(agent, servers: list[str]):
+    """503 for an agent whose MCP servers are down."""
+    return jsonify({
+        'error': f"MCP server unavailable for {agent.folder}: {', '.join(servers)}",
+        'code': 'MCP_SERVER_UNAVAILABLE',
+        'servers': servers,
+    }), 503, {'Retry-After': '60'}
+
+
+@agents_bp.route('/agents/<path:folder>/execute', methods=['POST'])
+def execute_agent(folder: str):
+    """
+    Execute an agent with a task (async - returns immediately).
+
+    Args:
+        folder: Agent folder name
+
+    Request body (JSON or FormData):
+        - task: Task description (required)
+        - urls: List of URLs to fetch content from (optional)
+        - file_paths: List of local file paths to include (optional)
+        - image_N: Uploaded images (FormData only, optional)
+
+    Returns:
+        Execution record with status 'queued' and its queue position; 503
+        if the health monitor reports one of the agent's MCP servers down
+    """
+    task, urls, file_paths, images, error = parse_execute_request()
+    if error:
+        return error
+
+    registry = get_registry()
+
+    # Check agent exists
+    agent = registry.get_agent(folder, include_content=False)
+    if not agent:
+        return jsonify({
+            'error': 'Agent not found',
+            'code': 'AGENT_NOT_FOUND'
+        }), 404
+
+    # Fail fast instead of spawning a CLI that can't reach its MCP servers
+    down = unavailable_mcp_servers(agent)
+    if down:
+        return mcp_unavailable_response(agent, down)
+
+    execution, position, error = queue_execution(folder, task, urls, file_paths, images)
+    if error:
+        return error
+
+    # Return immediately with 'queued' status
+    return jsonify({**execution.to_dict(), 'queue_position': position}), 202
+
+
+# ============================================================================
+# Task Routing Endpoints
+# ============================================================================
+
+@agents_bp.route('/agents/route', methods=['POST'])
+def route_task():
+    """
+    Rank agents for a free-text task, without running anything.
+
+    Agents are scored locally by BM25 relevance of their name, description,
+    MCP servers and SKILL.md to the task - no model call.
+
+    Request body:
+        - task: Task description (required)
+        - limit: Maximum agents returned (default 5, max 50)
+
+    Returns:
+        JSON object with ranked results (agent objects plus a relevance score)
+    """
+    data = request.get_json(silent=True) or {}
+    task = str(data.get('task') or '').strip()
+    if not task:
+        return jsonify({
+            'error': 'Task is required',
+            'code': 'MISSING_TASK'
+        }), 400
+
+    try:
+        limit = min(max(int(data.get('limit') or 5), 1), 50)
+    except (TypeError, ValueError):
+        return jsonify({
+            'error': 'limit must be an integer',
+            'code': 'INVALID_LIMIT'
+        }), 400
+
+    started = time.perf_counter()
+    results = get_registry().route(task, limit=limit)
+    took_ms = (time.perf_counter() - started) * 1000
+
+    return jsonify({
+        'task': task,
+        'results': [{**agent.to_dict(), 'score': score} for agent, score in results],
+        'took_ms': round(took_ms, 3),
+    })
+
+
+@agents_bp.route('/agents/route/execute', methods=['POST'])
+def route_and_execute():
+    """
+    Execute a task on the best matching agent (async - returns immediately).
+
+    Request body (JSON or FormData): as for /agents/<folder>/execute.
+
+    Returns:
+        Execution record with status 'queued', its queue position and the
+        routing decision (chosen agent, score and runners-up); 422 if no
+        agent scores above AGENT_ROUTE_MIN_SCORE, 503 if every matching
+        agent depends on an unhealthy MCP server
+    """
+    task, urls, file_paths, images, error = parse_execute_request()
+    if error:
+        return error
+
+    started = time.perf_counter()
+    results = get_registry().route(task, limit=3)
+    took_ms = (time.perf_counter() - started) * 1000
+
+    min_score = current_app.config['AGENT_ROUTE_MIN_SCORE']
+    if not results or results[0][1] < min_score:
+        return jsonify({
+            'error': 'No agent matches this task',
+            'code': 'NO_MATCHING_AGENT',
+            'candidates': [{'folder': agent.folder, 'score': score} for agent, score in results],
+        }), 422
+
+    # Best match whose MCP servers are up; runners-up must clear the threshold too
+    eligible = [(agent, score) for agent, score in results if score >= min_score]
+    for agent, score in eligible:
+        down = unavailable_mcp_servers(agent)
+        if not down:
+            break
+    else:
+        agent, _ = eligible[0]
+        return mcp_unavailable_response(agent, unavailable_mcp_servers(agent))
+
+    execution, position, error = queue_execution(agent.folder, task, urls, file_paths, images,
+                                                 triggered_by='auto-route')
+    if error:
+        return error
+
+    return jsonify({
+        **execution.to_dict(),
+        'queue_position': position,
+        'routing': {
+            'agent': agent.folder,
+            'score': score,
+            'candidates': [{'folder': a.folder, 'score': s} for a, s in results],
+            'took_ms': round(took_ms, 3),
+        },
+    }), 202
 
 
 # ============================================================================
 # Agent History Endpoint
 # ============================================================================
 
-@agents_bp.route('/agents/<folder>/history', methods=['GET'])
+@agents_bp.route('/agents/<path:folder>/history', methods=['GET'])
 def get_agent_history(folder: str):
     """
     Get git history for an agent.
@@ -406,7 +590,7 @@ def get_agent_history(folder: str):
     registry = get_registry()
 
     # Check agent exists
-    agent = registry.get_agent(folder)
+    agent = registry.get_agent(folder, include_content=False)
     if not agent:
         return jsonify({
             'error': 'Agent not found',
@@ -415,7 +599,7 @@ def get_agent_history(folder: str):
 
     limit = request.args.get('limit', 10, type=int)
 
-    git_service = get_git_service()
+    git_service = get_git_service(folder)
     history = git_service.get_file_history(f"{folder}/SKILL.md", limit=limit)
 
     return jsonify(history)
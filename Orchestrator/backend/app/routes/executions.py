@@ -1,11 +1,27 @@
 """
 Execution history API endpoints.
 """
-from flask import Blueprint, jsonify, request
-from app.models.execution import Execution
+import json
+import time
+from typing import Optional
+from flask import Blueprint, Response, jsonify, request, current_app
+from app.models.database import get_db_connection
+from app.models.execution import Execution, SUMMARY_FIELDS
+from app.models.execution_output import read_output
+from app.models.execution_payload import PAYLOAD_FIELDS
 
 executions_bp = Blueprint('executions', __name__)
 
+# Live output streaming (Server-Sent Events)
+STREAM_POLL_SECONDS = 0.25
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_BATCH_SIZE = 500
+
+# Page size caps: offset pages get slower with depth, cursor pages do not
+MAX_OFFSET_PAGE = 100
+MAX_CURSOR_PAGE = 1000
+MAX_STATS_HOURS = 24 * 365
+
 
 @executions_bp.route('/executions', methods=['GET'])
 def list_executions():
@@ -14,21 +30,46 @@ def list_executions():
 
     Query params:
         - agent: Filter by agent folder name
-        - status: Filter by status (running, success, failed, timeout)
-        - limit: Maximum results (default 50)
+        - status: Filter by status (queued, running, success, failed, timeout)
+        - limit: Maximum results (default 50; up to 100 for offset pages,
+          1000 for cursor pages)
         - offset: Pagination offset (default 0)
+        - after: Keyset cursor ``<created_at>,<id>`` - return rows created
+          before this one. Takes precedence over offset.
+        - fields: Comma-separated extra fields to include (output, error,
+          context); by default only the summary columns are returned
 
     Returns:
-        JSON array of execution records
+        JSON array of execution records. When the page is full, the
+        X-Next-Cursor header holds the cursor for the next page.
     """
     agent_folder = request.args.get('agent')
     status = request.args.get('status')
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
 
+    after = None
+    if request.args.get('after'):
+        try:
+            after = Execution.parse_cursor(request.args['after'])
+        except ValueError as e:
+            return jsonify({
+                'error': str(e),
+                'code': 'INVALID_CURSOR'
+            }), 400
+
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = set(fields) - set(SUMMARY_FIELDS) - set(PAYLOAD_FIELDS)
+    if unknown:
+        return jsonify({
+            'error': f"Unknown fields: {', '.join(sorted(unknown))}",
+            'code': 'INVALID_FIELDS'
+        }), 400
+
     # Validate limit
-    if limit > 100:
-        limit = 100
+    max_limit = MAX_CURSOR_PAGE if after else MAX_OFFSET_PAGE
+    if limit > max_limit:
+        limit = max_limit
     if limit < 1:
         limit = 1
 
@@ -36,10 +77,15 @@ def list_executions():
         agent_folder=agent_folder,
         status=status,
         limit=limit,
-        offset=offset
+        offset=offset,
+        fields=fields,
+        after=after
     )
 
-    return jsonify([e.to_dict() for e in executions])
+    response = jsonify([e.to_dict(fields=fields) for e in executions])
+    if len(executions) == limit:
+        response.headers['X-Next-Cursor'] = executions[-1].cursor
+    return response
 
 
 @executions_bp.route('/executions/<execution_id>', methods=['GET'])
@@ -83,21 +129,129 @@ def get_execution_status(execution_id: str):
             'code': 'EXECUTION_NOT_FOUND'
         }), 404
 
+    pool = current_app.extensions.get('execution_pool')
+
     return jsonify({
         'id': execution.id,
         'status': execution.status,
         'pid': execution.pid,
         'process_alive': execution.is_process_alive() if execution.status == 'running' else False,
+        'queue_position': pool.position(execution.id) if pool and execution.status == 'queued' else None,
+        'wait_seconds': execution.wait_seconds,
         'started_at': execution.started_at,
         'completed_at': execution.completed_at,
         'duration_seconds': execution.duration_seconds
     })
 
 
+@executions_bp.route('/executions/<execution_id>/stream', methods=['GET'])
+def stream_execution(execution_id: str):
+    """
+    Stream an execution's output as Server-Sent Events while it runs.
+
+    Each stored output segment is sent as an ``output`` event (stdout: one
+    stream-json event per data line) or a ``stderr`` event, with the segment's
+    sequence number as the event id so reconnecting clients resume via the
+    Last-Event-ID header. ``status`` events report queued/running
+    transitions, and a final ``end`` event carries the terminal status.
+
+    Args:
+        execution_id: Execution ID
+
+    Query params:
+        - last_event_id: Resume after this sequence number (alternative to
+          the Last-Event-ID header)
+
+    Returns:
+        text/event-stream response
+    """
+    execution = Execution.get_by_id(execution_id)
+
+    if not execution:
+        return jsonify({
+            'error': 'Execution not found',
+            'code': 'EXECUTION_NOT_FOUND'
+        }), 404
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        last_seq = max(0, int(last_event_id))
+    except ValueError:
+        last_seq = 0
+
+    db_path = current_app.config['DATABASE_PATH']
+
+    def generate():
+        seq = last_seq
+        last_status = None
+        last_sent = time.monotonic()
+        yield 'retry: 2000\n\n'
+
+        # A pooled connection is borrowed per poll, never across a yield or a
+        # sleep, so open streams don't tie up connections other requests need
+        while True:
+            rows, status = _poll_stream(db_path, execution_id, seq)
+            for row in rows:
+                seq = row['seq']
+                yield _sse_event(_stream_event(row['stream']), row['data'], event_id=seq)
+            if rows:
+                last_sent = time.monotonic()
+                continue
+
+            if status != last_status:
+                last_status = status
+                yield _sse_event('status', json.dumps({'status': status}))
+
+            if status not in ('queued', 'running'):
+                # Output is committed before the final status, so one more read drains it
+                with get_db_connection(db_path) as conn:
+                    rows = read_output(conn, execution_id, seq, STREAM_BATCH_SIZE)
+                for row in rows:
+                    seq = row['seq']
+                    yield _sse_event(_stream_event(row['stream']), row['data'], event_id=seq)
+                yield _sse_event('end', json.dumps({'status': status}))
+                return
+
+            if time.monotonic() - last_sent >= STREAM_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+            time.sleep(STREAM_POLL_SECONDS)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+def _poll_stream(db_path: str, execution_id: str, after_seq: int) -> tuple[list, Optional[str]]:
+    """New output segments after ``after_seq``, and (if none) the execution's status."""
+    with get_db_connection(db_path) as conn:
+        rows = read_output(conn, execution_id, after_seq, STREAM_BATCH_SIZE)
+        if rows:
+            return rows, None
+        row = conn.execute('SELECT status FROM executions WHERE id = ?', (execution_id,)).fetchone()
+    return rows, row['status'] if row else 'deleted'
+
+
+def _stream_event(stream: str) -> str:
+    """SSE event name for an output stream."""
+    return 'stderr' if stream == 'stderr' else 'output'
+
+
+def _sse_event(event: str, data: str, event_id: int = None) -> str:
+    """Format one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
 @executions_bp.route('/executions/<execution_id>/kill', methods=['POST'])
 def kill_execution(execution_id: str):
     """
-    Kill a running execution process.
+    Kill a running execution process, or cancel a queued one.
 
     Args:
         execution_id: Execution ID
@@ -113,6 +267,17 @@ def kill_execution(execution_id: str):
             'code': 'EXECUTION_NOT_FOUND'
         }), 404
 
+    if execution.status == 'queued':
+        pool = current_app.extensions.get('execution_pool')
+        if pool:
+            pool.cancel(execution.id)
+        execution.cancel()
+        return jsonify({
+            'success': True,
+            'message': 'Queued execution cancelled',
+            'execution': execution.to_dict()
+        })
+
     if execution.status != 'running':
         return jsonify({
             'error': 'Execution is not running',
@@ -159,8 +324,8 @@ def delete_execution(execution_id: str):
             'code': 'EXECUTION_NOT_FOUND'
         }), 404
 
-    # Don't allow deleting running executions
-    if execution.status == 'running':
+    # Don't allow deleting running or queued executions
+    if execution.status in ('running', 'queued'):
         return jsonify({
             'error': 'Cannot delete a running execution. Stop it first.',
             'code': 'CANNOT_DELETE_RUNNING'
@@ -174,17 +339,81 @@ def delete_execution(execution_id: str):
     })
 
 
+@executions_bp.route('/executions/queue', methods=['GET'])
+def get_execution_queue():
+    """
+    Get worker pool utilisation and queue depth.
+
+    Returns:
+        JSON object with running/queued counts, limits, and wait times
+    """
+    pool = current_app.extensions.get('execution_pool')
+    if not pool:
+        return jsonify({
+            'error': 'Execution pool not configured',
+            'code': 'POOL_NOT_CONFIGURED'
+        }), 503
+
+    return jsonify(pool.stats())
+
+
 @executions_bp.route('/executions/stats', methods=['GET'])
 def get_execution_stats():
     """
     Get execution statistics.
 
+    Served from hourly rollups, so the cost does not grow with history.
+
     Query params:
-        - hours: Time window in hours (default 24)
+        - hours: Time window in hours (default 24, max 8760)
+        - agent: Restrict to one agent folder
+        - by_agent: Include a per-agent breakdown of the window (true/false)
 
     Returns:
         JSON object with stats
     """
     hours = request.args.get('hours', 24, type=int)
-    stats = Execution.get_stats(hours=hours)
+    if hours is None or not 1 <= hours <= MAX_STATS_HOURS:
+        return jsonify({
+            'error': f'hours must be between 1 and {MAX_STATS_HOURS}',
+            'code': 'INVALID_HOURS'
+        }), 400
+    by_agent = request.args.get('by_agent', 'false').lower() in ('1', 'true', 'yes')
+    stats = Execution.get_stats(hours=hours, agent_folder=request.args.get('agent'), by_agent=by_agent)
     return jsonify(stats)
+
+
+@executions_bp.route('/executions/latency', methods=['GET'])
+def get_execution_latency():
+    """
+    Get duration percentiles (p50/p90/p95/p99) per agent and time bucket.
+
+    Merged from per-hour histogram sketches, so the cost depends on the
+    window and number of agents rather than the number of executions.
+
+    Query params:
+        - hours: Time window in hours (default 24, max 8760)
+        - agent: Restrict to one agent folder
+        - interval: Break the window down by 'hour' or 'day'
+        - histogram: Include histogram bins (true/false)
+
+    Returns:
+        JSON object with overall, per-agent and per-bucket distributions
+    """
+    hours = request.args.get('hours', 24, type=int)
+    if hours is None or not 1 <= hours <= MAX_STATS_HOURS:
+        return jsonify({
+            'error': f'hours must be between 1 and {MAX_STATS_HOURS}',
+            'code': 'INVALID_HOURS'
+        }), 400
+    interval = request.args.get('interval')
+    if interval not in (None, 'hour', 'day'):
+        return jsonify({
+            'error': "interval must be 'hour' or 'day'",
+            'code': 'INVALID_INTERVAL'
+        }), 400
+    include_histogram = request.args.get('histogram', 'false').lower() in ('1', 'true', 'yes')
+
+    latency = Execution.get_latency(hours=hours, agent_folder=request.args.get('agent'),
+                                    interval=interval, include_histogram=include_histogram)
+    return jsonify(latency)
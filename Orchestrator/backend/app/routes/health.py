@@ -5,6 +5,8 @@ from flask import Blueprint, jsonify, current_app
 from datetime import datetime
 import os
 
+from app.models.database import get_db_connection
+
 health_bp = Blueprint('health', __name__)
 
 
@@ -17,13 +19,36 @@ def health_check():
         'database': _check_database(),
     }
 
-    all_ok = all(v == 'ok' for v in checks.values())
+    core_ok = all(v == 'ok' for v in checks.values())
+
+    # MCP servers degrade the status but don't fail the check (503): agents
+    # not using a broken server still work
+    mcp = None
+    monitor = current_app.extensions.get('mcp_monitor')
+    if monitor:
+        statuses = monitor.statuses()
+        if monitor.running:
+            unhealthy = sorted(name for name, s in statuses.items() if s['status'] == 'unhealthy')
+            checks['mcp_servers'] = f"unhealthy: {', '.join(unhealthy)}" if unhealthy else 'ok'
+        mcp = {**monitor.stats(), 'servers_status': statuses}
 
-    return jsonify({
-        'status': 'healthy' if all_ok else 'degraded',
+    response = {
+        'status': 'healthy' if all(v == 'ok' for v in checks.values()) else 'degraded',
         'checks': checks,
         'timestamp': datetime.now().isoformat()
-    }), 200 if all_ok else 503
+    }
+    if mcp is not None:
+        response['mcp'] = mcp
+
+    cli_pool = current_app.extensions.get('cli_pool')
+    if cli_pool:
+        response['cli_pool'] = cli_pool.stats()
+
+    url_fetcher = current_app.extensions.get('url_fetcher')
+    if url_fetcher and url_fetcher.cache:
+        response['url_cache'] = url_fetcher.cache.stats()
+
+    return jsonify(response), 200 if core_ok else 503
 
 
 def _check_agents_dir() -> str:
@@ -50,10 +75,8 @@ def _check_database() -> str:
 
     # Try to connect
     try:
-        import sqlite3
-        conn = sqlite3.connect(db_path)
-        conn.execute('SELECT 1')
-        conn.close()
+        with get_db_connection(db_path) as conn:
+            conn.execute('SELECT 1')
         return 'ok'
     except Exception:
         return 'connection_failed'
@@ -2,14 +2,12 @@
 MCP Server management API endpoints.
 Supports CRUD operations for MCP server configurations.
 """
-from flask import Blueprint, jsonify, request
-import json
-import os
-import subprocess
+from flask import Blueprint, jsonify, request, current_app
 import time
-from pathlib import Path
 
 from ..models.mcp_server import MCPServer
+from ..services.claude_settings import get_claude_settings
+from ..services.mcp_probe import probe_mcp_server, probe_mcp_servers
 
 mcp_bp = Blueprint('mcp', __name__)
 
@@ -19,26 +17,13 @@ def get_user_mcp_servers() -> dict:
     Read MCP server configuration from user's Claude Code settings.
     These servers are read-only (not managed by orchestrator).
 
+    Served from the process-wide settings cache, which re-reads the
+    settings only when they change on disk.
+
     Returns:
         Dict of server name -> config
     """
-    settings_paths = [
-        Path.home() / '.claude.json',
-        Path.home() / '.claude' / 'settings.json',
-        Path.home() / '.config' / 'claude' / 'settings.json',
-    ]
-
-    for settings_path in settings_paths:
-        if not settings_path.exists():
-            continue
-        try:
-            with open(settings_path) as f:
-                settings = json.load(f)
-            return settings.get('mcpServers', {})
-        except (json.JSONDecodeError, IOError):
-            continue
-
-    return {}
+    return get_claude_settings().mcp_servers()
 
 
 # Common server descriptions
@@ -56,11 +41,15 @@ SERVER_DESCRIPTIONS = {
 }
 
 
-@mcp_bp.route('/mcp/servers', methods=['GET'])
-def list_mcp_servers():
+def get_all_mcp_servers() -> dict:
     """
-    List all MCP servers (merged from user config and orchestrator config).
-    User servers are marked as read-only.
+    All MCP servers, merged from user config and orchestrator config.
+
+    Orchestrator servers override user servers of the same name.
+
+    Returns:
+        Dict of server name -> server dict (name, command, args, env,
+        source, description)
     """
     # Get user's servers (read-only)
     user_servers = get_user_mcp_servers()
@@ -90,7 +79,26 @@ def list_mcp_servers():
             'description': SERVER_DESCRIPTIONS.get(name, ''),
         }
 
-    return jsonify({'servers': list(merged.values())})
+    return merged
+
+
+@mcp_bp.route('/mcp/servers', methods=['GET'])
+def list_mcp_servers():
+    """
+    List all MCP servers (merged from user config and orchestrator config).
+    User servers are marked as read-only. With the health monitor enabled,
+    each server carries its latest cached health.
+    """
+    servers = list(get_all_mcp_servers().values())
+
+    # Cached results of the background health monitor (None until first probed)
+    monitor = current_app.extensions.get('mcp_monitor')
+    if monitor:
+        statuses = monitor.statuses()
+        for server in servers:
+            server['health'] = statuses.get(server['name'])
+
+    return jsonify({'servers': servers})
 
 
 @mcp_bp.route('/mcp/servers/<name>', methods=['GET'])
@@ -258,75 +266,77 @@ def copy_mcp_server(name: str):
         return jsonify({'error': str(e)}), 409
 
 
-@mcp_bp.route('/mcp/servers/<name>/test', methods=['POST'])
-def test_mcp_server(name: str):
-    """Test if an MCP server can start successfully."""
-    # Get server config
-    server = MCPServer.get(name)
-    if not server:
-        # Try user config
-        user_servers = get_user_mcp_servers()
-        if name not in user_servers:
-            return jsonify({'success': False, 'message': 'Server not found'}), 404
-        config = user_servers[name]
-        command = config.get('command', '')
-        args = config.get('args', [])
-        env_vars = config.get('env', {})
-    else:
-        command = server.command
-        args = server.args
-        env_vars = server.env
+@mcp_bp.route('/mcp/servers/test', methods=['POST'])
+def test_all_mcp_servers():
+    """
+    Probe MCP servers concurrently with the MCP handshake.
 
-    if not command:
-        return jsonify({'success': False, 'message': 'No command configured'})
+    Request body (optional):
+        - names: Servers to test (default: all)
 
-    try:
-        # Set up environment
-        env = os.environ.copy()
-        env.update(env_vars)
-
-        # Start the process
-        proc = subprocess.Popen(
-            [command] + args,
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            stdin=subprocess.PIPE
-        )
+    Returns:
+        JSON object with a result per server and the total time taken,
+        which is about that of the slowest server
+    """
+    data = request.get_json(silent=True) or {}
+    servers = get_all_mcp_servers()
+
+    names = data.get('names')
+    if names is not None:
+        if not isinstance(names, list):
+            return jsonify({'error': 'names must be a list', 'code': 'INVALID_NAMES'}), 400
+        unknown = [name for name in names if name not in servers]
+        if unknown:
+            return jsonify({
+                'error': f"Unknown servers: {', '.join(map(str, unknown))}",
+                'code': 'SERVER_NOT_FOUND'
+            }), 404
+        servers = {name: servers[name] for name in names}
+
+    started = time.perf_counter()
+    results = probe_mcp_servers(
+        servers,
+        timeout=current_app.config['MCP_PROBE_TIMEOUT'],
+        max_workers=current_app.config['MCP_PROBE_WORKERS'],
+    )
+    took_ms = (time.perf_counter() - started) * 1000
+
+    return jsonify({
+        'results': [{'name': name, **result.to_dict()} for name, result in results.items()],
+        'healthy': sum(1 for result in results.values() if result.success),
+        'total': len(results),
+        'took_ms': round(took_ms, 1),
+    })
 
-        # Wait briefly to see if it starts
-        time.sleep(2)
 
-        if proc.poll() is None:
-            # Process is still running - success
-            proc.terminate()
-            try:
-                proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-            return jsonify({
-                'success': True,
-                'message': 'Server started successfully'
-            })
-        else:
-            # Process exited - check error
-            _, stderr = proc.communicate()
-            error_msg = stderr.decode('utf-8', errors='replace')[:500]
-            return jsonify({
-                'success': False,
-                'message': f'Server exited immediately: {error_msg}'
-            })
+@mcp_bp.route('/mcp/servers/<name>/test', methods=['POST'])
+def test_mcp_server(name: str):
+    """
+    Test that an MCP server starts and completes the MCP handshake.
 
-    except FileNotFoundError:
-        return jsonify({
-            'success': False,
-            'message': f"Command not found: {command}"
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'message': str(e)
-        })
+    Runs initialize and tools/list over stdio with a timeout.
+
+    Returns:
+        Probe result: success, message, handshake latency and tool count
+    """
+    server = get_all_mcp_servers().get(name)
+    if not server:
+        return jsonify({'success': False, 'message': 'Server not found'}), 404
+
+    result = probe_mcp_server(
+        server['command'], server['args'], server['env'],
+        timeout=current_app.config['MCP_PROBE_TIMEOUT'],
+    )
+    return jsonify(result.to_dict())
+
+
+@mcp_bp.route('/mcp/pool', methods=['GET'])
+def get_mcp_pool_stats():
+    """Warm MCP server pool status (MCP_POOL_ENABLED)."""
+    pool = current_app.extensions.get('mcp_pool')
+    if not pool:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **pool.stats()})
 
 
 # Legacy endpoint for backwards compatibility
@@ -1,6 +1,7 @@
 """Services package."""
 from app.services.agent_registry import AgentRegistry
 from app.services.claude_executor import ClaudeExecutor
+from app.services.execution_pool import ExecutionPool
 from app.services.git_service import GitService
 
-__all__ = ['AgentRegistry', 'ClaudeExecutor', 'GitService']
+__all__ = ['AgentRegistry', 'ClaudeExecutor', 'ExecutionPool', 'GitService']
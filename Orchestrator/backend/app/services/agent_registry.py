@@ -2,10 +2,19 @@
 Agent Registry - Discovers and manages agents from the filesystem.
 """
 import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import translate
 from pathlib import Path
-from typing import Optional
-from dataclasses import dataclass, asdict, field
+from typing import Iterable, Optional
+from dataclasses import dataclass, asdict, field, replace
+
+from app.services.agent_router import AgentRouter
+from app.services.agent_search import AgentSearchIndex
+from app.services.skill_metadata import extract_skill_metadata, read_skill_metadata
 
 
 @dataclass
@@ -36,70 +45,179 @@ class Agent:
         return data
 
 
-class AgentRegistry:
-    """Discovers and manages agents from the filesystem."""
+@dataclass
+class _CachedAgent:
+    """A parsed agent, where it lives, and the file signatures it was parsed from."""
+    agent: Agent
+    path: Path
+    root: Path  # The agent root ``path`` was found under
+    signature: tuple
 
-    # Folders to exclude from agent discovery
+
+class AgentRegistry:
+    """
+    Discovers and manages agents from the filesystem.
+
+    Any folder with a SKILL.md under one of the agent roots - up to
+    ``max_depth`` levels down, skipping hidden folders and ``exclude`` globs -
+    is an agent, identified by its path relative to the root (e.g.
+    ``Orchestrator/Dev Team/QA Engineer``). Agents don't nest: folders inside
+    an agent's folder belong to that agent. If several roots contain the same
+    relative path, the first root wins. New agents are created under the
+    first root.
+
+    Parsed agents are cached in memory. At most once every
+    ``revalidate_seconds`` the roots are re-walked with ``os.scandir`` and an
+    agent is re-parsed (on a thread pool) only if the size or mtime of its
+    SKILL.md or config.json changed, so listings and lookups are memory reads
+    between checks. Changes made through the registry itself are applied to
+    the cache immediately.
+
+    A full-text index and a task router over the agents are kept alongside
+    the cache. Agents changed through the registry are re-indexed at once;
+    agents changed on disk are re-indexed (reading their full SKILL.md) on
+    the next search or route.
+    """
+
+    # Folder name globs that are never descended into (hidden folders are skipped too)
     EXCLUDED_FOLDERS = {
-        '.git', '__pycache__', 'node_modules', 'venv', '.venv',
-        'Orchestrator', 'examples', 'templates', 'assets'
+        '__pycache__', 'node_modules', 'venv', 'examples', 'templates', 'assets'
     }
 
-    def __init__(self, agents_root: str):
+    # Top-level names taken by fixed API paths (GET /agents/search, POST
+    # /agents/route/execute), which an agent of that name could never be reached behind
+    RESERVED_FOLDERS = frozenset({'search', 'route'})
+
+    def __init__(self, agents_root: str, revalidate_seconds: float = 2.0,
+                 extra_roots: Iterable[str] = (), max_depth: int = 3,
+                 exclude: Iterable[str] = (), parse_workers: int = 8):
         self.agents_root = Path(agents_root)
+        self.roots = [self.agents_root, *(Path(root) for root in extra_roots)]
+        self.revalidate_seconds = revalidate_seconds
+        self.max_depth = max(1, max_depth)
+        self.exclude = (*sorted(self.EXCLUDED_FOLDERS), *exclude)
+        # Hidden folders plus every glob, as one compiled pattern
+        self._exclude_re = re.compile('|'.join([r'(?:.*/)?\..*', *map(translate, self.exclude)]))
+        self.parse_workers = max(1, parse_workers)
+        self._lock = threading.RLock()
+        self._cache: dict[str, _CachedAgent] = {}
+        self._checked_at: Optional[float] = None
+        self._sorted: Optional[list[Agent]] = None
+        self._search_index = AgentSearchIndex()
+        self._router = AgentRouter()
+        self._indexed: dict[str, tuple] = {}  # folder -> signature it was indexed at
 
     def discover_agents(self) -> list[Agent]:
-        """Discover all agents in the repository."""
-        agents = []
-
-        if not self.agents_root.exists():
-            return agents
-
-        for folder in self.agents_root.iterdir():
-            if not folder.is_dir():
-                continue
-            if folder.name in self.EXCLUDED_FOLDERS:
-                continue
-            if folder.name.startswith('.'):
-                continue
-
-            # Check for SKILL.md
-            skill_path = folder / 'SKILL.md'
-            if not skill_path.exists():
-                continue
-
-            agent = self._load_agent(folder)
-            if agent:
-                agents.append(agent)
-
-        # Sort by name
-        agents.sort(key=lambda a: a.name.lower())
-        return agents
-
-    def get_agent(self, folder_name: str) -> Optional[Agent]:
-        """Get a specific agent by folder name."""
+        """Discover all agents in the agent roots (sorted by name)."""
+        with self._lock:
+            self._revalidate()
+            if self._sorted is None:
+                self._sorted = sorted((c.agent for c in self._cache.values()),
+                                      key=lambda a: a.name.lower())
+            return list(self._sorted)
+
+    def get_agent(self, folder_name: str, include_content: bool = True) -> Optional[Agent]:
+        """
+        Get a specific agent by folder (path relative to its root).
+
+        Args:
+            folder_name: Agent folder, e.g. ``Manager`` or ``Orchestrator/Dev Team/QA Engineer``
+            include_content: Read SKILL.md and config.json content from disk;
+                without it the lookup is served from the cache
+        """
         if not self._is_valid_folder_name(folder_name):
             return None
 
-        agent_path = self.agents_root / folder_name
-        if not agent_path.exists() or not agent_path.is_dir():
+        with self._lock:
+            self._revalidate()
+            cached = self._cache.get(folder_name)
+            if cached is None or include_content:
+                # Cache miss (possibly created since the last check) or content wanted
+                return self._reload(folder_name, include_content=include_content)
+            return cached.agent
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[Agent, float]]:
+        """
+        Full-text search over agent name, description, MCP servers and SKILL.md.
+
+        Returns:
+            (agent, score) pairs, best match first
+
+        Raises:
+            SearchUnavailableError: If SQLite was built without FTS5
+        """
+        with self._lock:
+            self._revalidate()
+            self._sync_index()
+            return [
+                (self._cache[folder_name].agent, score)
+                for folder_name, score in self._search_index.search(query, limit)
+                if folder_name in self._cache
+            ]
+
+    def route(self, task: str, limit: int = 5) -> list[tuple[Agent, float]]:
+        """
+        Rank agents for a free-text task by BM25 relevance of their SKILL.md.
+
+        Returns:
+            (agent, score) pairs, best first; empty if no agent shares a term
+            with the task
+        """
+        with self._lock:
+            self._revalidate()
+            self._sync_index()
+            return [
+                (self._cache[folder_name].agent, score)
+                for folder_name, score in self._router.route(task, limit)
+                if folder_name in self._cache
+            ]
+
+    def agent_path(self, folder_name: str) -> Optional[Path]:
+        """Directory of an agent, searching every root. None if not found."""
+        if not self._is_valid_folder_name(folder_name):
             return None
-
-        skill_path = agent_path / 'SKILL.md'
-        if not skill_path.exists():
+        with self._lock:
+            cached = self._cache.get(folder_name)
+            if cached is not None:
+                return cached.path
+            return self._locate(folder_name)
+
+    def agent_root(self, folder_name: str) -> Optional[Path]:
+        """Agent root (one of ``roots``) an agent lives under. None if not found."""
+        if not self._is_valid_folder_name(folder_name):
             return None
-
-        return self._load_agent(agent_path, include_content=True)
+        with self._lock:
+            cached = self._cache.get(folder_name)
+            if cached is not None:
+                return cached.root
+            path = self._locate(folder_name)
+            return _root_of(path, folder_name) if path else None
+
+    def invalidate(self, folder_name: Optional[str] = None):
+        """Drop one agent (or everything) from the cache so it is re-read."""
+        with self._lock:
+            if folder_name is None:
+                self._cache.clear()
+                self._checked_at = None
+            else:
+                self._cache.pop(folder_name, None)
+            self._sorted = None
 
     def create_agent(self, folder_name: str, name: str, description: str = '',
                      skill_content: str = '', config: dict = None) -> Agent:
-        """Create a new agent."""
+        """Create a new agent (under the first agent root)."""
+        if folder_name in self.RESERVED_FOLDERS:
+            raise ValueError(f"'{folder_name}' is reserved and can't be used as an agent folder name.")
         if not self._is_valid_folder_name(folder_name):
             raise ValueError("Invalid folder name. Use only letters, numbers, and hyphens.")
 
         agent_path = self.agents_root / folder_name
-        if agent_path.exists():
+        if agent_path.exists() or self.agent_path(folder_name):
             raise ValueError(f"Agent folder '{folder_name}' already exists.")
+        with self._lock:
+            parent = self._parent_agent(folder_name)
+        if parent:
+            raise ValueError(f"'{parent}' is an agent; agents can't be created inside another agent's folder.")
 
         # Create folder
         agent_path.mkdir(parents=True)
@@ -123,7 +241,8 @@ class AgentRegistry:
             default_config.update(config)
         config_path.write_text(json.dumps(default_config, indent=2))
 
-        return self._load_agent(agent_path, include_content=True)
+        with self._lock:
+            return self._reload(folder_name, include_content=True, path=agent_path)
 
     def update_agent(self, folder_name: str, skill_content: str = None,
                      config_content: str = None) -> Agent:
@@ -131,8 +250,8 @@ class AgentRegistry:
         if not self._is_valid_folder_name(folder_name):
             raise ValueError("Invalid folder name.")
 
-        agent_path = self.agents_root / folder_name
-        if not agent_path.exists():
+        agent_path = self.agent_path(folder_name)
+        if not agent_path:
             raise ValueError(f"Agent '{folder_name}' not found.")
 
         if skill_content is not None:
@@ -149,15 +268,16 @@ class AgentRegistry:
             config_path = agent_path / 'config.json'
             config_path.write_text(config_content)
 
-        return self._load_agent(agent_path, include_content=True)
+        with self._lock:
+            return self._reload(folder_name, include_content=True, path=agent_path)
 
     def delete_agent(self, folder_name: str) -> bool:
-        """Delete an agent folder."""
+        """Delete an agent folder (including any agents nested inside it)."""
         if not self._is_valid_folder_name(folder_name):
             raise ValueError("Invalid folder name.")
 
-        agent_path = self.agents_root / folder_name
-        if not agent_path.exists():
+        agent_path = self.agent_path(folder_name)
+        if not agent_path:
             raise ValueError(f"Agent '{folder_name}' not found.")
 
         # Remove all files in the folder
@@ -171,45 +291,241 @@ class AgentRegistry:
 
         # Remove the folder
         agent_path.rmdir()
+
+        with self._lock:
+            prefix = folder_name + '/'
+            for nested in [f for f in self._cache if f.startswith(prefix)]:
+                del self._cache[nested]
+            self.invalidate(folder_name)
+            for removed in [f for f in self._indexed if f == folder_name or f.startswith(prefix)]:
+                self._unindex(removed)
         return True
 
-    def _load_agent(self, folder_path: Path, include_content: bool = False) -> Optional[Agent]:
-        """Load agent from folder."""
-        skill_path = folder_path / 'SKILL.md'
-        config_path = folder_path / 'config.json'
+    def _revalidate(self, force: bool = False):
+        """Bring the cache up to date with the filesystem. Caller holds the lock."""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.revalidate_seconds:
+            return
+        self._checked_at = now
+
+        found = self._scan()
+        for folder_name in [f for f in self._cache if f not in found]:
+            del self._cache[folder_name]
+            self._sorted = None
+
+        changed = [
+            folder_name for folder_name, (path, signature) in found.items()
+            if folder_name not in self._cache
+            or self._cache[folder_name].signature != signature
+            or self._cache[folder_name].path != path
+        ]
+        if not changed:
+            return
+
+        def parse(folder_name: str) -> Optional[Agent]:
+            try:
+                return self._load_agent(found[folder_name][0], folder=folder_name)
+            except (OSError, UnicodeDecodeError):
+                return None  # Unreadable (or removed mid-scan) - retried next check
+
+        if len(changed) > 1 and self.parse_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.parse_workers, len(changed))) as pool:
+                agents = list(pool.map(parse, changed))
+        else:
+            agents = [parse(folder_name) for folder_name in changed]
+
+        for folder_name, agent in zip(changed, agents):
+            if agent is None:
+                self._cache.pop(folder_name, None)
+                continue
+            path, signature = found[folder_name]
+            self._cache[folder_name] = _CachedAgent(agent=agent, path=path, root=_root_of(path, folder_name),
+                                                    signature=signature)
+        self._sorted = None
+
+    def _sync_index(self):
+        """Re-index agents whose files changed since they were indexed. Caller holds the lock."""
+        for folder_name in [f for f in self._indexed if f not in self._cache]:
+            self._unindex(folder_name)
+
+        stale = [
+            folder_name for folder_name, cached in self._cache.items()
+            if self._indexed.get(folder_name) != cached.signature
+        ]
+        if not stale:
+            return
+
+        def read_body(folder_name: str) -> str:
+            return _read_text(os.path.join(self._cache[folder_name].path, 'SKILL.md')) or ''
+
+        if len(stale) > 1 and self.parse_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.parse_workers, len(stale))) as pool:
+                bodies = list(pool.map(read_body, stale))
+        else:
+            bodies = [read_body(folder_name) for folder_name in stale]
+
+        documents = [
+            _index_document(folder_name, self._cache[folder_name].agent, body)
+            for folder_name, body in zip(stale, bodies)
+        ]
+        self._search_index.update_many(documents)
+        self._router.update_many(documents)
+        for folder_name in stale:
+            self._indexed[folder_name] = self._cache[folder_name].signature
+
+    def _index(self, folder_name: str, agent: Agent, body: str, signature: tuple):
+        """Add an agent to the search index and router. Caller holds the lock."""
+        document = _index_document(folder_name, agent, body)
+        self._search_index.update(*document)
+        self._router.update(*document)
+        self._indexed[folder_name] = signature
+
+    def _unindex(self, folder_name: str):
+        """Remove an agent from the search index and router. Caller holds the lock."""
+        self._search_index.remove(folder_name)
+        self._router.remove(folder_name)
+        self._indexed.pop(folder_name, None)
+
+    def _scan(self) -> dict[str, tuple[Path, tuple]]:
+        """
+        Walk the agent roots with os.scandir.
+
+        Returns:
+            Dict mapping folder (relative path) to (directory, file signature)
+        """
+        found: dict[str, tuple[Path, tuple]] = {}
+        for root in self.roots:
+            stack = [(str(root), '', 0)]
+            while stack:
+                path, rel, depth = stack.pop()
+                skill_entry = config_entry = None
+                children = []
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if entry.name == 'SKILL.md':
+                                skill_entry = entry
+                            elif entry.name == 'config.json':
+                                config_entry = entry
+                            elif depth < self.max_depth:
+                                try:
+                                    is_dir = entry.is_dir()
+                                except OSError:
+                                    continue
+                                child = f"{rel}/{entry.name}" if rel else entry.name
+                                if is_dir and not self._is_excluded(entry.name) and not self._is_excluded(child):
+                                    children.append((entry.path, child, depth + 1))
+                except OSError:
+                    continue  # Missing root or unreadable directory
+
+                if rel and skill_entry is not None and rel not in self.RESERVED_FOLDERS:
+                    # An agent's subfolders are its own, never further agents
+                    signature = (_entry_signature(skill_entry), _entry_signature(config_entry))
+                    if signature[0] is not None and rel not in found:
+                        found[rel] = (Path(path), signature)
+                    continue
+                stack.extend(children)
+        # Also drop agents nested in an agent found under another root
+        return {
+            rel: entry for rel, entry in found.items()
+            if not any('/'.join(rel.split('/')[:i]) in found for i in range(1, rel.count('/') + 1))
+        }
+
+    def _reload(self, folder_name: str, include_content: bool = False,
+                path: Optional[Path] = None) -> Optional[Agent]:
+        """Parse an agent from disk into the cache. Caller holds the lock."""
+        if path is None:
+            path = self._locate(folder_name)
+        if path and self._parent_agent(folder_name):
+            path = None  # Part of the enclosing agent, not an agent itself
+        signature = self._signature(path) if path else (None, None)
+        if signature[0] is None:
+            if self._cache.pop(folder_name, None) is not None:
+                self._sorted = None
+            return None
+
+        agent = self._load_agent(path, include_content=include_content, folder=folder_name)
+        if agent and self._is_discoverable(folder_name):
+            # The cache never holds file content
+            self._cache[folder_name] = _CachedAgent(
+                agent=replace(agent, skill_content=None, config_content=None),
+                path=path,
+                root=_root_of(path, folder_name),
+                signature=signature
+            )
+            self._sorted = None
+            if include_content:
+                # Content is in hand (create/update/detail) - keep the index current
+                self._index(folder_name, self._cache[folder_name].agent, agent.skill_content, signature)
+        return agent
+
+    def _locate(self, folder_name: str) -> Optional[Path]:
+        """First root containing ``folder_name``/SKILL.md."""
+        for root in self.roots:
+            path = root / folder_name
+            if (path / 'SKILL.md').is_file():
+                return path
+        return None
+
+    def _parent_agent(self, folder_name: str) -> Optional[str]:
+        """Nearest enclosing folder that is itself an agent, if any. Caller holds the lock."""
+        parts = folder_name.split('/')
+        for i in range(len(parts) - 1, 0, -1):
+            parent = '/'.join(parts[:i])
+            if parent not in self.RESERVED_FOLDERS and (parent in self._cache or self._locate(parent)):
+                return parent
+        return None
+
+    def _is_excluded(self, name: str) -> bool:
+        """Whether a folder name or relative path is hidden or matches an exclude glob."""
+        return self._exclude_re.match(name) is not None
+
+    def _is_discoverable(self, folder_name: str) -> bool:
+        """Whether discovery would find this folder (depth and exclude rules)."""
+        parts = folder_name.split('/')
+        if len(parts) > self.max_depth:
+            return False
+        return not any(
+            self._is_excluded(part) or self._is_excluded('/'.join(parts[:i + 1]))
+            for i, part in enumerate(parts)
+        )
+
+    @staticmethod
+    def _signature(folder_path: Path) -> tuple:
+        """(SKILL.md, config.json) size/mtime pairs - None for a missing file."""
+        return (_stat_signature(folder_path / 'SKILL.md'),
+                _stat_signature(folder_path / 'config.json'))
+
+    def _load_agent(self, folder_path: Path, include_content: bool = False,
+                    folder: Optional[str] = None) -> Optional[Agent]:
+        """Load agent from folder (``folder`` is its ID, default the directory name)."""
+        skill_path = os.path.join(folder_path, 'SKILL.md')
 
-        # Read SKILL.md
-        skill_content = skill_path.read_text() if skill_path.exists() else ''
+        # Read SKILL.md - only its header unless the content is wanted
+        if include_content:
+            skill_content = _read_text(skill_path) or ''
+            metadata = extract_skill_metadata(skill_content.split('\n'))
+        else:
+            skill_content = None
+            metadata = read_skill_metadata(skill_path) or {}
 
         # Read config.json
         config = {}
-        config_content = ''
-        if config_path.exists():
-            config_content = config_path.read_text()
+        config_content = _read_text(os.path.join(folder_path, 'config.json')) or ''
+        if config_content:
             try:
                 config = json.loads(config_content)
             except json.JSONDecodeError:
                 pass
 
-        # Extract name from config or folder
-        name = config.get('name', folder_path.name.replace('-', ' ').title())
-
-        # Extract description from config or SKILL.md
-        description = config.get('description', '')
-        if not description and skill_content:
-            # Try to extract from first paragraph after title
-            lines = skill_content.split('\n')
-            for i, line in enumerate(lines):
-                if line.startswith('#') and i + 1 < len(lines):
-                    # Skip empty lines after title
-                    for next_line in lines[i + 1:]:
-                        if next_line.strip() and not next_line.startswith('#'):
-                            description = next_line.strip()
-                            break
-                    break
+        # Extract name from config, SKILL.md front matter, or folder
+        name = config.get('name') or metadata.get('name') or folder_path.name.replace('-', ' ').title()
+
+        # Extract description from config or SKILL.md (front matter, else first paragraph after title)
+        description = config.get('description', '') or metadata.get('description') or ''
 
         agent = Agent(
-            folder=folder_path.name,
+            folder=folder or folder_path.name,
             name=name,
             description=description[:200] if description else '',
             trigger=config.get('trigger', 'on-demand'),
@@ -224,5 +540,44 @@ class AgentRegistry:
         return agent
 
     def _is_valid_folder_name(self, name: str) -> bool:
-        """Validate folder name (alphanumeric, hyphens, spaces allowed)."""
-        return bool(re.match(r'^[a-zA-Z0-9- ]+$', name))
+        """Validate folder name: '/'-separated segments of letters, numbers, hyphens and spaces, not reserved."""
+        return name not in self.RESERVED_FOLDERS and all(re.match(r'^[a-zA-Z0-9- ]+$', part) for part in name.split('/'))
+
+
+def _index_document(folder_name: str, agent: Agent, body: str) -> tuple:
+    """Search index fields of an agent; the folder is searchable as part of the name."""
+    return (folder_name, f"{agent.name} {folder_name}", agent.description, agent.mcp_servers, body)
+
+
+def _root_of(path: Path, folder_name: str) -> Path:
+    """Root directory of an agent path (``root / folder_name``)."""
+    return path.parents[folder_name.count('/')]
+
+
+def _read_text(path: str) -> Optional[str]:
+    """Read a file (undecodable bytes replaced), or None if it is missing or unreadable."""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _entry_signature(entry: Optional[os.DirEntry]) -> Optional[tuple[int, int]]:
+    """(mtime_ns, size) of a scandir entry, or None if missing."""
+    if entry is None:
+        return None
+    try:
+        st = entry.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _stat_signature(path: Path) -> Optional[tuple[int, int]]:
+    """(mtime_ns, size) of a path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
@@ -0,0 +1,249 @@
+"""
+Agent Router - Ranks agents for a free-text task without a model call.
+
+Every agent is a bag of terms from its name, description, MCP servers and
+SKILL.md (name and description terms counted several times, BM25F-style).
+The agents are compiled into a term-major sparse matrix of BM25 weights held
+in NumPy arrays, so routing a task is a handful of vectorised gathers-and-adds
+over the postings of its terms.
+
+Changes are incremental: an added or edited agent is tokenised once and kept
+in a small delta segment that is scored directly (against the compiled
+corpus statistics), and a removed or replaced agent is masked out of the
+matrix. The matrix is recompiled only once the changes since the last
+compile exceed a fraction of the corpus.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Times a term in each field is counted (name, description, mcp_servers, body)
+FIELD_WEIGHTS = (3, 2, 2, 1)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Only this much of a SKILL.md body is tokenised
+MAX_BODY_CHARS = 64_000
+
+STOPWORDS = frozenset('''
+    a about after all also an and any are as at be been but by can could do
+    does for from had has have how i if in into is it its me my no not of on
+    or our out please should so some such than that the their them then there
+    these they this those to up us use used using was we were what when which
+    who will with would you your
+'''.split())
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stopwords, with plurals folded ('emails' -> 'email')."""
+    return [term for term in map(normalize_token, _TOKEN_RE.findall(text.lower())) if term]
+
+
+def normalize_token(token: str) -> Optional[str]:
+    """Index term of a lowercase word, or None for stopwords and single characters."""
+    if token in STOPWORDS or len(token) < 2:
+        return None
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+class AgentRouter:
+    """
+    Thread-safe BM25 ranking of agents against a task description.
+
+    Args:
+        merge_ratio: Recompile the matrix once agents changed since the last
+            compile exceed this fraction of all agents
+        min_merge: ...or this many, whichever is larger
+    """
+
+    def __init__(self, merge_ratio: float = 0.1, min_merge: int = 64):
+        self.merge_ratio = merge_ratio
+        self.min_merge = min_merge
+        self._lock = threading.Lock()
+        self._token_ids: dict[str, int] = {}  # raw word -> term id (-1: not indexed)
+        self._terms: dict[str, int] = {}  # normalised term -> term id
+        self._docs: dict[str, tuple[np.ndarray, np.ndarray]] = {}  # doc_id -> (term ids, counts)
+        self._delta: set[str] = set()  # Agents not (or no longer correctly) in the matrix
+        self._changes = 0
+        self._compiled = False
+        # Compiled matrix: postings of term t are _doc_index/_weights[_indptr[t]:_indptr[t + 1]]
+        self._rows: list[str] = []
+        self._row_of: dict[str, int] = {}
+        self._live = np.zeros(0, dtype=bool)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._doc_index = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+        self._idf = np.zeros(0, dtype=np.float64)
+        self._avg_len = 1.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def update(self, doc_id: str, name: str = '', description: str = '',
+               mcp_servers: Iterable = (), body: str = ''):
+        """Add (or replace) one agent."""
+        self.update_many([(doc_id, name, description, mcp_servers, body)])
+
+    def update_many(self, docs: Iterable[tuple[str, str, str, Iterable, str]]):
+        """Add several agents: (doc_id, name, description, mcp_servers, body)."""
+        with self._lock:
+            for doc_id, name, description, mcp_servers, body in docs:
+                fields = (name or '', description or '',
+                          ' '.join(str(server) for server in mcp_servers or ()),
+                          (body or '')[:MAX_BODY_CHARS])
+                self._docs[doc_id] = self._count_terms(fields)
+                self._mask(doc_id)
+                self._delta.add(doc_id)
+                self._changes += 1
+
+    def remove(self, doc_id: str):
+        """Drop an agent."""
+        with self._lock:
+            if self._docs.pop(doc_id, None) is not None:
+                self._mask(doc_id)
+                self._delta.discard(doc_id)
+                self._changes += 1
+
+    def route(self, task: str, limit: int = 5) -> list[tuple[str, float]]:
+        """
+        Rank agents for a task.
+
+        Returns:
+            (doc_id, score) pairs for agents sharing at least one term with
+            the task, best first
+        """
+        with self._lock:
+            if not self._compiled or self._changes > max(self.min_merge,
+                                                         self.merge_ratio * len(self._docs)):
+                self._compile()
+            query = self._query_terms(task)
+            if not len(query):
+                return []
+            ranked = self._score_matrix(query, limit) + self._score_delta(query)
+
+        ranked.sort(key=lambda pair: -pair[1])
+        return [(doc_id, round(score, 4)) for doc_id, score in ranked[:limit]]
+
+    def _score_matrix(self, query: np.ndarray, limit: int) -> list[tuple[str, float]]:
+        """Top ``limit`` compiled agents for the query terms. Caller holds the lock."""
+        if not self._rows:
+            return []
+        scores = np.zeros(len(self._rows), dtype=np.float32)
+        for term_id in query[query < len(self._indptr) - 1]:
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            # An agent appears at most once per term, so plain fancy-index += is safe
+            scores[self._doc_index[start:end]] += self._weights[start:end]
+        scores[~self._live] = 0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        return [(self._rows[i], float(scores[i])) for i in matched]
+
+    def _score_delta(self, query: np.ndarray) -> list[tuple[str, float]]:
+        """Score agents changed since the last compile. Caller holds the lock."""
+        ranked = []
+        for doc_id in self._delta:
+            term_ids, counts = self._docs[doc_id]
+            hits = np.isin(term_ids, query)
+            if not hits.any():
+                continue
+            tf = counts[hits]
+            norm = K1 * (1 - B + B * counts.sum() / self._avg_len)
+            score = float((self._idf_of(term_ids[hits]) * tf * (K1 + 1) / (tf + norm)).sum())
+            ranked.append((doc_id, score))
+        return ranked
+
+    def _idf_of(self, term_ids: np.ndarray) -> np.ndarray:
+        """IDF from the compiled statistics; terms unseen there count as unique."""
+        idf = np.full(len(term_ids), math.log1p((len(self._rows) + 0.5) / 0.5))
+        known = term_ids < len(self._idf)
+        idf[known] = self._idf[term_ids[known]]
+        return idf
+
+    def _query_terms(self, task: str) -> np.ndarray:
+        """Distinct known term ids of a task. Caller holds the lock."""
+        term_ids = {self._terms.get(term, -1) for term in tokenize(task)}
+        term_ids.discard(-1)
+        return np.fromiter(term_ids, dtype=np.int64, count=len(term_ids))
+
+    def _count_terms(self, fields: tuple[str, ...]) -> tuple[np.ndarray, np.ndarray]:
+        """Weighted term counts of an agent's fields. Caller holds the lock."""
+        all_ids, all_counts = [], []
+        for text, weight in zip(fields, FIELD_WEIGHTS):
+            # Count words in C, then map each distinct word to a term id via dict lookups
+            words = Counter(_TOKEN_RE.findall(text.lower()))
+            ids = list(map(self._token_ids.get, words))
+            if None in ids:
+                ids = [self._token_id(word) if term_id is None else term_id
+                       for word, term_id in zip(words, ids)]
+            all_ids.append(np.array(ids, dtype=np.int64))
+            all_counts.append(np.fromiter(words.values(), dtype=np.float32, count=len(words)) * weight)
+
+        ids, counts = np.concatenate(all_ids), np.concatenate(all_counts)
+        indexed = ids >= 0
+        # Words folding to the same term ('email', 'emails') are merged
+        term_ids, inverse = np.unique(ids[indexed], return_inverse=True)
+        return term_ids, np.bincount(inverse, weights=counts[indexed]).astype(np.float32)
+
+    def _token_id(self, word: str) -> int:
+        """Term id of a raw word, assigning one if new (-1 if not indexed). Caller holds the lock."""
+        term = normalize_token(word)
+        if term is None:
+            term_id = -1
+        else:
+            term_id = self._terms.setdefault(term, len(self._terms))
+        self._token_ids[word] = term_id
+        return term_id
+
+    def _mask(self, doc_id: str):
+        """Exclude an agent's compiled row from scoring. Caller holds the lock."""
+        row = self._row_of.get(doc_id)
+        if row is not None:
+            self._live[row] = False
+
+    def _compile(self):
+        """Rebuild the BM25 weight matrix from the term counts. Caller holds the lock."""
+        self._rows = list(self._docs)
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._rows)}
+        self._live = np.ones(len(self._rows), dtype=bool)
+        self._delta.clear()
+        self._changes = 0
+        self._compiled = True
+        vocab_size = len(self._terms)
+
+        entries = [self._docs[doc_id] for doc_id in self._rows]
+        lengths = np.fromiter((len(term_ids) for term_ids, _ in entries), dtype=np.int64,
+                              count=len(entries))
+        term_ids = np.concatenate([term_ids for term_ids, _ in entries] or [np.zeros(0, np.int64)])
+        counts = np.concatenate([counts for _, counts in entries] or [np.zeros(0, np.float32)])
+        doc_index = np.repeat(np.arange(len(entries), dtype=np.int32), lengths)
+
+        doc_len = np.bincount(doc_index, weights=counts, minlength=len(entries))
+        self._avg_len = float(doc_len.mean()) if len(entries) and doc_len.mean() else 1.0
+        df = np.bincount(term_ids, minlength=vocab_size)
+        self._idf = np.log1p((len(entries) - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * doc_len / self._avg_len)
+        weights = self._idf[term_ids] * counts * (K1 + 1) / (counts + norm[doc_index])
+
+        # Group postings by term (CSC layout); 16-bit keys get NumPy's radix sort
+        keys = term_ids.astype(np.uint16) if vocab_size <= 0xFFFF else term_ids
+        order = np.argsort(keys, kind='stable')
+        self._indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        self._doc_index = doc_index[order]
+        self._weights = weights[order].astype(np.float32)
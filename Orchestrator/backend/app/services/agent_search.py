@@ -0,0 +1,132 @@
+"""
+Agent Search - Full-text index over agents, backed by SQLite FTS5.
+
+Each agent is a row in an in-memory FTS5 table with its name, description,
+MCP servers and SKILL.md body as separate columns. Queries are ranked with
+FTS5's BM25, weighting a match in the name above one in the body. Rows are
+added, replaced and removed individually, so the index is maintained
+incrementally as agents change.
+"""
+import re
+import sqlite3
+import threading
+from typing import Iterable
+
+# BM25 weight of a match in each column (name, description, mcp_servers, body)
+COLUMN_WEIGHTS = (3.0, 2.0, 2.0, 1.0)
+
+# Only this much of a SKILL.md body is indexed
+MAX_BODY_CHARS = 64_000
+
+_QUERY_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchUnavailableError(Exception):
+    """Raised when the SQLite build lacks FTS5."""
+
+
+class AgentSearchIndex:
+    """
+    Thread-safe full-text index of agents.
+
+    The porter tokenizer folds word forms ('emails', 'emailing' -> 'email'),
+    and prefix indexes keep search-as-you-type queries fast.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rowids: dict[str, int] = {}  # doc_id -> FTS rowid
+        self._next_rowid = 1
+        self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        try:
+            self._conn.execute('''
+                CREATE VIRTUAL TABLE agent_fts USING fts5(
+                    name, description, mcp_servers, body,
+                    tokenize = 'porter unicode61', prefix = '2 3'
+                )
+            ''')
+            self.available = True
+        except sqlite3.OperationalError:
+            self.available = False  # SQLite compiled without FTS5
+
+    def __len__(self) -> int:
+        return len(self._rowids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rowids
+
+    def update(self, doc_id: str, name: str = '', description: str = '',
+               mcp_servers: Iterable = (), body: str = ''):
+        """Index (or re-index) one agent."""
+        self.update_many([(doc_id, name, description, mcp_servers, body)])
+
+    def update_many(self, docs: Iterable[tuple[str, str, str, Iterable, str]]):
+        """Index several agents in one transaction: (doc_id, name, description, mcp_servers, body)."""
+        if not self.available:
+            return
+        with self._lock:
+            for doc_id, name, description, mcp_servers, body in docs:
+                self._remove_locked(doc_id)
+                rowid = self._next_rowid
+                self._next_rowid += 1
+                self._conn.execute(
+                    'INSERT INTO agent_fts (rowid, name, description, mcp_servers, body) VALUES (?, ?, ?, ?, ?)',
+                    (rowid, name or '', description or '',
+                     ' '.join(str(server) for server in mcp_servers or ()),
+                     (body or '')[:MAX_BODY_CHARS])
+                )
+                self._rowids[doc_id] = rowid
+            self._conn.commit()
+
+    def remove(self, doc_id: str):
+        """Drop an agent from the index."""
+        if not self.available:
+            return
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._conn.commit()
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[str, float]]:
+        """
+        Rank agents against a query.
+
+        All words must match, the last one as a prefix so partially typed
+        words find results; if nothing matches every word, agents matching
+        any of them are returned instead.
+
+        Returns:
+            (doc_id, score) pairs, best first (higher score is better)
+
+        Raises:
+            SearchUnavailableError: If SQLite lacks FTS5
+        """
+        if not self.available:
+            raise SearchUnavailableError('Full-text search requires SQLite with FTS5')
+
+        words = _QUERY_TOKEN_RE.findall(query)
+        if not words:
+            return []
+        # Quote every word so user input can't inject FTS5 query syntax
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+
+        with self._lock:
+            rows = self._match_locked(' AND '.join(terms), limit)
+            if not rows and len(terms) > 1:
+                rows = self._match_locked(' OR '.join(terms), limit)
+            doc_ids = {rowid: doc_id for doc_id, rowid in self._rowids.items()} if rows else {}
+
+        # FTS5's bm25() is "lower is better"; flip it for callers
+        return [(doc_ids[rowid], round(-rank, 4)) for rowid, rank in rows if rowid in doc_ids]
+
+    def _match_locked(self, expression: str, limit: int) -> list[tuple[int, float]]:
+        return self._conn.execute(f'''
+            SELECT rowid, bm25(agent_fts, {', '.join(map(str, COLUMN_WEIGHTS))}) AS rank
+            FROM agent_fts WHERE agent_fts MATCH ?
+            ORDER BY rank LIMIT ?
+        ''', (expression, limit)).fetchall()
+
+    def _remove_locked(self, doc_id: str):
+        rowid = self._rowids.pop(doc_id, None)
+        if rowid is not None:
+            self._conn.execute('DELETE FROM agent_fts WHERE rowid = ?', (rowid,))
@@ -1,15 +1,25 @@
 """
 Claude Executor - Runs agents via Claude Code CLI.
 """
+import os
+import signal
 import subprocess
 import json
 import threading
 import base64
-import requests
+from collections import deque
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Any
 from dataclasses import dataclass
 
+from app.services.claude_settings import get_claude_settings
+from app.services.context_budget import ContextBudget
+from app.services.url_fetcher import URLFetcher, get_url_fetcher
+
+if TYPE_CHECKING:
+    from app.services.cli_pool import CLIProcessPool
+    from app.services.mcp_pool import MCPServerPool
+
 
 @dataclass
 class ExecutionResult:
@@ -24,28 +34,33 @@ class ExecutionResult:
 class ClaudeExecutor:
     """Executes agents via Claude Code CLI."""
 
-    def __init__(self, agents_root: str, claude_cli_path: str = 'claude', timeout: int = 600):
+    # In-memory tails kept while streaming (full output goes to on_output)
+    OUTPUT_TAIL_CHARS = 64_000
+    ERROR_TAIL_CHARS = 16_000
+
+    def __init__(self, agents_root: str, claude_cli_path: str = 'claude', timeout: int = 600,
+                 agent_resolver: Optional[Callable[[str], Optional[Path]]] = None,
+                 mcp_pool: Optional['MCPServerPool'] = None,
+                 cli_pool: Optional['CLIProcessPool'] = None,
+                 url_fetcher: Optional[URLFetcher] = None,
+                 context_budget: Optional[ContextBudget] = None):
         self.agents_root = Path(agents_root)
+        self.agent_resolver = agent_resolver  # folder -> directory (e.g. AgentRegistry.agent_path)
         self.claude_cli_path = claude_cli_path
         self.timeout = timeout
-        self._mcp_configs = self._load_mcp_configs()
-
-    def _load_mcp_configs(self) -> dict:
-        """Load MCP server configurations from Claude settings."""
-        settings_paths = [
-            Path.home() / '.claude.json',
-            Path.home() / '.claude' / 'settings.json',
-        ]
-
-        for settings_path in settings_paths:
-            if settings_path.exists():
-                try:
-                    with open(settings_path) as f:
-                        settings = json.load(f)
-                    return settings.get('mcpServers', {})
-                except (json.JSONDecodeError, IOError):
-                    continue
-        return {}
+        self.mcp_pool = mcp_pool  # Warm shared MCP servers instead of per-run ones
+        self.cli_pool = cli_pool  # Pre-started CLI processes for hot agents
+        self.url_fetcher = url_fetcher or get_url_fetcher()  # Shared session, concurrent fetches
+        self.context_budget = context_budget  # Relevance-ranked packing of attached documents
+        self._settings = get_claude_settings()
+
+    def _agent_path(self, agent_folder: str) -> Path:
+        """Directory of an agent (which may be nested or under another root)."""
+        if self.agent_resolver:
+            path = self.agent_resolver(agent_folder)
+            if path:
+                return path
+        return self.agents_root / agent_folder
 
     def _get_agent_mcp_servers(self, agent_path: Path) -> list[str]:
         """Get required MCP servers from agent's config.json."""
@@ -61,34 +76,12 @@ class ClaudeExecutor:
             return []
 
     def _build_mcp_config_arg(self, required_servers: list[str]) -> Optional[str]:
-        """Build MCP config JSON string for required servers."""
-        if not required_servers or not self._mcp_configs:
+        """Build MCP config JSON string for required servers (precomputed per server list)."""
+        if not required_servers:
             return None
-
-        # Filter to only include required servers that we have configs for
-        filtered_configs = {}
-        for server_name in required_servers:
-            if server_name in self._mcp_configs:
-                filtered_configs[server_name] = self._mcp_configs[server_name]
-
-        if not filtered_configs:
-            return None
-
-        return json.dumps({"mcpServers": filtered_configs})
-
-    def _fetch_url_content(self, url: str, max_size: int = 50000) -> str:
-        """Fetch content from a URL."""
-        try:
-            response = requests.get(url, timeout=30, headers={
-                'User-Agent': 'Orchestrator/1.0'
-            })
-            response.raise_for_status()
-            content = response.text[:max_size]
-            if len(response.text) > max_size:
-                content += f"\n\n[Truncated - original size: {len(response.text)} chars]"
-            return content
-        except Exception as e:
-            return f"[Error fetching URL: {str(e)}]"
+        if self.mcp_pool:
+            return self.mcp_pool.mcp_config_arg(required_servers)
+        return self._settings.mcp_config_arg(required_servers)
 
     def _read_file_content(self, path: str, max_size: int = 50000) -> str:
         """Read content from a local file."""
@@ -109,6 +102,27 @@ class ClaudeExecutor:
         except Exception as e:
             return f"[Error reading file: {str(e)}]"
 
+    def _read_document(self, path: str, max_chars: int) -> tuple[str, str]:
+        """
+        Read a whole local file for the context budget, up to ``max_chars``.
+
+        Returns:
+            (text, note): the file's text ('' if it can't be read) and a status
+            or truncation note kept out of relevance ranking ('' if none)
+        """
+        try:
+            file_path = Path(path)
+            if not file_path.exists():
+                return '', f"[File not found: {path}]"
+            size = file_path.stat().st_size
+            with open(file_path, errors='replace') as f:
+                text = f.read(max_chars + 1)
+            if len(text) > max_chars:
+                return text[:max_chars], f"[Truncated at {max_chars} chars - original size: {size} bytes]"
+            return text, ''
+        except Exception as e:
+            return '', f"[Error reading file: {str(e)}]"
+
     def _encode_image_base64(self, path: str, max_size: int = 5_000_000) -> str:
         """Encode an image file as base64."""
         try:
@@ -126,24 +140,43 @@ class ClaudeExecutor:
         except Exception as e:
             return f"[Error encoding image: {str(e)}]"
 
-    def _build_context_section(self, context: Optional[Dict[str, Any]]) -> str:
-        """Build the context section for the prompt."""
+    def _build_context_section(self, context: Optional[Dict[str, Any]], task: str = '') -> str:
+        """Build the context section for the prompt, fitting documents into the context budget."""
         if not context:
             return ""
 
         parts = []
+        documents = []  # (tag, attribute, text, note)
 
-        # Process URLs
+        # Process URLs (fetched concurrently under one deadline)
         if context.get('urls'):
+            contents = self.url_fetcher.fetch_many(context['urls'])
             for url in context['urls']:
-                content = self._fetch_url_content(url)
-                parts.append(f'<url src="{url}">\n{content}\n</url>')
+                content = contents[url]
+                if content.startswith('[Error fetching URL:'):
+                    documents.append(('url', f'src="{url}"', '', content))
+                else:
+                    documents.append(('url', f'src="{url}"', content, ''))
 
-        # Process file paths
+        # Process file paths: whole files when budgeted, cut to a fixed size otherwise
         if context.get('file_paths'):
             for path in context['file_paths']:
-                content = self._read_file_content(path)
-                parts.append(f'<document path="{path}">\n{content}\n</document>')
+                if self.context_budget:
+                    text, note = self._read_document(path, self.context_budget.document_chars)
+                else:
+                    text, note = self._read_file_content(path), ''
+                documents.append(('document', f'path="{path}"', text, note))
+
+        # Reduce to the chunks most relevant to the task if they don't all fit;
+        # status notes are added afterwards so they are never ranked or cut
+        texts = [text for _, _, text, _ in documents]
+        if self.context_budget:
+            present = [i for i, text in enumerate(texts) if text]
+            for i, text in zip(present, self.context_budget.fit(task, [texts[i] for i in present])):
+                texts[i] = text
+        for (tag, attribute, _, note), text in zip(documents, texts):
+            content = '\n\n'.join(part for part in (text, note) if part)
+            parts.append(f'<{tag} {attribute}>\n{content}\n</{tag}>')
 
         # Process images
         if context.get('images'):
@@ -170,7 +203,7 @@ class ClaudeExecutor:
         Returns:
             ExecutionResult with output or error
         """
-        agent_path = self.agents_root / agent_folder
+        agent_path = self._agent_path(agent_folder)
 
         if not agent_path.exists():
             return ExecutionResult(
@@ -270,6 +303,9 @@ Execute this task according to your SKILL.md instructions."""
         """
         Execute an agent asynchronously in a background thread.
 
+        Queued executions should go through ExecutionPool instead, which bounds
+        concurrency and survives restarts.
+
         Args:
             agent_folder: Name of the agent folder
             task: Task description
@@ -280,51 +316,79 @@ Execute this task according to your SKILL.md instructions."""
         Returns:
             The thread running the execution
         """
-        def run_with_pid():
-            agent_path = self.agents_root / agent_folder
-
-            if not agent_path.exists():
-                on_complete(ExecutionResult(
-                    success=False,
-                    output='',
-                    error=f"Agent folder '{agent_folder}' not found",
-                    return_code=-1
-                ))
-                return
-
-            skill_path = agent_path / 'SKILL.md'
-            if not skill_path.exists():
-                on_complete(ExecutionResult(
-                    success=False,
-                    output='',
-                    error=f"SKILL.md not found in '{agent_folder}'",
-                    return_code=-1
-                ))
-                return
+        thread = threading.Thread(
+            target=self.run_execution,
+            args=(agent_folder, task, on_complete, on_pid, context),
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def run_execution(self, agent_folder: str, task: str,
+                      on_complete: Callable[[ExecutionResult], None],
+                      on_pid: Optional[Callable[[int], None]] = None,
+                      context: Optional[Dict[str, Any]] = None,
+                      on_output: Optional[Callable[[str, str], None]] = None) -> None:
+        """
+        Run an agent to completion in the calling thread, reporting via callbacks.
 
-            try:
-                # Build the command
-                cmd = [
-                    self.claude_cli_path,
-                    '--print',
-                    '--output-format', 'text',
-                    '--verbose',
-                    '--dangerously-skip-permissions',
-                ]
-
-                # Add MCP server configs if agent requires them
-                required_mcp = self._get_agent_mcp_servers(agent_path)
-                if required_mcp:
-                    mcp_config_json = self._build_mcp_config_arg(required_mcp)
-                    if mcp_config_json:
-                        cmd.extend(['--mcp-config', mcp_config_json])
-
-                # Build the context section (URLs, files, images)
-                context_section = self._build_context_section(context)
-
-                # Build the prompt including the SKILL context
-                skill_content = skill_path.read_text()
-                full_prompt = f"""You are executing as the agent defined in SKILL.md below.
+        The CLI runs with ``--output-format stream-json`` so progress can be
+        forwarded line by line while it works; the final ``result`` event
+        becomes the execution output.
+
+        Args:
+            agent_folder: Name of the agent folder
+            task: Task description
+            on_complete: Callback when execution completes
+            on_pid: Optional callback with PID when process starts
+            context: Optional context dict with urls, file_paths, and images
+            on_output: Optional callback with (stream, line) for each stdout
+                line (a stream-json event) and stderr line as the CLI emits it
+        """
+        agent_path = self._agent_path(agent_folder)
+
+        if not agent_path.exists():
+            on_complete(ExecutionResult(
+                success=False,
+                output='',
+                error=f"Agent folder '{agent_folder}' not found",
+                return_code=-1
+            ))
+            return
+
+        skill_path = agent_path / 'SKILL.md'
+        if not skill_path.exists():
+            on_complete(ExecutionResult(
+                success=False,
+                output='',
+                error=f"SKILL.md not found in '{agent_folder}'",
+                return_code=-1
+            ))
+            return
+
+        try:
+            # Build the command
+            cmd = [
+                self.claude_cli_path,
+                '--print',
+                '--output-format', 'stream-json',
+                '--verbose',
+                '--dangerously-skip-permissions',
+            ]
+
+            # Add MCP server configs if agent requires them
+            required_mcp = self._get_agent_mcp_servers(agent_path)
+            if required_mcp:
+                mcp_config_json = self._build_mcp_config_arg(required_mcp)
+                if mcp_config_json:
+                    cmd.extend(['--mcp-config', mcp_config_json])
+
+            # Build the context section (URLs, files, images)
+            context_section = self._build_context_section(context, task)
+
+            # Build the prompt including the SKILL context
+            skill_content = skill_path.read_text()
+            full_prompt = f"""You are executing as the agent defined in SKILL.md below.
 
 <skill>
 {skill_content}
@@ -334,58 +398,177 @@ Execute this task according to your SKILL.md instructions."""
 
 Execute this task according to your SKILL.md instructions."""
 
-                # Use Popen to get the PID immediately
+            # A pre-started CLI skips process startup; otherwise use Popen to get the PID immediately
+            process = self.cli_pool.acquire(cmd, str(agent_path)) if self.cli_pool else None
+            if process is None:
                 process = subprocess.Popen(
                     cmd,
                     stdin=subprocess.PIPE,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
-                    cwd=str(agent_path)
+                    bufsize=1,
+                    cwd=str(agent_path),
+                    start_new_session=True  # Own process group, so recovery can stop it with its MCP servers
                 )
 
-                # Notify caller of PID
-                if on_pid:
-                    on_pid(process.pid)
-
-                # Wait for completion with timeout
-                try:
-                    stdout, stderr = process.communicate(input=full_prompt, timeout=self.timeout)
-                    execution_result = ExecutionResult(
-                        success=process.returncode == 0,
-                        output=stdout,
-                        error=stderr if process.returncode != 0 else None,
-                        return_code=process.returncode,
-                        pid=process.pid
-                    )
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    process.communicate()  # Clean up
-                    execution_result = ExecutionResult(
-                        success=False,
-                        output='',
-                        error=f"Execution timed out after {self.timeout} seconds",
-                        return_code=-2,
-                        pid=process.pid
-                    )
+            # Notify caller of PID
+            if on_pid:
+                on_pid(process.pid)
 
-                on_complete(execution_result)
+            on_complete(self._stream_process(process, full_prompt, on_output))
 
-            except FileNotFoundError:
-                on_complete(ExecutionResult(
-                    success=False,
-                    output='',
-                    error=f"Claude CLI not found at '{self.claude_cli_path}'",
-                    return_code=-3
-                ))
-            except Exception as e:
-                on_complete(ExecutionResult(
-                    success=False,
-                    output='',
-                    error=str(e),
-                    return_code=-4
-                ))
-
-        thread = threading.Thread(target=run_with_pid, daemon=True)
-        thread.start()
-        return thread
+        except FileNotFoundError:
+            on_complete(ExecutionResult(
+                success=False,
+                output='',
+                error=f"Claude CLI not found at '{self.claude_cli_path}'",
+                return_code=-3
+            ))
+        except Exception as e:
+            on_complete(ExecutionResult(
+                success=False,
+                output='',
+                error=str(e),
+                return_code=-4
+            ))
+
+    def _stream_process(self, process: subprocess.Popen, prompt: str,
+                        on_output: Optional[Callable[[str, str], None]] = None) -> ExecutionResult:
+        """
+        Feed the prompt, relay output lines as they arrive, and enforce the timeout.
+
+        Only the final result and short tails of the assistant text and stderr
+        are kept in memory; the full output is the caller's to persist via
+        ``on_output``.
+        """
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            try:
+                # The CLI leads its own process group: stop its MCP servers too,
+                # or they keep the pipes open after it is gone
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                process.kill()
+
+        timer = threading.Timer(self.timeout, kill_on_timeout)
+        timer.daemon = True
+        timer.start()
+
+        # stdin and stderr get their own threads so a chatty CLI can't deadlock us
+        stderr_tail = TailBuffer(self.ERROR_TAIL_CHARS)
+
+        def feed_stdin():
+            try:
+                process.stdin.write(prompt)
+                process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+        def drain_stderr():
+            for line in process.stderr:
+                line = line.rstrip('\n')
+                stderr_tail.append(line)
+                if on_output:
+                    on_output('stderr', line)
+
+        helpers = [
+            threading.Thread(target=feed_stdin, daemon=True),
+            threading.Thread(target=drain_stderr, daemon=True),
+        ]
+        for helper in helpers:
+            helper.start()
+
+        result_text = None
+        is_error = False
+        text_tail = TailBuffer(self.OUTPUT_TAIL_CHARS)
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                if on_output:
+                    on_output('stdout', line)
+
+                event = _parse_stream_event(line)
+                if event is None:
+                    text_tail.append(line)  # Not stream-json - keep the raw text
+                elif event.get('type') == 'result':
+                    result_text = event.get('result') or ''
+                    is_error = bool(event.get('is_error'))
+                elif event.get('type') == 'assistant':
+                    for text in _assistant_text(event):
+                        text_tail.append(text)
+            process.wait()
+        finally:
+            timer.cancel()
+            for helper in helpers:
+                helper.join(timeout=5)
+
+        if timed_out.is_set():
+            return ExecutionResult(
+                success=False,
+                output='',
+                error=f"Execution timed out after {self.timeout} seconds",
+                return_code=-2,
+                pid=process.pid
+            )
+
+        output = result_text if result_text is not None else text_tail.text()
+        success = process.returncode == 0 and not is_error
+        error = None
+        if not success:
+            error = stderr_tail.text() or (output if is_error else None)
+        return ExecutionResult(
+            success=success,
+            output=output,
+            error=error,
+            return_code=process.returncode,
+            pid=process.pid
+        )
+
+
+class TailBuffer:
+    """Keeps the most recent lines of a stream, up to ``max_chars`` in total."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.truncated = False
+        self._lines: deque[str] = deque()
+        self._size = 0
+
+    def append(self, line: str):
+        if len(line) > self.max_chars:
+            line = line[-self.max_chars:]
+        self._lines.append(line)
+        self._size += len(line) + 1
+        while self._size > self.max_chars and len(self._lines) > 1:
+            self._size -= len(self._lines.popleft()) + 1
+            self.truncated = True
+
+    def text(self) -> str:
+        body = '\n'.join(self._lines)
+        return f"[...earlier output truncated...]\n{body}" if self.truncated else body
+
+
+def _parse_stream_event(line: str) -> Optional[dict]:
+    """Parse one stream-json line, or None if the line is not a JSON object."""
+    if not line.startswith('{'):
+        return None
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def _assistant_text(event: dict) -> list[str]:
+    """Extract text blocks from a stream-json assistant message."""
+    content = (event.get('message') or {}).get('content') or []
+    return [
+        block.get('text', '')
+        for block in content
+        if isinstance(block, dict) and block.get('type') == 'text'
+    ]
@@ -0,0 +1,119 @@
+"""
+Claude Settings - Process-wide cache of the user's Claude Code MCP servers.
+
+``~/.claude.json`` holds the user's MCP servers next to their project
+history, so it can be several megabytes - and the CLI rewrites it on every
+run. Rather than each executor and MCP endpoint parsing it, one cache per
+process re-parses the settings only when the file's size or mtime changes
+(a ``stat`` per lookup otherwise), and keeps the ``--mcp-config`` payload of
+each distinct agent server list until the servers themselves change.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Searched in order; the first file that parses wins
+SETTINGS_PATHS = (
+    Path.home() / '.claude.json',
+    Path.home() / '.claude' / 'settings.json',
+    Path.home() / '.config' / 'claude' / 'settings.json',
+)
+
+
+class ClaudeSettingsCache:
+    """
+    MCP servers from Claude settings, revalidated against file mtimes.
+
+    Args:
+        paths: Settings files, in order of precedence
+    """
+
+    def __init__(self, paths: Iterable[Path] = SETTINGS_PATHS):
+        self.paths = [Path(p) for p in paths]
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._servers: dict = {}
+        self._payloads: dict[tuple[str, ...], Optional[str]] = {}
+        self.loads = 0
+
+    def mcp_servers(self) -> dict:
+        """
+        MCP server configs from the first readable settings file.
+
+        Returns:
+            Dict of server name -> config (shared; do not modify)
+        """
+        with self._lock:
+            self._revalidate()
+            return self._servers
+
+    def mcp_config_arg(self, server_names: Iterable[str]) -> Optional[str]:
+        """
+        ``--mcp-config`` JSON for a list of servers, memoised per list.
+
+        Servers missing from the settings are left out.
+
+        Returns:
+            JSON string, or None if none of the servers is configured
+        """
+        key = tuple(server_names)
+        with self._lock:
+            self._revalidate()
+            if key not in self._payloads:
+                configs = {name: self._servers[name] for name in key if name in self._servers}
+                self._payloads[key] = json.dumps({'mcpServers': configs}) if configs else None
+            return self._payloads[key]
+
+    def invalidate(self):
+        """Force a re-read on the next lookup."""
+        with self._lock:
+            self._signature = None
+
+    def _revalidate(self):
+        """Re-parse the settings if any candidate file changed. Caller holds the lock."""
+        signature = tuple(_stat_signature(path) for path in self.paths)
+        if signature == self._signature:
+            return
+        servers = self._load()
+        if servers != self._servers:
+            # Only a change to the servers themselves drops the prepared payloads
+            self._servers = servers
+            self._payloads.clear()
+        self._signature = signature
+
+    def _load(self) -> dict:
+        """Parse the first readable settings file."""
+        self.loads += 1
+        for settings_path in self.paths:
+            try:
+                with open(settings_path, 'rb') as f:
+                    settings = json.load(f)
+                return settings.get('mcpServers', {}) or {}
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError, IOError):
+                continue
+        return {}
+
+
+def _stat_signature(path: Path) -> Optional[tuple[int, int]]:
+    """(size, mtime) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+_settings: Optional[ClaudeSettingsCache] = None
+_settings_lock = threading.Lock()
+
+
+def get_claude_settings() -> ClaudeSettingsCache:
+    """The process-wide settings cache."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = ClaudeSettingsCache()
+    return _settings
@@ -0,0 +1,239 @@
+"""
+CLI Pool - Pre-started Claude CLI processes for frequently run agents.
+
+In ``--print`` mode the CLI reads its prompt from stdin, so a process can be
+started ahead of time - command line and working directory already set -
+and simply wait for its prompt. When an agent runs, an idle process for its
+exact command is handed over and the prompt written to it, so the run skips
+CLI startup; a background thread then starts a replacement.
+
+Only hot agents are kept warm: a command is pre-started after ``hot_runs``
+runs within ``idle_seconds``, at most ``per_agent`` idle processes each and
+``max_processes`` overall. Idle processes older than ``idle_seconds`` are
+stopped (a CLI started long ago may hold stale settings or credentials), as
+are those of agents that have gone quiet.
+"""
+import atexit
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# How often the pool is checked for expired processes when nothing else happens
+CHECK_SECONDS = 5.0
+
+
+class CLIProcessPool:
+    """
+    Idle CLI processes per (working directory, command line).
+
+    Args:
+        per_agent: Idle processes kept for each hot command
+        max_processes: Most idle processes across all commands
+        idle_seconds: Stop idle processes after this long; also the window
+            in which runs are counted towards ``hot_runs``
+        hot_runs: Runs within the window before a command is pre-started
+    """
+
+    def __init__(self, per_agent: int = 1, max_processes: int = 8,
+                 idle_seconds: float = 300, hot_runs: int = 2):
+        self.per_agent = max(1, per_agent)
+        self.max_processes = max(1, max_processes)
+        self.idle_seconds = max(1.0, idle_seconds)
+        self.hot_runs = max(1, hot_runs)
+        self._cond = threading.Condition()
+        self._idle: dict[tuple, deque] = {}  # key -> deque of (process, started monotonic)
+        self._runs: dict[tuple, deque] = {}  # key -> monotonic times of recent runs
+        self._expired: list[subprocess.Popen] = []
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stopped = False
+        self.hits = 0
+        self.misses = 0
+        self.spawned = 0
+        self.retired = 0
+        atexit.register(self.shutdown)
+
+    def acquire(self, cmd: list[str], cwd: str) -> Optional[subprocess.Popen]:
+        """
+        Take a pre-started process for this command, and note the run.
+
+        Args:
+            cmd: Full CLI command line
+            cwd: Working directory the process must have
+
+        Returns:
+            A running process waiting for its prompt on stdin, or None if
+            none is ready (the caller starts one as usual)
+        """
+        key = (cwd, tuple(cmd))
+        with self._cond:
+            self._ensure_thread()
+            now = time.monotonic()
+            runs = self._runs.setdefault(key, deque())
+            runs.append(now)
+            while runs and now - runs[0] > self.idle_seconds:
+                runs.popleft()
+
+            process = None
+            idle = self._idle.get(key)
+            while idle:
+                candidate, started = idle.popleft()
+                if candidate.poll() is None and now - started < self.idle_seconds:
+                    process = candidate
+                    break
+                self._expired.append(candidate)  # Stopped by the refill thread
+            if process:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._cond.notify_all()  # Refill
+        return process
+
+    def stats(self) -> dict:
+        """Pool counters and idle processes per agent directory."""
+        with self._cond:
+            idle: dict[str, int] = {}
+            for (cwd, _), processes in self._idle.items():
+                if processes:
+                    idle[os.path.basename(cwd)] = idle.get(os.path.basename(cwd), 0) + len(processes)
+            return {
+                'per_agent': self.per_agent,
+                'max_processes': self.max_processes,
+                'idle_seconds': self.idle_seconds,
+                'hot_runs': self.hot_runs,
+                'idle': idle,
+                'hits': self.hits,
+                'misses': self.misses,
+                'spawned': self.spawned,
+                'retired': self.retired,
+            }
+
+    def shutdown(self):
+        """Stop refilling and stop every idle process."""
+        with self._cond:
+            self._stopped = True
+            processes = [process for idle in self._idle.values() for process, _ in idle] + self._expired
+            self._idle.clear()
+            self._expired = []
+            self._cond.notify_all()
+        for process in processes:
+            self._retire(process)
+
+    def _ensure_thread(self):
+        """Start the refill thread (again, after a fork). Caller holds the lock."""
+        if self._pid != os.getpid():
+            # Forked: the idle processes are the parent's children
+            self._pid, self._thread = os.getpid(), None
+            self._idle.clear()
+            self._expired = []
+        if self._stopped or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._refill_loop, name='cli-pool', daemon=True)
+        self._thread.start()
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                expired, wanted = self._plan(time.monotonic())
+            for process in expired:
+                self._retire(process)
+            if wanted:
+                self._spawn(wanted)
+                continue
+            with self._cond:
+                if not self._stopped:
+                    self._cond.wait(CHECK_SECONDS)
+
+    def _plan(self, now: float) -> tuple[list, Optional[tuple]]:
+        """
+        Drop expired and cold processes, and pick the next command to start.
+
+        Caller holds the lock.
+
+        Returns:
+            (processes to stop, key to pre-start or None)
+        """
+        expired, self._expired = self._expired, []
+        for key in list(self._runs):
+            runs = self._runs[key]
+            while runs and now - runs[0] > self.idle_seconds:
+                runs.popleft()
+            idle = self._idle.get(key, deque())
+            keep = deque()
+            for process, started in idle:
+                if process.poll() is None and now - started < self.idle_seconds and len(runs) >= self.hot_runs:
+                    keep.append((process, started))
+                else:
+                    expired.append(process)
+            if keep:
+                self._idle[key] = keep
+            else:
+                self._idle.pop(key, None)
+            if not runs:
+                del self._runs[key]
+
+        total = sum(len(idle) for idle in self._idle.values())
+        if total >= self.max_processes:
+            return expired, None
+        # Most recently run agents first
+        hot = sorted((runs[-1], key) for key, runs in self._runs.items() if len(runs) >= self.hot_runs)
+        for _, key in reversed(hot):
+            if len(self._idle.get(key, ())) < self.per_agent:
+                return expired, key
+        return expired, None
+
+    def _spawn(self, key: tuple):
+        cwd, cmd = key
+        try:
+            process = subprocess.Popen(
+                list(cmd),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                cwd=cwd,
+                start_new_session=True  # As ClaudeExecutor.run_execution
+            )
+        except OSError:
+            # Can't start it (CLI missing, directory gone): stop trying for this command
+            with self._cond:
+                self._runs.pop(key, None)
+            return
+        with self._cond:
+            if self._stopped:
+                keep = False
+            else:
+                keep = True
+                self.spawned += 1
+                self._idle.setdefault(key, deque()).append((process, time.monotonic()))
+        if not keep:
+            self._retire(process)
+
+    def _retire(self, process: subprocess.Popen):
+        """Stop an idle process; closing stdin without a prompt makes the CLI exit."""
+        with self._cond:
+            self.retired += 1
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)  # With any MCP servers it started
+            except OSError:
+                process.kill()
+            process.wait()
+        for stream in (process.stdout, process.stderr):
+            try:
+                stream.close()
+            except OSError:
+                pass
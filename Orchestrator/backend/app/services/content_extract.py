@@ -0,0 +1,304 @@
+"""
+Content Extract - Turns fetched URL bodies into compact prompt text.
+
+Raw HTML is mostly markup, scripts and navigation, so pasting it into a
+prompt spends the context budget (and the model's tokens) on junk. Each
+body is converted by a handler chosen from its media type:
+
+- HTML/XHTML: main text only - scripts, styles, navigation, footers and
+  hidden elements are dropped, and ``<main>``/``<article>`` content is
+  preferred when present. Headings, list items, links and table rows are
+  kept in a light Markdown-like form.
+- JSON: re-serialised compactly
+- other text: whitespace collapsed
+- anything else (PDFs, images, archives): replaced by a short note
+
+Handlers are looked up by exact media type, then ``major/*``, then ``*/*``;
+``register_handler`` adds or replaces one.
+"""
+import json
+import re
+from html.parser import HTMLParser
+from typing import Callable, Optional
+from urllib.parse import urljoin, urlsplit
+
+# Handler: (text, base URL) -> extracted text
+Handler = Callable[[str, str], str]
+
+# Elements whose content is never prompt text
+SKIP_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'svg', 'math', 'canvas', 'iframe', 'object',
+    'head', 'nav', 'footer', 'aside', 'form', 'button', 'select', 'dialog',
+})
+# Landmark roles that mark boilerplate
+SKIP_ROLES = frozenset({'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'menu', 'dialog'})
+MAIN_TAGS = frozenset({'main', 'article'})
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'section', 'header', 'br', 'hr', 'li', 'ul', 'ol', 'dl', 'dt', 'dd', 'table', 'tr',
+    'blockquote', 'pre', 'figure', 'figcaption', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'main', 'article', 'summary', 'details', 'address',
+})
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+
+_SPACES = re.compile(r'[ \t\r\f\v ]+')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+_NEWLINES = re.compile(r'\n{2,}')
+_HEADING = re.compile(r'\n(#{1,6} )')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+
+class _TextExtractor(HTMLParser):
+    """Collects readable text from HTML, tracking main-content regions."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ''
+        self._skip: list[str] = []  # Open elements whose content is dropped
+        self._open: list[str] = []  # Non-void elements, to match skip/main ends
+        self._main_depth = 0
+        self._pre_depth = 0
+        self._in_title = False
+        self._link: Optional[str] = None
+        self._link_text: list[str] = []
+        self._row: Optional[list[str]] = None
+        self._cell: Optional[list[str]] = None
+        self.all_parts: list[str] = []
+        self.main_parts: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'title' and not self._skip_content():
+            self._in_title = True
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+        if self._skip or tag in SKIP_TAGS or _hidden(attrs) or (
+                tag == 'header' and not self._main_depth):
+            if tag not in VOID_TAGS:
+                self._skip.append(tag)
+            return
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+        if tag in BLOCK_TAGS:
+            self._emit('\n')
+        if tag == 'pre':
+            self._pre_depth += 1
+        elif tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            self._emit('#' * int(tag[1]) + ' ')
+        elif tag == 'li':
+            self._emit('- ')
+        elif tag == 'tr':
+            self._row = []
+        elif tag in ('td', 'th'):
+            self._cell = []
+        elif tag == 'a':
+            self._link, self._link_text = _link_target(attrs.get('href'), self.base_url), []
+        elif tag == 'img' and attrs.get('alt'):
+            self._emit(f"[{attrs['alt'].strip()}]")
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag == 'title':
+            self._in_title = False
+        # Close up to the matching open element (browsers tolerate missing end tags)
+        if tag not in self._open:
+            return
+        while self._open:
+            closed = self._open.pop()
+            if self._skip and self._skip[-1] == closed:
+                self._skip.pop()
+                if closed == tag:
+                    return
+                continue
+            self._close(closed)
+            if closed == tag:
+                return
+
+    def _close(self, tag: str):
+        if tag in MAIN_TAGS:
+            self._main_depth -= 1
+        if tag == 'pre':
+            self._pre_depth -= 1
+        elif tag == 'a' and self._link is not None:
+            text = _collapse(''.join(self._link_text)).strip()
+            link, self._link = self._link, None
+            if text and link and link != text:
+                self._emit(f' ({link})')
+        elif tag in ('td', 'th') and self._cell is not None and self._row is not None:
+            self._row.append(_collapse(''.join(self._cell).replace('\n', ' ')).strip())
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            row, self._row = self._row, None
+            if any(row):
+                self._emit(' | '.join(row))
+        if tag in BLOCK_TAGS:
+            self._emit('\n')
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip or (self._row is not None and self._cell is None):
+            return  # Dropped, or stray whitespace between table cells
+        if not self._pre_depth:
+            data = _collapse(data.replace('\n', ' '))
+            if not self.all_parts or self.all_parts[-1].endswith('\n'):
+                data = data.lstrip()
+        if self._link is not None:
+            self._link_text.append(data)
+        if self._cell is not None:
+            self._cell.append(data)
+        else:
+            self._emit(data)
+
+    def _emit(self, text: str):
+        if self._cell is not None:
+            self._cell.append(text)
+            return
+        self.all_parts.append(text)
+        if self._main_depth:
+            self.main_parts.append(text)
+
+    def _skip_content(self) -> bool:
+        return bool(self._skip) and self._skip != ['head']
+
+    def text(self) -> str:
+        # Prefer <main>/<article>, unless they hold only a sliver of the page
+        main, everything = ''.join(self.main_parts), ''.join(self.all_parts)
+        body = _tidy(main if len(main.strip()) >= min(500, len(everything.strip()) * 0.3) and main.strip()
+                     else everything)
+        # One line per block; a blank line only before headings
+        body = _HEADING.sub(r'\n\n\1', _NEWLINES.sub('\n', body))
+        title = _collapse(self.title).strip()
+        if title and not body.startswith(f'# {title}'):
+            return f"Title: {title}\n\n{body}" if body else f"Title: {title}"
+        return body
+
+
+def extract_html(text: str, base_url: str = '') -> str:
+    """Readable main text of an HTML document."""
+    parser = _TextExtractor(base_url)
+    try:
+        parser.feed(text)
+        parser.close()
+    except Exception:
+        pass  # Keep whatever was parsed from malformed markup
+    return parser.text()
+
+
+def extract_json(text: str, base_url: str = '') -> str:
+    """JSON re-serialised without indentation (unchanged if it doesn't parse)."""
+    try:
+        return json.dumps(json.loads(text), ensure_ascii=False, separators=(',', ':'))
+    except ValueError:
+        return extract_plain(text)
+
+
+def extract_plain(text: str, base_url: str = '') -> str:
+    """Text with trailing spaces and runs of blank lines collapsed."""
+    return _tidy(text)
+
+
+HANDLERS: dict[str, Optional[Handler]] = {
+    'text/html': extract_html,
+    'application/xhtml+xml': extract_html,
+    'application/xml': extract_html,
+    'text/xml': extract_html,
+    'application/rss+xml': extract_html,
+    'application/atom+xml': extract_html,
+    'application/json': extract_json,
+    'application/ld+json': extract_json,
+    'text/*': extract_plain,
+    'application/javascript': extract_plain,
+    'application/x-yaml': extract_plain,
+    'application/yaml': extract_plain,
+    '*/*': None,  # Binary: omitted
+}
+
+
+def register_handler(media_type: str, handler: Optional[Handler]):
+    """Add or replace the handler for a media type (``None`` omits the content)."""
+    HANDLERS[media_type.lower()] = handler
+
+
+def extract_text(body: bytes, content_type: Optional[str], base_url: str = '') -> str:
+    """
+    Convert a response body to compact text using its media type's handler.
+
+    Args:
+        body: Raw (possibly truncated) body bytes
+        content_type: The ``Content-Type`` header, if any
+        base_url: URL of the document, for resolving relative links
+
+    Returns:
+        Extracted text, or a note for content that isn't text
+    """
+    media_type, charset = _parse_content_type(content_type)
+    if not media_type:
+        media_type = _sniff(body)
+    handler = HANDLERS.get(media_type, HANDLERS.get(media_type.split('/')[0] + '/*', HANDLERS.get('*/*')))
+    if handler is None:
+        return f"[{media_type} content omitted ({len(body)} bytes)]"
+    if not charset and handler is extract_html:
+        match = _META_CHARSET.search(body[:4096])
+        charset = match.group(1).decode('ascii', 'ignore') if match else None
+    try:
+        text = body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        text = body.decode('utf-8', errors='replace')
+    return handler(text, base_url)
+
+
+def _parse_content_type(value: Optional[str]) -> tuple[str, Optional[str]]:
+    """(media type, charset) of a Content-Type header."""
+    if not value:
+        return '', None
+    media_type, _, params = value.partition(';')
+    charset = None
+    for param in params.split(';'):
+        key, _, val = param.partition('=')
+        if key.strip().lower() == 'charset':
+            charset = val.strip().strip('"\'') or None
+    return media_type.strip().lower(), charset
+
+
+def _sniff(body: bytes) -> str:
+    """Guess a media type for a body served without Content-Type."""
+    head = body[:512].lstrip().lower()
+    if head.startswith((b'<!doctype html', b'<html')) or b'<body' in head:
+        return 'text/html'
+    if head.startswith((b'{', b'[')):
+        return 'application/json'
+    if b'\x00' in body[:1024]:
+        return 'application/octet-stream'
+    return 'text/plain'
+
+
+def _hidden(attrs: dict) -> bool:
+    if 'hidden' in attrs or attrs.get('aria-hidden') == 'true':
+        return True
+    if (attrs.get('role') or '').lower() in SKIP_ROLES:
+        return True
+    style = (attrs.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+
+def _link_target(href: Optional[str], base_url: str) -> Optional[str]:
+    """Absolute http(s) URL of a link, or None for anchors, scripts and mailto."""
+    if not href or href.startswith('#'):
+        return None
+    url = urljoin(base_url, href.strip())
+    return url if urlsplit(url).scheme in ('http', 'https') else None
+
+
+def _collapse(text: str) -> str:
+    return _SPACES.sub(' ', text)
+
+
+def _tidy(text: str) -> str:
+    """Strip line ends and squeeze runs of blank lines."""
+    lines = [line.rstrip() for line in text.split('\n')]
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip('\n')
@@ -0,0 +1,154 @@
+"""
+Context Budget - Fits a task's attached documents into one token budget.
+
+Cutting each document at a fixed length keeps its beginning and drops the
+rest, wherever the part relevant to the task happens to be. Instead, when
+the attachments together exceed the budget, every document is split into
+paragraph-aligned chunks, the chunks are ranked against the task text with
+BM25 (over all attachments' chunks as the corpus, same tokenizer as the
+agent router), and the best chunks are packed into the budget:
+
+- each document's first chunk (title, summary) is taken first, as long as
+  the leads fit in a quarter of the budget
+- then chunks in descending relevance; a chunk that doesn't fit is skipped
+  for smaller ones further down
+- without any matching terms the order falls back to document position, so
+  this degrades to keeping the beginnings
+
+Kept chunks stay in their original order, with a marker where text was
+left out. Tokens are estimated at CHARS_PER_TOKEN characters each.
+"""
+import math
+import re
+from collections import Counter
+
+from app.services.agent_router import B, K1, tokenize
+
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+class ContextBudget:
+    """
+    Relevance-ranked packing of documents into a token budget.
+
+    Args:
+        max_tokens: Budget for all documents together (estimated tokens)
+        chunk_chars: Target chunk size when a document must be reduced
+        document_chars: Hard cap on the characters read from any one file
+            before budgeting
+    """
+
+    def __init__(self, max_tokens: int = 30000, chunk_chars: int = 2000,
+                 document_chars: int = 1_000_000):
+        self.max_tokens = max_tokens
+        self.chunk_chars = max(200, chunk_chars)
+        self.document_chars = document_chars
+
+    def fit(self, task: str, documents: list[str]) -> list[str]:
+        """
+        Reduce documents so that together they fit ``max_tokens``.
+
+        Args:
+            task: Task text the documents are ranked against
+            documents: Document texts
+
+        Returns:
+            The documents in the same order: unchanged if everything fits,
+            otherwise only their selected chunks with omission markers
+        """
+        budget = self.max_tokens * CHARS_PER_TOKEN
+        if sum(len(text) for text in documents) <= budget:
+            return list(documents)
+
+        chunks = [self._split(text) for text in documents]
+        flat = [(doc, index, chunk) for doc, doc_chunks in enumerate(chunks)
+                for index, chunk in enumerate(doc_chunks)]
+        scores = _bm25_scores(tokenize(task), [chunk for _, _, chunk in flat])
+
+        selected: set[tuple[int, int]] = set()
+        used = 0
+        lead_budget = budget // 4
+        for doc, doc_chunks in enumerate(chunks):
+            if doc_chunks and used + len(doc_chunks[0]) <= lead_budget:
+                selected.add((doc, 0))
+                used += len(doc_chunks[0])
+        # Highest score first; ties (e.g. no matching terms) in document order
+        ranked = sorted(range(len(flat)), key=lambda i: (-scores[i], flat[i][1], flat[i][0]))
+        for i in ranked:
+            doc, index, chunk = flat[i]
+            if (doc, index) in selected or used + len(chunk) > budget:
+                continue
+            selected.add((doc, index))
+            used += len(chunk)
+
+        return [_assemble(doc_chunks, {index for d, index in selected if d == doc})
+                for doc, doc_chunks in enumerate(chunks)]
+
+    def _split(self, text: str) -> list[str]:
+        """Paragraph-aligned chunks of about ``chunk_chars`` characters."""
+        chunks, current = [], ''
+        for paragraph in _PARAGRAPH_BREAK.split(text):
+            while len(paragraph) > self.chunk_chars:
+                # Oversized paragraph: cut at the last line break or space before the limit
+                cut = max(paragraph.rfind('\n', 0, self.chunk_chars), paragraph.rfind(' ', 0, self.chunk_chars))
+                cut = cut if cut > self.chunk_chars // 2 else self.chunk_chars
+                if current:
+                    chunks.append(current)
+                    current = ''
+                chunks.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            if current and len(current) + len(paragraph) + 2 > self.chunk_chars:
+                chunks.append(current)
+                current = ''
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(current)
+        return chunks
+
+
+def _bm25_scores(query: list[str], chunks: list[str]) -> list[float]:
+    """BM25 score of every chunk for the query terms."""
+    terms = set(query)
+    if not terms or not chunks:
+        return [0.0] * len(chunks)
+    counts, lengths = [], []
+    df: Counter = Counter()
+    for chunk in chunks:
+        tokens = tokenize(chunk)
+        lengths.append(len(tokens))
+        matched = Counter(token for token in tokens if token in terms)
+        counts.append(matched)
+        df.update(matched.keys())
+    n = len(chunks)
+    avg_len = (sum(lengths) / n) or 1.0
+    idf = {term: math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5)) for term in df}
+    query_counts = Counter(query)
+    scores = []
+    for matched, length in zip(counts, lengths):
+        norm = K1 * (1 - B + B * length / avg_len)
+        scores.append(sum(idf[term] * query_counts[term] * tf * (K1 + 1) / (tf + norm)
+                          for term, tf in matched.items()))
+    return scores
+
+
+def _assemble(chunks: list[str], keep: set[int]) -> str:
+    """Kept chunks in order, with a marker for each run of omitted ones."""
+    if len(keep) == len(chunks):
+        return '\n\n'.join(chunks)
+    total = sum(len(chunk) for chunk in chunks)
+    if not keep:
+        return f"[Omitted - {total} chars, less relevant to the task than other context]"
+    parts, omitted = [], 0
+    for index, chunk in enumerate(chunks):
+        if index in keep:
+            if omitted:
+                parts.append(f"[... {omitted} chars omitted ...]")
+                omitted = 0
+            parts.append(chunk)
+        else:
+            omitted += len(chunk)
+    if omitted:
+        parts.append(f"[... {omitted} chars omitted ...]")
+    return '\n\n'.join(parts)
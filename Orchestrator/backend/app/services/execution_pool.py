@@ -0,0 +1,241 @@
+"""
+Execution Pool - Bounded worker pool draining the durable execution queue.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Optional
+
+from app.models.execution_output import OutputCapture
+from app.models.execution import finish_execution
+from app.models.job_queue import ExecutionJob, JobQueue, QueueFullError
+from app.models.write_behind import get_writer
+
+if TYPE_CHECKING:
+    from app.services.claude_executor import ClaudeExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPool:
+    """
+    Runs queued executions on a fixed number of worker threads.
+
+    Work is persisted in the ``execution_jobs`` table, so any process sharing
+    the database can pick it up. Each worker claims one job at a time under a
+    lease; a heartbeat thread renews the leases of local runs and re-dispatches
+    jobs whose lease expired because their worker went away.
+    """
+
+    def __init__(self, db_path: str, executor_factory: Callable[[], 'ClaudeExecutor'],
+                 max_workers: int = 3, max_queue: int = 50,
+                 lease_seconds: float = 60, poll_interval: float = 1.0,
+                 max_attempts: int = 2, output_flush_bytes: int = 16384,
+                 output_flush_seconds: float = 0.5, cli_name: str = 'claude'):
+        self.db_path = db_path
+        self.executor_factory = executor_factory
+        self.max_workers = max(1, max_workers)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.output_flush_bytes = output_flush_bytes
+        self.output_flush_seconds = output_flush_seconds
+        self.queue = JobQueue(db_path, max_queue=max(0, max_queue), max_attempts=max_attempts,
+                              cli_name=cli_name)
+        self._cond = threading.Condition()
+        self._running: dict[str, tuple[str, ExecutionJob]] = {}  # execution_id -> (worker_id, job)
+        self._workers: list[threading.Thread] = []
+        self._heartbeat: Optional[threading.Thread] = None
+        self._recent_waits: deque[float] = deque(maxlen=100)
+        self._completed = 0
+        self._rejected = 0
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def max_queue(self) -> int:
+        return self.queue.max_queue
+
+    def start(self):
+        """Start worker and heartbeat threads, recovering work left by a previous process."""
+        with self._cond:
+            if self._heartbeat and self._heartbeat.is_alive():
+                return
+            self.queue.requeue_expired()
+            self.queue.fail_orphans()
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(f"{self._worker_prefix}:{i}",),
+                    name=f"execution-worker-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            self._heartbeat = threading.Thread(
+                target=self._heartbeat_loop, name='execution-heartbeat', daemon=True
+            )
+            self._heartbeat.start()
+
+    def submit(self, execution_id: str, agent_folder: str, task: str,
+               context: Optional[str] = None) -> int:
+        """
+        Queue an execution.
+
+        Returns:
+            The job's position in the pending queue (0 = next to start)
+
+        Raises:
+            QueueFullError: If the pending queue is at capacity
+        """
+        try:
+            position = self.queue.enqueue(execution_id, agent_folder, task, context)
+        except QueueFullError:
+            with self._cond:
+                self._rejected += 1
+            raise
+        self.start()
+        with self._cond:
+            self._cond.notify()
+        return position
+
+    def cancel(self, execution_id: str) -> bool:
+        """Remove a job from the pending queue. Returns True if it was queued."""
+        return self.queue.cancel(execution_id)
+
+    def position(self, execution_id: str) -> Optional[int]:
+        """Get a job's position in the pending queue, or None if not queued."""
+        return self.queue.position(execution_id)
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth (all processes) and this process's workers."""
+        queue_stats = self.queue.stats()
+        with self._cond:
+            waits = list(self._recent_waits)
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'lease_seconds': self.lease_seconds,
+                **queue_stats,
+                'local_running': len(self._running),
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'avg_wait_seconds': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'max_wait_seconds': round(max(waits), 3) if waits else 0.0,
+            }
+
+    def _worker_loop(self, worker_id: str):
+        """Claim jobs from the queue and run them one at a time."""
+        while True:
+            try:
+                job = self.queue.claim(worker_id, self.lease_seconds, max_in_flight=self.max_workers)
+            except Exception:
+                job = None  # Database busy or unavailable - retry after the poll interval
+
+            if job is None:
+                with self._cond:
+                    self._cond.wait(self.poll_interval)
+                continue
+
+            with self._cond:
+                self._running[job.execution_id] = (worker_id, job)
+                self._recent_waits.append(max(0.0, time.time() - job.enqueued_at))
+            try:
+                self._run_job(job)
+            except Exception:
+                # Job callbacks report their own failures; keep the worker alive
+                pass
+            finally:
+                self.queue.complete(job.execution_id, worker_id)
+                with self._cond:
+                    self._running.pop(job.execution_id, None)
+                    self._completed += 1
+                    self._cond.notify()
+
+    def _heartbeat_loop(self):
+        """Renew leases on local runs and re-dispatch expired ones."""
+        interval = max(1.0, self.lease_seconds / 3)
+        delay = interval
+        while True:
+            time.sleep(delay)
+            with self._cond:
+                held: dict[str, list[str]] = {}
+                for execution_id, (worker_id, _) in self._running.items():
+                    held.setdefault(worker_id, []).append(execution_id)
+            delay = interval
+            for worker_id, execution_ids in held.items():
+                try:
+                    renewed = self.queue.renew(execution_ids, worker_id, self.lease_seconds)
+                except Exception:
+                    # Retry soon: other processes leave a live holder's runs alone
+                    # only for a while after its lease runs out
+                    logger.warning('Lease renewal failed for %s', ', '.join(execution_ids), exc_info=True)
+                    delay = 1.0
+                    continue
+                if renewed < len(execution_ids):
+                    logger.warning('Worker %s lost the lease on %d of its executions',
+                                   worker_id, len(execution_ids) - renewed)
+            try:
+                result = self.queue.requeue_expired()
+            except Exception:
+                logger.warning('Re-dispatching expired jobs failed', exc_info=True)
+                continue
+            for execution_id in result['requeued']:
+                logger.warning('Execution %s re-queued after its worker went away', execution_id)
+            for execution_id in result['failed']:
+                logger.warning('Execution %s failed after its worker went away', execution_id)
+            if result['requeued']:
+                with self._cond:
+                    self._cond.notify_all()
+
+    def _run_job(self, job: ExecutionJob):
+        """Run a claimed job, recording progress on its execution row."""
+        db_path = self.db_path
+        execution_id = job.execution_id
+
+        writer = get_writer(db_path)
+
+        started = writer.run(lambda conn: conn.execute('''
+            UPDATE executions SET status = 'running', started_at = ?
+            WHERE id = ? AND status = 'queued'
+        ''', (datetime.utcnow().isoformat(), execution_id)).rowcount == 1)
+        if not started:
+            return  # Cancelled (or deleted) while queued
+
+        def on_pid(pid: int):
+            """Callback when process starts - saves PID for status checking (batched)."""
+            writer.set_fields(execution_id, pid=pid)
+
+        def on_complete(result):
+            """Callback when execution finishes."""
+            if result.success:
+                status, fields = 'success', {'output': result.output}
+            else:
+                status = 'timeout' if result.return_code == -2 else 'failed'
+                fields = {'error': result.error or 'Unknown error'}
+            # No-op if the run was already finished (e.g. killed by the user). Not
+            # awaited: the job's removal is queued behind it and waited for instead.
+            writer.submit(lambda conn: finish_execution(
+                conn, execution_id, status, from_statuses=('running',), **fields
+            ))
+
+        context = json.loads(job.context) if job.context else None
+        executor = self.executor_factory()
+
+        # Output is appended in segments as it arrives, flushed before on_complete runs
+        capture = OutputCapture(db_path, execution_id,
+                                flush_bytes=self.output_flush_bytes,
+                                flush_interval=self.output_flush_seconds)
+
+        def on_complete_flushed(result):
+            capture.close()
+            on_complete(result)
+
+        try:
+            executor.run_execution(job.agent_folder, job.task, on_complete_flushed, on_pid,
+                                   context=context, on_output=capture.write)
+        finally:
+            capture.close()
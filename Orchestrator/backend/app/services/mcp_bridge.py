@@ -0,0 +1,57 @@
+"""
+MCP Bridge - Connects a CLI's stdio MCP transport to a pooled server.
+
+Started by the Claude CLI in place of the real MCP server (see mcp_pool):
+copies stdin to the pool's Unix socket and the socket to stdout until
+either side closes. Standard library only, so it starts in milliseconds.
+
+Usage: python mcp_bridge.py <socket path>
+"""
+import os
+import socket
+import sys
+import threading
+
+
+def _pump_stdin(sock: socket.socket):
+    try:
+        while True:
+            chunk = os.read(0, 65536)
+            if not chunk:
+                break
+            sock.sendall(chunk)
+    except OSError:
+        pass
+    finally:
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+def main() -> int:
+    if len(sys.argv) != 2:
+        sys.stderr.write('usage: mcp_bridge.py <socket path>\n')
+        return 2
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(sys.argv[1])
+    except OSError as e:
+        sys.stderr.write(f'mcp_bridge: cannot connect to {sys.argv[1]}: {e}\n')
+        return 1
+
+    threading.Thread(target=_pump_stdin, args=(sock,), daemon=True).start()
+    try:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            os.write(1, chunk)
+    except OSError:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
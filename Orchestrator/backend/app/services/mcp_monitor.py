@@ -0,0 +1,227 @@
+"""
+MCP Health Monitor - Periodically probes every configured MCP server.
+
+A background thread runs the MCP handshake (see mcp_probe) against each
+server about once per ``interval`` - jittered so servers are not all spawned
+at the same moment - with at most ``max_concurrent`` probes in flight. The
+latest result per server is cached, so listings, the health endpoint and
+execution admission read it without spawning anything.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from app.services.mcp_probe import probe_mcp_server, server_signature
+
+# How often the server list is re-read for added, changed or removed servers
+LIST_REFRESH_SECONDS = 5.0
+
+
+class MCPHealthMonitor:
+    """
+    Background prober of MCP servers with cached results.
+
+    Args:
+        list_servers: Returns the current servers (name -> config with
+            ``command``, ``args``, ``env``)
+        interval: Average time between probes of one server (seconds)
+        jitter: Each interval is randomised by up to this fraction
+        max_concurrent: Most probes running at once
+        timeout: Per-probe limit (seconds)
+        failure_threshold: Consecutive failed probes before a server is
+            reported unhealthy (a single failure marks it degraded)
+    """
+
+    def __init__(self, list_servers: Callable[[], dict], interval: float = 300,
+                 jitter: float = 0.2, max_concurrent: int = 2, timeout: float = 15,
+                 failure_threshold: int = 2):
+        self.list_servers = list_servers
+        self.interval = max(1.0, interval)
+        self.jitter = min(max(jitter, 0.0), 0.9)
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self._cond = threading.Condition()
+        self._servers: dict[str, str] = {}  # name -> config signature
+        self._configs: dict[str, dict] = {}
+        self._due: dict[str, float] = {}  # name -> monotonic time of next probe
+        self._in_flight: set[str] = set()
+        self._results: dict[str, dict] = {}
+        self._listed_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = os.getpid()
+        self._stopped = False
+        self.probes = 0
+
+    def start(self):
+        """Start the monitor thread (again, after a fork)."""
+        with self._cond:
+            if self._pid != os.getpid():
+                # Forked: the parent's threads do not exist in this process
+                self._pid, self._thread, self._executor = os.getpid(), None, None
+                self._in_flight.clear()
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                thread_name_prefix='mcp-probe')
+            self._thread = threading.Thread(target=self._monitor_loop, name='mcp-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop scheduling probes (running probes finish in the background)."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            executor = self._executor
+        if executor:
+            executor.shutdown(wait=False)
+
+    @property
+    def running(self) -> bool:
+        """Whether this process is probing, so cached results are current."""
+        with self._cond:
+            return self._is_running()
+
+    def check_now(self, names: Optional[Iterable[str]] = None):
+        """Probe servers (default: all) as soon as a slot is free."""
+        with self._cond:
+            now = time.monotonic()
+            for name in (self._due if names is None else names):
+                if name in self._due:
+                    self._due[name] = now
+            self._listed_at = None
+            self._cond.notify_all()
+
+    def status(self, name: str) -> Optional[dict]:
+        """Latest health of a server, or None if it has not been probed yet."""
+        with self._cond:
+            result = self._results.get(name)
+            return dict(result) if result else None
+
+    def statuses(self) -> dict[str, dict]:
+        """Latest health of every probed server."""
+        with self._cond:
+            return {name: dict(result) for name, result in self._results.items()}
+
+    def unavailable(self, server_names: Iterable[str]) -> list[str]:
+        """Which of ``server_names`` are currently known to be unhealthy."""
+        with self._cond:
+            return [name for name in server_names
+                    if self._results.get(name, {}).get('status') == 'unhealthy']
+
+    def stats(self) -> dict:
+        """Summary counts for health reporting."""
+        with self._cond:
+            counts = {'healthy': 0, 'degraded': 0, 'unhealthy': 0}
+            for result in self._results.values():
+                counts[result['status']] += 1
+            return {
+                'servers': len(self._servers),
+                **counts,
+                'unknown': len(self._servers) - sum(counts.values()),
+                'in_flight': len(self._in_flight),
+                'probes': self.probes,
+                'interval_seconds': self.interval,
+                'running': self._is_running(),
+            }
+
+    def _is_running(self) -> bool:
+        """Caller holds the lock. False in a forked child until start() is called there."""
+        return (self._pid == os.getpid() and bool(self._thread and self._thread.is_alive())
+                and not self._stopped)
+
+    def _monitor_loop(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                refresh = self._listed_at is None or now - self._listed_at >= LIST_REFRESH_SECONDS
+            if refresh:
+                self._refresh_servers()
+
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                free = self.max_concurrent - len(self._in_flight)
+                due = sorted((when, name) for name, when in self._due.items()
+                             if when <= now and name not in self._in_flight)
+                for _, name in due[:max(0, free)]:
+                    self._in_flight.add(name)
+                    self._executor.submit(self._probe, name, self._configs[name], self._servers[name])
+                    free -= 1
+
+                # With every slot busy, sleep until a probe finishes (it notifies)
+                upcoming = [when for name, when in self._due.items()
+                            if name not in self._in_flight] if free > 0 else []
+                wake = min([*upcoming, now + LIST_REFRESH_SECONDS])
+                self._cond.wait(max(0.05, wake - now))
+
+    def _refresh_servers(self):
+        """Pick up added, changed and removed servers."""
+        try:
+            servers = self.list_servers()
+        except Exception:
+            servers = None  # Keep the previous list
+
+        with self._cond:
+            self._listed_at = time.monotonic()
+            if servers is None:
+                return
+            now = time.monotonic()
+            for name in list(self._servers):
+                if name not in servers:
+                    for table in (self._servers, self._configs, self._due, self._results):
+                        table.pop(name, None)
+            for name, config in servers.items():
+                signature = server_signature(config)
+                if self._servers.get(name) == signature:
+                    continue
+                # New or reconfigured: probe soon, staggered so a restart doesn't spawn them all at once
+                self._servers[name] = signature
+                self._configs[name] = config
+                self._results.pop(name, None)
+                self._due[name] = now + random.uniform(0, self.jitter * min(self.interval, 30))
+
+    def _probe(self, name: str, config: dict, signature: str):
+        """Probe one server and record the result (runs on the probe pool)."""
+        try:
+            result = probe_mcp_server(config.get('command', ''), config.get('args', []),
+                                      config.get('env', {}), timeout=self.timeout)
+        except Exception as e:
+            result = None
+            message = str(e)
+        with self._cond:
+            self._in_flight.discard(name)
+            self.probes += 1
+            if self._servers.get(name) != signature:
+                self._cond.notify_all()
+                return  # Reconfigured or removed while probing
+            previous = self._results.get(name) or {}
+            success = bool(result and result.success)
+            failures = 0 if success else previous.get('consecutive_failures', 0) + 1
+            if success:
+                status = 'healthy'
+            else:
+                status = 'unhealthy' if failures >= self.failure_threshold else 'degraded'
+            self._results[name] = {
+                'status': status,
+                'message': result.message if result else message,
+                'latency_ms': result.latency_ms if result else None,
+                'tool_count': result.tool_count if result else None,
+                'checked_at': datetime.now().isoformat(),
+                'consecutive_failures': failures,
+                'last_success_at': datetime.now().isoformat() if success else previous.get('last_success_at'),
+            }
+            # Failing servers are re-checked sooner, so recovery is noticed
+            base = self.interval if success else min(self.interval, 60 * failures)
+            self._due[name] = time.monotonic() + base * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._cond.notify_all()
+
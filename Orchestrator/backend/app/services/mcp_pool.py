@@ -0,0 +1,507 @@
+"""
+MCP Pool - Long-lived MCP server processes shared across executions.
+
+Normally every execution's CLI starts each MCP server it needs and stops it
+at exit, so short tasks spend most of their time on server startup. With
+the pool, the CLI is instead given a tiny stdio bridge (mcp_bridge.py) per
+server, which connects to a Unix socket owned by the orchestrator. Behind
+the socket one warm server process per configured server is multiplexed
+across all connected CLIs:
+
+- the server is started and initialized once; each client's ``initialize``
+  is answered from the cached handshake
+- request ids are rewritten per client so responses reach their sender, and
+  at most ``max_concurrency`` requests per server are in flight at once
+- notifications from the server go to every client; requests from the
+  server (other than ping) are declined, as no single client owns them
+
+A request waiting longer than ``request_timeout`` for a free slot is
+answered with a JSON-RPC error, so one hung server can't stall its clients
+indefinitely. The tail of a server's stderr is logged when it fails to start
+or exits on its own.
+
+A server with no clients for ``idle_seconds`` is stopped, and started again
+on next use. Because servers are shared, this suits stateless servers
+(mail, drive, docs); it is opt-in for that reason.
+"""
+import atexit
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from app.services.mcp_probe import CLIENT_INFO, PROTOCOL_VERSION, server_signature
+
+BRIDGE_SCRIPT = Path(__file__).with_name('mcp_bridge.py')
+STDERR_TAIL_LINES = 20
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error codes
+METHOD_NOT_FOUND = -32601
+SERVER_ERROR = -32000
+
+
+class PoolError(Exception):
+    """A pooled server could not be started."""
+
+
+class _Client:
+    """One connected CLI (bridge) session."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self._send_lock = threading.Lock()
+
+    def send(self, message: dict):
+        data = json.dumps(message).encode() + b'\n'
+        with self._send_lock:
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                pass  # Client went away; its reader thread cleans up
+
+    def close(self):
+        try:
+            self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _WarmServer:
+    """One long-lived MCP server process multiplexed across clients."""
+
+    def __init__(self, name: str, config: dict, max_concurrency: int, startup_timeout: float,
+                 request_timeout: float = 60):
+        self.name = name
+        self.config = config
+        self.signature = server_signature(config)
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._init_result: Optional[dict] = None
+        self._clients: set[_Client] = set()
+        self._pending: dict[int, tuple[_Client, Any]] = {}  # proxy id -> (client, client's id)
+        self._next_id = 0
+        self._stale = False
+        self.last_used = time.monotonic()
+        self.spawns = 0
+        self.requests = 0
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def reconfigure(self, config: dict):
+        """Use a new config from the next (re)start; restart now if idle."""
+        with self._lock:
+            self.config = config
+            self.signature = server_signature(config)
+            self._stale = True
+            if not self._clients:
+                self.stop()
+
+    def attach(self, client: _Client):
+        """Start the server if needed and register a client."""
+        with self._lock:
+            if self._stale and not self._clients:
+                self.stop()
+            if not self.running or self._init_result is None:
+                self._start()
+            self._clients.add(client)
+            self.last_used = time.monotonic()
+
+    def detach(self, client: _Client):
+        with self._lock:
+            self._clients.discard(client)
+            self.last_used = time.monotonic()
+            if self._stale and not self._clients:
+                self.stop()
+
+    def from_client(self, client: _Client, message: dict):
+        """Handle one message from a client."""
+        method = message.get('method')
+        if method == 'initialize' and 'id' in message:
+            client.send({'jsonrpc': '2.0', 'id': message['id'], 'result': self._init_result})
+        elif method == 'notifications/initialized':
+            return  # The server was initialized once, by the pool
+        elif method == 'ping' and 'id' in message:
+            client.send({'jsonrpc': '2.0', 'id': message['id'], 'result': {}})
+        elif method and 'id' in message:
+            if not self.slots.acquire(timeout=self.request_timeout):  # Per-server concurrency limit
+                client.send({'jsonrpc': '2.0', 'id': message['id'], 'error': {
+                    'code': SERVER_ERROR,
+                    'message': f"MCP server '{self.name}' is busy: no request finished "
+                               f"within {self.request_timeout:g}s"}})
+                return
+            with self._lock:
+                self._next_id += 1
+                proxy_id = self._next_id
+                self._pending[proxy_id] = (client, message['id'])
+                self.requests += 1
+                self.last_used = time.monotonic()
+            if not self._send({**message, 'id': proxy_id}):
+                self._resolve(proxy_id, error='MCP server is not running')
+        elif method == 'notifications/cancelled':
+            params = message.get('params') or {}
+            with self._lock:
+                proxy_id = next((pid for pid, (c, cid) in self._pending.items()
+                                 if c is client and cid == params.get('requestId')), None)
+            if proxy_id is not None:
+                self._send({**message, 'params': {**params, 'requestId': proxy_id}})
+        elif method:
+            self._send(message)  # Other client notifications
+        # Responses to server-initiated requests are never expected: those are declined
+
+    def stop(self):
+        """Stop the process, failing requests in flight."""
+        with self._lock:
+            proc, self._proc = self._proc, None
+            self._init_result = None
+            self._stale = False
+        if proc:
+            _terminate(proc)
+        self._fail_pending('MCP server stopped')
+
+    def _start(self):
+        """Spawn and initialize the server. Caller holds the lock."""
+        command = self.config.get('command', '')
+        try:
+            proc = subprocess.Popen(
+                [command, *(self.config.get('args') or [])],
+                env={**os.environ, **(self.config.get('env') or {})},
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise PoolError(f"Cannot start MCP server '{self.name}': {e}")
+
+        # Keep the last stderr lines for diagnosing failures (and never let the pipe fill)
+        stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        drain = threading.Thread(target=_drain, args=(proc.stderr, stderr_tail),
+                                 name=f'mcp-pool-stderr-{self.name}', daemon=True)
+        drain.start()
+
+        # Bound the handshake: kill the server if it doesn't answer in time
+        timer = threading.Timer(self.startup_timeout, _terminate, args=(proc,))
+        timer.daemon = True
+        timer.start()
+        try:
+            proc.stdin.write(json.dumps({
+                'jsonrpc': '2.0', 'id': 0, 'method': 'initialize',
+                'params': {'protocolVersion': PROTOCOL_VERSION, 'capabilities': {},
+                           'clientInfo': CLIENT_INFO},
+            }).encode() + b'\n')
+            proc.stdin.flush()
+            result = None
+            for line in proc.stdout:
+                message = _parse(line)
+                if message and message.get('id') == 0 and 'method' not in message:
+                    result = message.get('result')
+                    break
+            if result is None:
+                raise PoolError(f"MCP server '{self.name}' did not complete initialize")
+            proc.stdin.write(b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n')
+            proc.stdin.flush()
+        except (OSError, PoolError) as e:
+            _terminate(proc)
+            drain.join(timeout=1)
+            raise PoolError(f"{e}{_format_tail(stderr_tail)}")
+        finally:
+            timer.cancel()
+
+        self._proc, self._init_result, self._stale = proc, result, False
+        self.spawns += 1
+        threading.Thread(target=self._read_server, args=(proc, drain, stderr_tail),
+                         name=f'mcp-pool-{self.name}', daemon=True).start()
+
+    def _read_server(self, proc: subprocess.Popen, drain: threading.Thread, stderr_tail: deque):
+        """Route the server's output to clients until it exits."""
+        for line in proc.stdout:
+            message = _parse(line)
+            if not message:
+                continue
+            if 'id' in message and 'method' not in message:
+                self._resolve(message['id'], message=message)
+            elif 'id' in message:
+                # Server-to-client request: no single client owns the session
+                if message.get('method') == 'ping':
+                    self._send({'jsonrpc': '2.0', 'id': message['id'], 'result': {}}, proc)
+                else:
+                    self._send({'jsonrpc': '2.0', 'id': message['id'], 'error': {
+                        'code': METHOD_NOT_FOUND, 'message': 'Not supported through the MCP pool'}}, proc)
+            else:
+                with self._lock:
+                    clients = list(self._clients)
+                for client in clients:
+                    client.send(message)
+
+        # The server exited: fail what it was doing and disconnect its clients
+        with self._lock:
+            unexpected = self._proc is proc  # Not stopped by the pool
+            if unexpected:
+                self._proc, self._init_result = None, None
+            clients, self._clients = list(self._clients), set()
+        self._fail_pending('MCP server exited')
+        for client in clients:
+            client.close()
+        if unexpected:
+            drain.join(timeout=1)
+            try:
+                code = proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                code = None
+            logger.warning("MCP server '%s' exited (code %s)%s", self.name, code, _format_tail(stderr_tail))
+
+    def _resolve(self, proxy_id: Any, message: Optional[dict] = None, error: Optional[str] = None):
+        """Deliver a response (or an error) to the client that asked."""
+        with self._lock:
+            entry = self._pending.pop(proxy_id, None)
+        if entry is None:
+            return
+        self.slots.release()
+        client, client_id = entry
+        if message is not None:
+            client.send({**message, 'id': client_id})
+        else:
+            client.send({'jsonrpc': '2.0', 'id': client_id,
+                         'error': {'code': SERVER_ERROR, 'message': error}})
+
+    def _fail_pending(self, error: str):
+        with self._lock:
+            proxy_ids = list(self._pending)
+        for proxy_id in proxy_ids:
+            self._resolve(proxy_id, error=error)
+
+    def _send(self, message: dict, proc: Optional[subprocess.Popen] = None) -> bool:
+        """Write a message to the server. Returns False if it is not running."""
+        proc = proc or self._proc
+        if proc is None:
+            return False
+        with self._write_lock:
+            try:
+                proc.stdin.write(json.dumps(message).encode() + b'\n')
+                proc.stdin.flush()
+                return True
+            except (OSError, ValueError):
+                return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'running': self.running,
+                'clients': len(self._clients),
+                'in_flight': len(self._pending),
+                'requests': self.requests,
+                'spawns': self.spawns,
+                'idle_seconds': round(time.monotonic() - self.last_used, 1),
+            }
+
+
+class MCPServerPool:
+    """
+    Warm MCP servers behind per-server Unix sockets.
+
+    Args:
+        list_servers: Returns configured servers (name -> config with
+            ``command``, ``args``, ``env``)
+        socket_dir: Directory for the sockets (default: a private temp dir)
+        idle_seconds: Stop a server after this long without clients
+        max_concurrency: Most requests in flight per server
+        startup_timeout: Limit for a server's start and initialize (seconds)
+        request_timeout: Longest a request waits for a free slot before it is
+            answered with an error (seconds)
+    """
+
+    def __init__(self, list_servers: Callable[[], dict], socket_dir: Optional[str] = None,
+                 idle_seconds: float = 600, max_concurrency: int = 4,
+                 startup_timeout: float = 30, request_timeout: float = 60):
+        self.list_servers = list_servers
+        self.socket_dir = socket_dir
+        self.idle_seconds = idle_seconds
+        self.max_concurrency = max_concurrency
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self._lock = threading.Lock()
+        self._servers: dict[str, _WarmServer] = {}
+        self._sockets: dict[str, str] = {}  # name -> socket path being served
+        self._reaper: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stopped = threading.Event()
+        atexit.register(self.shutdown)  # Servers run in their own sessions; don't orphan them
+
+    def mcp_config_arg(self, server_names: Iterable[str]) -> Optional[str]:
+        """
+        ``--mcp-config`` JSON pointing the CLI at pooled servers.
+
+        Servers that aren't configured are left out.
+
+        Returns:
+            JSON string, or None if none of the servers is configured
+        """
+        configured = self.list_servers()
+        entries = {}
+        for name in server_names:
+            if name not in configured:
+                continue
+            path = self._ensure_listener(name, configured[name])
+            entries[name] = {'command': sys.executable, 'args': [str(BRIDGE_SCRIPT), path]}
+        return json.dumps({'mcpServers': entries}) if entries else None
+
+    def stats(self) -> dict:
+        """Per-server process and client counts."""
+        with self._lock:
+            servers = dict(self._servers)
+        return {
+            'idle_seconds': self.idle_seconds,
+            'max_concurrency': self.max_concurrency,
+            'servers': {name: server.stats() for name, server in servers.items()},
+        }
+
+    def shutdown(self):
+        """Stop every server and remove the sockets."""
+        self._stopped.set()
+        with self._lock:
+            servers, sockets = list(self._servers.values()), list(self._sockets.values())
+            self._servers, self._sockets = {}, {}
+        for server in servers:
+            server.stop()
+        for path in sockets:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _ensure_listener(self, name: str, config: dict) -> str:
+        """Socket path for a server, starting its listener on first use."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: listeners and processes belong to the parent
+                self._pid, self._servers, self._sockets, self._reaper = os.getpid(), {}, {}, None
+            server = self._servers.get(name)
+            if server is not None:
+                if server.signature != server_signature(config):
+                    server.reconfigure(config)
+                return self._sockets[name]
+
+            if self.socket_dir is None:
+                self.socket_dir = tempfile.mkdtemp(prefix='orchestrator-mcp-')  # Mode 0700
+            os.makedirs(self.socket_dir, mode=0o700, exist_ok=True)
+            path = os.path.join(self.socket_dir, f"{os.getpid()}-{sha1(name.encode()).hexdigest()[:12]}.sock")
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(path)
+            os.chmod(path, 0o600)
+            listener.listen(16)
+
+            server = _WarmServer(name, config, self.max_concurrency, self.startup_timeout,
+                                 self.request_timeout)
+            self._servers[name], self._sockets[name] = server, path
+            threading.Thread(target=self._accept_loop, args=(server, listener),
+                             name=f'mcp-pool-accept-{name}', daemon=True).start()
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._reap_loop, name='mcp-pool-reaper', daemon=True)
+                self._reaper.start()
+            return path
+
+    def _accept_loop(self, server: _WarmServer, listener: socket.socket):
+        with listener:
+            while not self._stopped.is_set():
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                threading.Thread(target=self._serve_client, args=(server, conn),
+                                 name=f'mcp-pool-client-{server.name}', daemon=True).start()
+
+    def _serve_client(self, server: _WarmServer, conn: socket.socket):
+        """Relay one CLI session to the warm server."""
+        client = _Client(conn)
+        try:
+            server.attach(client)
+        except PoolError as e:
+            logger.warning('%s', e)
+            conn.close()
+            return
+        try:
+            with conn.makefile('rb') as reader:
+                for line in reader:
+                    message = _parse(line)
+                    if message:
+                        server.from_client(client, message)
+        except OSError:
+            pass
+        finally:
+            server.detach(client)
+            conn.close()
+
+    def _reap_loop(self):
+        """Stop servers that have been idle too long."""
+        while not self._stopped.wait(min(30.0, max(1.0, self.idle_seconds / 4))):
+            with self._lock:
+                servers = list(self._servers.values())
+            now = time.monotonic()
+            for server in servers:
+                stats = server.stats()
+                if stats['running'] and not stats['clients'] and now - server.last_used >= self.idle_seconds:
+                    server.stop()
+
+
+def _parse(line: bytes) -> Optional[dict]:
+    """A JSON-RPC message from one line, or None for anything else."""
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def _drain(stream, tail: deque):
+    """Read a server's stderr to the end, keeping the last lines."""
+    try:
+        for line in stream:
+            tail.append(line.decode(errors='replace').rstrip())
+    except (OSError, ValueError):
+        pass
+
+
+def _format_tail(tail: deque) -> str:
+    """Stderr tail for a log message ('' if the server wrote nothing)."""
+    lines = [line for line in tail if line]
+    return ('; stderr:\n' + '\n'.join(lines)) if lines else ''
+
+
+def _terminate(proc: subprocess.Popen):
+    """Stop a server's process group, escalating to kill."""
+    if proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=3)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+
@@ -0,0 +1,252 @@
+"""
+MCP Probe - Checks that an MCP server actually speaks MCP.
+
+Starts the server, performs the JSON-RPC handshake over stdio (newline
+delimited messages) - ``initialize``, the ``notifications/initialized``
+notification, then ``tools/list`` - and stops it again. Every read is bounded
+by one overall deadline, so a hung server costs at most ``timeout`` seconds.
+"""
+import json
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from typing import Optional
+
+PROTOCOL_VERSION = '2024-11-05'
+CLIENT_INFO = {'name': 'orchestrator', 'version': '1.0'}
+
+# Most stderr kept for error messages
+STDERR_TAIL_BYTES = 2000
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of probing one MCP server."""
+    success: bool
+    message: str
+    latency_ms: Optional[float] = None  # Spawn to initialize response
+    total_ms: Optional[float] = None  # Spawn to tools/list response
+    tool_count: Optional[int] = None
+    tools: list = field(default_factory=list)
+    server_info: Optional[dict] = None
+    protocol_version: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ProbeError(Exception):
+    """The server failed the handshake."""
+
+
+class _StdioSession:
+    """Newline-delimited JSON-RPC over a child process's stdin/stdout."""
+
+    def __init__(self, proc: subprocess.Popen, deadline: float):
+        self.proc = proc
+        self.deadline = deadline
+        self._buffer = b''
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(proc.stdout, selectors.EVENT_READ)
+
+    def send(self, message: dict):
+        try:
+            self.proc.stdin.write(json.dumps(message).encode() + b'\n')
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise ProbeError('Server closed its input')
+
+    def request(self, request_id: int, method: str, params: Optional[dict] = None) -> dict:
+        """Send a request and wait for its response, skipping other messages."""
+        self.send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}})
+        while True:
+            message = self._read_message()
+            if message.get('id') != request_id or 'method' in message:
+                continue  # Notification, log or server-to-client request
+            if 'error' in message:
+                error = message['error'] or {}
+                raise ProbeError(f"{method} failed: {error.get('message', error)}")
+            return message.get('result') or {}
+
+    def _read_message(self) -> dict:
+        while True:
+            line, sep, rest = self._buffer.partition(b'\n')
+            if sep:
+                self._buffer = rest
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # Stray non-protocol output on stdout
+                if isinstance(message, dict):
+                    return message
+                continue
+
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProbeError('Timed out waiting for the server')
+            if not self._selector.select(remaining):
+                continue
+            chunk = os.read(self.proc.stdout.fileno(), 65536)
+            if not chunk:
+                try:
+                    code = self.proc.wait(timeout=max(0.0, min(1.0, self.deadline - time.monotonic())))
+                except subprocess.TimeoutExpired:
+                    raise ProbeError('Server closed its output')
+                raise ProbeError(f'Server exited with code {code}')
+            self._buffer += chunk
+
+    def close(self):
+        self._selector.close()
+
+
+def probe_mcp_server(command: str, args: Optional[list] = None, env: Optional[dict] = None,
+                     timeout: float = 15.0) -> ProbeResult:
+    """
+    Start an MCP server and run the initialize / tools/list handshake.
+
+    Args:
+        command: Executable to run
+        args: Its arguments
+        env: Extra environment variables
+        timeout: Overall limit for startup and both exchanges (seconds)
+
+    Returns:
+        ProbeResult; ``success`` is False with a message on any failure
+    """
+    if not command:
+        return ProbeResult(success=False, message='No command configured')
+
+    started = time.monotonic()
+    deadline = started + timeout
+    stderr_tail = bytearray()
+    try:
+        proc = subprocess.Popen(
+            [command, *(args or [])],
+            env={**os.environ, **(env or {})},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        return ProbeResult(success=False, message=f"Command not found: {command}")
+    except OSError as e:
+        return ProbeResult(success=False, message=str(e))
+
+    # Drain stderr so a chatty server cannot block on a full pipe
+    stderr_thread = threading.Thread(target=_drain, args=(proc.stderr, stderr_tail), daemon=True)
+    stderr_thread.start()
+
+    session = _StdioSession(proc, deadline)
+    try:
+        init = session.request(1, 'initialize', {
+            'protocolVersion': PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': CLIENT_INFO,
+        })
+        latency_ms = (time.monotonic() - started) * 1000
+        session.send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+
+        tools, cursor, request_id = [], None, 2
+        if 'tools' in (init.get('capabilities') or {}):
+            while True:
+                page = session.request(request_id, 'tools/list', {'cursor': cursor} if cursor else {})
+                tools.extend(tool.get('name') for tool in page.get('tools') or [])
+                cursor = page.get('nextCursor')
+                request_id += 1
+                if not cursor:
+                    break
+        total_ms = (time.monotonic() - started) * 1000
+
+        server_info = init.get('serverInfo') or {}
+        return ProbeResult(
+            success=True,
+            message=f"{server_info.get('name', 'Server')} responded in {latency_ms:.0f} ms "
+                    f"with {len(tools)} tool{'s' if len(tools) != 1 else ''}",
+            latency_ms=round(latency_ms, 1),
+            total_ms=round(total_ms, 1),
+            tool_count=len(tools),
+            tools=tools,
+            server_info=server_info or None,
+            protocol_version=init.get('protocolVersion'),
+        )
+    except ProbeError as e:
+        _stop(proc)
+        stderr_thread.join(1)
+        detail = bytes(stderr_tail).decode('utf-8', errors='replace').strip()
+        return ProbeResult(success=False, message=f"{e}: {detail}" if detail else str(e))
+    finally:
+        session.close()
+        _stop(proc)
+        stderr_thread.join(1)
+        proc.stdout.close()
+
+
+def probe_mcp_servers(servers: dict, timeout: float = 15.0,
+                      max_workers: int = 8) -> dict[str, ProbeResult]:
+    """
+    Probe several servers concurrently.
+
+    Args:
+        servers: Dict of server name -> config (``command``, ``args``, ``env``)
+        timeout: Per-server limit (seconds); the whole call takes about as
+            long as the slowest server when there are enough workers
+        max_workers: Most servers probed at once
+
+    Returns:
+        Dict of server name -> ProbeResult
+    """
+    if not servers:
+        return {}
+
+    def probe(item):
+        name, config = item
+        return name, probe_mcp_server(config.get('command', ''), config.get('args', []),
+                                      config.get('env', {}), timeout=timeout)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(servers)))) as pool:
+        return dict(pool.map(probe, servers.items()))
+
+
+def server_signature(config: dict) -> str:
+    """Identity of a server config: changes when its command, args or env change."""
+    return json.dumps([config.get('command', ''), config.get('args') or [], config.get('env') or {}],
+                      sort_keys=True, default=str)
+
+
+def _drain(stream, tail: bytearray):
+    """Read a stream to EOF, keeping only its last STDERR_TAIL_BYTES."""
+    try:
+        for chunk in iter(lambda: stream.read1(4096), b''):
+            tail.extend(chunk)
+            del tail[:-STDERR_TAIL_BYTES]
+    finally:
+        stream.close()
+
+
+def _stop(proc: subprocess.Popen):
+    """Terminate a server (and anything it spawned, e.g. npx children), escalating to kill."""
+    if proc.poll() is not None:
+        return
+    try:
+        proc.stdin.close()
+    except OSError:
+        pass
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=2)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
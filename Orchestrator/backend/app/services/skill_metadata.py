@@ -0,0 +1,117 @@
+"""
+SKILL.md metadata extraction - reads only the header of the file.
+
+Listings need a SKILL.md's title and description, not its (sometimes very
+long) body. The extractor consumes lines lazily and stops as soon as the
+description is known: at the end of the YAML front matter if it has a
+``description``, otherwise at the first paragraph after the title. Results
+are cached per path and keyed by file size and mtime.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+# Longest description kept (listings show a one-line summary)
+DESCRIPTION_MAX_CHARS = 200
+
+# Cached files; least recently used entries are evicted beyond this
+METADATA_CACHE_SIZE = 16384
+
+_cache: 'OrderedDict[str, tuple[tuple[int, int], dict]]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def extract_skill_metadata(lines: Iterable[str]) -> dict:
+    """
+    Extract metadata from SKILL.md lines, consuming no more than needed.
+
+    Returns:
+        Dict with 'title' and 'description' (either may be None) plus any
+        simple ``key: value`` pairs from YAML front matter
+    """
+    metadata = {'title': None, 'description': None}
+    lines = iter(lines)
+
+    first = next(lines, None)
+    if first is None:
+        return metadata
+    if first.strip() == '---':
+        for line in lines:
+            if line.strip() in ('---', '...'):
+                break
+            key, sep, value = line.partition(':')
+            if sep and key.strip() and not line[:1].isspace():
+                metadata[key.strip()] = _unquote(value.strip())
+        if metadata.get('description'):
+            metadata['description'] = metadata['description'][:DESCRIPTION_MAX_CHARS]
+            return metadata
+        first = next(lines, None)
+
+    # Description is the first paragraph line after the first heading
+    for line in _chain(first, lines):
+        if metadata['title'] is None:
+            if line.startswith('#'):
+                metadata['title'] = line.lstrip('#').strip()
+            continue
+        stripped = line.strip()
+        if stripped and not line.startswith('#'):
+            metadata['description'] = stripped[:DESCRIPTION_MAX_CHARS]
+            break
+    return metadata
+
+
+def read_skill_metadata(path: str) -> Optional[dict]:
+    """
+    Metadata of a SKILL.md file, reading only its header.
+
+    Cached until the file's size or mtime changes.
+
+    Returns:
+        Metadata dict (see extract_skill_metadata), or None if the file
+        does not exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    signature = (st.st_size, st.st_mtime_ns)
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            _cache.move_to_end(path)
+            return dict(cached[1])
+
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            metadata = extract_skill_metadata(f)
+    except FileNotFoundError:
+        return None
+
+    with _cache_lock:
+        _cache[path] = (signature, metadata)
+        _cache.move_to_end(path)
+        while len(_cache) > METADATA_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dict(metadata)
+
+
+def clear_metadata_cache():
+    """Forget all cached metadata."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _chain(first: Optional[str], rest: Iterable[str]):
+    """Yield ``first`` (if any) then the remaining lines."""
+    if first is not None:
+        yield first
+    yield from rest
+
+
+def _unquote(value: str) -> str:
+    """Strip matching quotes from a front matter scalar."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+        return value[1:-1]
+    return value
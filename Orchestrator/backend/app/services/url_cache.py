@@ -0,0 +1,265 @@
+"""
+URL Cache - On-disk cache of fetched context URLs.
+
+Scheduled agents attach the same URLs on every run. Each fetched body (as
+capped by the fetcher) is kept in one file per URL, holding a JSON header
+line - validators, freshness, content type - followed by the raw bytes:
+
+- within its TTL (shortened by ``Cache-Control: max-age``) an entry is
+  served without any request
+- after that it is revalidated with ``If-None-Match`` / ``If-Modified-Since``;
+  a ``304 Not Modified`` renews it without downloading the body again
+- ``no-store`` responses are never written
+
+The directory is bounded to ``max_bytes``: when a write pushes it over,
+the least recently used entries (file mtime, touched on every hit) are
+deleted. Files are replaced atomically, so several processes can share it.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from typing import Mapping, Optional
+
+SUFFIX = '.entry'
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body and what is needed to revalidate it."""
+    url: str
+    body: bytes = field(repr=False)
+    content_type: Optional[str] = None
+    truncated: bool = False
+    content_length: Optional[str] = None
+    max_bytes: int = 0  # The fetcher's cap when stored
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0  # Wall clock time of the last download or revalidation
+    max_age: Optional[float] = None
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class URLCache:
+    """
+    Size-bounded on-disk cache of URL bodies with TTL and revalidation.
+
+    Args:
+        directory: Where entries are stored (created if missing)
+        ttl: Seconds an entry is served without revalidation
+        max_bytes: Total size the directory is kept under
+    """
+
+    def __init__(self, directory: str, ttl: float = 300, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = sum(size for _, size, _ in self._scan())
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.evictions = 0
+
+    def get(self, url: str, max_bytes: int = 0) -> Optional[CacheEntry]:
+        """
+        Cached entry for a URL, fresh or not.
+
+        Args:
+            url: The URL
+            max_bytes: The caller's current byte cap; an entry truncated at a
+                smaller cap is treated as missing
+
+        Returns:
+            The entry, or None
+        """
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if header.get('url') != url:
+            return None  # Hash collision
+        try:
+            entry = CacheEntry(body=body, **header)
+        except TypeError:
+            return None  # Written by an older layout
+        if entry.truncated and entry.max_bytes < max_bytes:
+            return None
+        _touch(path)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Whether an entry may be served without revalidation."""
+        ttl = self.ttl if entry.max_age is None else min(self.ttl, entry.max_age)
+        return time.time() - entry.fetched_at < ttl
+
+    def put(self, url: str, body: bytes, headers: Mapping[str, str],
+            truncated: bool, max_bytes: int) -> Optional[CacheEntry]:
+        """
+        Store a downloaded body with its response headers' validators.
+
+        Returns:
+            The stored entry, or None if the response must not be cached
+        """
+        cache_control = _cache_control(headers.get('Cache-Control', ''))
+        if 'no-store' in cache_control:
+            self.remove(url)
+            return None
+        max_age = cache_control.get('max-age')
+        entry = CacheEntry(
+            url=url,
+            body=body,
+            content_type=headers.get('Content-Type'),
+            truncated=truncated,
+            content_length=headers.get('Content-Length'),
+            max_bytes=max_bytes,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            fetched_at=time.time(),
+            max_age=0.0 if 'no-cache' in cache_control else (float(max_age) if max_age else None),
+        )
+        self._write(entry)
+        return entry
+
+    def renew(self, entry: CacheEntry, headers: Mapping[str, str]) -> CacheEntry:
+        """Mark an entry fresh again after a 304, taking any updated validators."""
+        cache_control = _cache_control(headers.get('Cache-Control', ''))
+        if cache_control.get('max-age'):
+            entry.max_age = float(cache_control['max-age'])
+        entry.etag = headers.get('ETag') or entry.etag
+        entry.last_modified = headers.get('Last-Modified') or entry.last_modified
+        entry.fetched_at = time.time()
+        self._write(entry)
+        return entry
+
+    def remove(self, url: str):
+        path = self._path(url)
+        try:
+            size = os.path.getsize(path)
+            os.unlink(path)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.revalidated + self.misses
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'stale_served': self.stale_served,
+                'evictions': self.evictions,
+                'hit_ratio': round((self.hits + self.revalidated) / lookups, 3) if lookups else None,
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+            }
+
+    def count(self, counter: str):
+        """Increment one of the counters (hits, misses, revalidated, stale_served)."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + SUFFIX)
+
+    def _write(self, entry: CacheEntry):
+        """Atomically replace an entry's file, then evict if over budget."""
+        header = asdict(entry)
+        del header['body']
+        data = json.dumps(header).encode() + b'\n' + entry.body
+        path = self._path(entry.url)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._size += len(data) - old_size
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until under ``max_bytes``."""
+        entries = sorted(self._scan(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._size = total  # Rescanned, so this also picks up other processes' writes
+            self.evictions += evicted
+
+    def _scan(self) -> list[tuple[str, int, float]]:
+        """(path, size, last used) of every entry on disk."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if not item.name.endswith(SUFFIX):
+                        continue
+                    try:
+                        st = item.stat()
+                    except OSError:
+                        continue
+                    entries.append((item.path, st.st_size, st.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+
+def _touch(path: str):
+    """Record a use for LRU ordering."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+_DIRECTIVE = re.compile(r'\s*([\w-]+)\s*(?:=\s*"?([^",]*)"?)?\s*(?:,|$)')
+
+
+def _cache_control(value: str) -> dict[str, Optional[str]]:
+    """Directives of a Cache-Control header, lower-cased (``max-age`` -> seconds string)."""
+    directives = {name.lower(): arg for name, arg in _DIRECTIVE.findall(value or '')}
+    if directives.get('max-age') and not directives['max-age'].isdigit():
+        directives.pop('max-age')
+    return directives
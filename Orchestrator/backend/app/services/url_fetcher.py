@@ -0,0 +1,174 @@
+"""
+URL Fetcher - Concurrent, bounded fetching of task context URLs.
+
+All fetches share one ``requests.Session`` per process, so repeated hosts
+reuse pooled keep-alive connections instead of a new TCP/TLS handshake per
+URL. Bodies are streamed and reading stops at the byte cap, so a huge
+download costs ``max_bytes`` of memory, not its full size. Bodies are then
+reduced to their text (content_extract) before the ``max_chars`` budget is
+applied, so the budget is spent on content rather than markup. A task's URLs are
+fetched in parallel under one overall deadline: ten URLs cost about as long
+as the slowest one, and never more than the deadline. With a URLCache,
+repeated URLs are served from disk or revalidated instead of re-downloaded.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.content_extract import extract_text
+from app.services.url_cache import URLCache
+
+USER_AGENT = 'Orchestrator/1.0'
+CHUNK_BYTES = 16384
+
+
+class URLFetcher:
+    """
+    Fetches URLs as text for prompt context.
+
+    Args:
+        timeout: Limit per URL for connecting and for each read (seconds)
+        deadline: Limit for a whole ``fetch_many`` call (seconds)
+        max_bytes: Most body bytes read per URL
+        max_chars: Most characters of extracted text returned per URL
+        max_workers: Most URLs fetched at once
+        cache: Optional on-disk cache with revalidation (see url_cache)
+    """
+
+    def __init__(self, timeout: float = 30, deadline: float = 45,
+                 max_bytes: int = 1_000_000, max_chars: int = 50000, max_workers: int = 8,
+                 cache: Optional[URLCache] = None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='url-fetch')
+
+    def fetch(self, url: str, deadline: Optional[float] = None) -> str:
+        """
+        Fetch one URL as extracted text (see content_extract), truncated at
+        ``max_chars``.
+
+        With a cache, a fresh entry is returned without a request and a
+        stale one is revalidated; if that fails on the network or with a
+        server error, the stale copy is used rather than an error.
+
+        Args:
+            url: URL to fetch
+            deadline: Monotonic time by which to give up (default: ``timeout``
+                from now)
+
+        Returns:
+            The body text, or an ``[Error fetching URL: ...]`` note
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        cache = self.cache
+        entry = cache.get(url, self.max_bytes) if cache else None
+        if entry and cache.is_fresh(entry):
+            cache.count('hits')
+            return self._render(url, entry.body, entry.content_type, entry.truncated, entry.content_length)
+
+        try:
+            remaining = self._remaining(deadline)
+            with self.session.get(url, stream=True, timeout=(remaining, remaining),
+                                  headers=entry.validators() if entry else None) as response:
+                if entry and response.status_code == 304:
+                    cache.count('revalidated')
+                    cache.renew(entry, response.headers)
+                    return self._render(url, entry.body, entry.content_type, entry.truncated, entry.content_length)
+                response.raise_for_status()
+                body = bytearray()
+                truncated = False
+                for chunk in response.iter_content(CHUNK_BYTES):
+                    body += chunk
+                    if len(body) > self.max_bytes:
+                        truncated = True
+                        del body[self.max_bytes:]
+                        break
+                    self._remaining(deadline)
+                if cache:
+                    cache.count('misses')
+                    cache.put(url, bytes(body), response.headers, truncated, self.max_bytes)
+                return self._render(url, bytes(body), response.headers.get('Content-Type'), truncated,
+                                    response.headers.get('Content-Length'))
+        except Exception as e:
+            gone = isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code < 500
+            if entry and gone:
+                cache.remove(url)
+            elif entry:
+                cache.count('stale_served')
+                return self._render(url, entry.body, entry.content_type, entry.truncated, entry.content_length)
+            if cache:
+                cache.count('misses')
+            return f"[Error fetching URL: {str(e)}]"
+
+    def _render(self, url: str, body: bytes, content_type: Optional[str], truncated: bool,
+                content_length: Optional[str]) -> str:
+        """Extract text from a (possibly capped) body, then apply ``max_chars``, noting any truncation."""
+        content = extract_text(body, content_type, url)
+        if len(content) > self.max_chars:
+            return content[:self.max_chars] + (
+                f"\n\n[Truncated - extracted text was {len(content)}{'+' if truncated else ''} chars]")
+        if truncated:
+            content += (f"\n\n[Truncated at {self.max_bytes} bytes - original size: {content_length} bytes]"
+                        if content_length else f"\n\n[Truncated at {self.max_bytes} bytes]")
+        return content
+
+    def fetch_many(self, urls: Iterable[str]) -> dict[str, str]:
+        """
+        Fetch several URLs concurrently within ``deadline``.
+
+        Args:
+            urls: URLs to fetch (duplicates are fetched once)
+
+        Returns:
+            Dict of URL -> text or error note, for every URL
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        deadline = time.monotonic() + self.deadline
+        futures = {url: self._executor.submit(self.fetch, url, deadline) for url in urls}
+        wait(futures.values(), timeout=self.deadline)
+        results = {}
+        for url, future in futures.items():
+            if future.done():
+                results[url] = future.result()
+            else:
+                # Still running: it stops at its next read, as its timeouts share the deadline
+                future.cancel()
+                results[url] = f"[Error fetching URL: context deadline of {self.deadline:g}s exceeded]"
+        return results
+
+    def _remaining(self, deadline: float) -> float:
+        """Seconds left for the next network wait, or raise once the deadline passed."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('context deadline exceeded')
+        return min(self.timeout, remaining)
+
+
+_fetcher: Optional[URLFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_url_fetcher() -> URLFetcher:
+    """The process-wide fetcher with default limits."""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = URLFetcher()
+    return _fetcher
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Database benchmark - execution completions/sec under concurrent readers.
+
+Compares the pooled WAL configuration, with and without the write-behind
+batcher, against the previous setup (a fresh rollback-journal connection per
+operation). Each writer thread repeatedly creates an execution, records its
+PID and finishes it - the same three writes a real run makes - while reader
+threads page through the history listing and read the dashboard statistics.
+
+Run with:
+    python scripts/bench_db.py [--seconds 10] [--writers 4] [--readers 8]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import configure_pool, init_db  # noqa: E402
+from app.models.execution import finish_execution  # noqa: E402
+from app.models.execution_stats import query_stats  # noqa: E402
+from app.models.write_behind import configure_writer  # noqa: E402
+
+
+def legacy_connection_factory(db_path: str):
+    """One rollback-journal connection per operation (the old behaviour)."""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+
+    @contextmanager
+    def connection():
+        conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connection
+
+
+def pooled_connection_factory(db_path: str, synchronous: str):
+    """Connections from the shared WAL pool."""
+    return configure_pool(db_path, max_idle=32, synchronous=synchronous).connection
+
+
+def direct_writes(connection):
+    """Each write is its own committed transaction."""
+    def write(fn, wait=True):
+        with connection() as conn:
+            fn(conn)
+            conn.commit()
+    return write
+
+
+def batched_writes(db_path: str, max_delay: float):
+    """Writes go through the write-behind batcher; PID updates don't wait."""
+    writer = configure_writer(db_path, max_delay=max_delay)
+
+    def write(fn, wait=True):
+        future = writer.submit(fn)
+        if wait:
+            future.result()
+    return write
+
+
+def run(label: str, connection, write, seconds: float, writers: int, readers: int) -> dict:
+    """Drive the workload for ``seconds`` and count operations and lock errors."""
+    stop = threading.Event()
+    counts = {'completions': 0, 'reads': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def bump(key: str):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        while not stop.is_set():
+            execution_id = f"bench_{uuid.uuid4().hex}"
+            now = datetime.utcnow().isoformat()
+            try:
+                write(lambda conn: conn.execute('''
+                    INSERT INTO executions (id, agent_folder, task, status, started_at, queued_at, created_at)
+                    VALUES (?, 'Bench Agent', 'benchmark', 'running', ?, ?, ?)
+                ''', (execution_id, now, now, now)))
+                write(lambda conn: conn.execute(
+                    'UPDATE executions SET pid = ? WHERE id = ?', (os.getpid(), execution_id)
+                ), wait=False)
+                write(lambda conn: finish_execution(conn, execution_id, 'success', output='ok'))
+                bump('completions')
+            except sqlite3.OperationalError:
+                bump('locked')
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with connection() as conn:
+                    conn.execute('''
+                        SELECT id, status, started_at FROM executions
+                        ORDER BY created_at DESC, id DESC LIMIT 50
+                    ''').fetchall()
+                    query_stats(conn)
+                bump('reads')
+            except sqlite3.OperationalError:
+                bump('locked')
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = {
+        'label': label,
+        'completions_per_sec': counts['completions'] / seconds,
+        'reads_per_sec': counts['reads'] / seconds,
+        'locked_errors': counts['locked'],
+    }
+    print(f"{label:<34} {result['completions_per_sec']:>10.1f} completions/s "
+          f"{result['reads_per_sec']:>10.1f} reads/s {result['locked_errors']:>6} locked")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--max-delay-ms', type=float, default=0,
+                        help='write-behind linger before committing a batch')
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s per configuration")
+    with tempfile.TemporaryDirectory() as tmp:
+        configurations = [
+            ('legacy (rollback journal)', 'DELETE', False),
+            ('pooled WAL, synchronous=FULL', 'FULL', False),
+            ('pooled WAL, synchronous=NORMAL', 'NORMAL', False),
+            ('write-behind, synchronous=FULL', 'FULL', True),
+            ('write-behind, synchronous=NORMAL', 'NORMAL', True),
+        ]
+        for i, (label, synchronous, batched) in enumerate(configurations):
+            db_path = os.path.join(tmp, f'bench_{i}.db')
+            init_db(db_path)
+            if synchronous == 'DELETE':
+                connection = legacy_connection_factory(db_path)
+            else:
+                connection = pooled_connection_factory(db_path, synchronous)
+            write = batched_writes(db_path, args.max_delay_ms / 1000) if batched else direct_writes(connection)
+            run(label, connection, write, args.seconds, args.writers, args.readers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""Shared fixtures for the Orchestrator API tests."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.database import configure_pool, init_db  # noqa: E402
+from app.models.write_behind import configure_writer  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh, initialised database with inline (non-batched) writes."""
+    path = str(tmp_path / 'executions.db')
+    configure_pool(path)
+    configure_writer(path, background=False)
+    init_db(path)
+    return path
@@ -0,0 +1,105 @@
+"""Tests for agent discovery and folder naming in the registry."""
+import pytest
+
+from app.services.agent_registry import AgentRegistry
+
+
+def add_agent(root, folder, name=None):
+    path = root / folder
+    path.mkdir(parents=True)
+    (path / 'SKILL.md').write_text(f"# {name or folder}\n\nAn agent.\n")
+    return path
+
+
+@pytest.mark.parametrize('folder', sorted(AgentRegistry.RESERVED_FOLDERS))
+def test_reserved_folder_cannot_be_created(tmp_path, folder):
+    registry = AgentRegistry(str(tmp_path))
+
+    with pytest.raises(ValueError, match='reserved'):
+        registry.create_agent(folder, 'Reserved')
+    assert not (tmp_path / folder).exists()
+
+
+@pytest.mark.parametrize('folder', sorted(AgentRegistry.RESERVED_FOLDERS))
+def test_reserved_folder_on_disk_is_not_discovered(tmp_path, folder):
+    add_agent(tmp_path, folder)
+    add_agent(tmp_path, 'Manager')
+    registry = AgentRegistry(str(tmp_path))
+
+    assert [agent.folder for agent in registry.discover_agents()] == ['Manager']
+    assert registry.get_agent(folder) is None
+
+
+def test_reserved_name_is_allowed_below_top_level(tmp_path):
+    registry = AgentRegistry(str(tmp_path))
+    for folder in AgentRegistry.RESERVED_FOLDERS:
+        registry.create_agent(f'Team/{folder}', folder.title())
+
+    assert {agent.folder for agent in registry.discover_agents()} == {
+        f'Team/{folder}' for folder in AgentRegistry.RESERVED_FOLDERS}
+
+
+def test_agent_root_is_the_root_the_agent_was_found_under(tmp_path):
+    first, extra = tmp_path / 'agents', tmp_path / 'extra'
+    add_agent(first, 'Manager')
+    add_agent(extra, 'Team/QA Engineer')
+    registry = AgentRegistry(str(first), extra_roots=[str(extra)])
+
+    assert registry.agent_root('Team/QA Engineer') == extra  # Before discovery
+    registry.discover_agents()
+    assert registry.agent_root('Manager') == first
+    assert registry.agent_root('Team/QA Engineer') == extra
+    assert registry.agent_root('Missing') is None
+
+
+def test_non_utf8_skill_file_does_not_break_search(tmp_path):
+    add_agent(tmp_path, 'Manager', name='Manager')
+    bad = add_agent(tmp_path, 'Cafe')
+    (bad / 'SKILL.md').write_bytes(b'# Caf\xe9 Orders\n\nTakes caf\xe9 orders for the espresso bar.\n')
+    registry = AgentRegistry(str(tmp_path))
+
+    assert [agent.folder for agent, _ in registry.search('espresso')] == ['Cafe']
+    assert registry.route('take espresso orders')[0][0].folder == 'Cafe'
+    assert 'espresso bar' in registry.get_agent('Cafe').skill_content
+
+
+def test_agent_cannot_be_created_inside_another_agent(tmp_path):
+    add_agent(tmp_path, 'Foo')
+    registry = AgentRegistry(str(tmp_path))
+
+    with pytest.raises(ValueError, match="'Foo' is an agent"):
+        registry.create_agent('Foo/Bar', 'Bar')
+    with pytest.raises(ValueError, match="'Foo' is an agent"):
+        registry.create_agent('Foo/Team/Bar', 'Bar')
+    assert not (tmp_path / 'Foo' / 'Bar').exists()
+    assert not (tmp_path / 'Foo' / 'Team').exists()
+
+
+def test_agent_can_be_created_inside_a_plain_folder(tmp_path):
+    add_agent(tmp_path, 'Team/Foo')
+    registry = AgentRegistry(str(tmp_path))
+
+    registry.create_agent('Team/Bar', 'Bar')
+
+    assert [agent.folder for agent in registry.discover_agents()] == ['Team/Bar', 'Team/Foo']
+
+
+def test_folders_inside_an_agent_are_not_discovered_as_agents(tmp_path):
+    add_agent(tmp_path, 'Foo')
+    add_agent(tmp_path, 'Foo/Bar')
+    registry = AgentRegistry(str(tmp_path))
+
+    assert [agent.folder for agent in registry.discover_agents()] == ['Foo']
+    assert registry.get_agent('Foo/Bar') is None
+    assert registry.get_agent('Foo/Bar', include_content=False) is None
+
+
+def test_agent_nested_across_roots_is_not_discovered(tmp_path):
+    first, extra = tmp_path / 'agents', tmp_path / 'extra'
+    add_agent(first, 'Foo')
+    add_agent(extra, 'Foo/Bar')
+    add_agent(extra, 'Baz')
+    registry = AgentRegistry(str(first), extra_roots=[str(extra)])
+
+    assert [agent.folder for agent in registry.discover_agents()] == ['Baz', 'Foo']
+    assert registry.get_agent('Foo/Bar') is None
@@ -0,0 +1,81 @@
+"""Tests for BM25 ranking of agents against a task."""
+import pytest
+
+from app.services.agent_router import AgentRouter, tokenize
+
+AGENTS = [
+    ('Email', 'Email Assistant', 'Reads and sends email', ['gmail'],
+     'Triage the inbox, draft replies and send email to contacts.'),
+    ('Calendar', 'Calendar Manager', 'Schedules meetings', ['google-calendar'],
+     'Book meetings, find free slots and send invites by email when asked.'),
+    ('Invoices', 'Invoice Processor', 'Extracts totals from invoices', [],
+     'Read PDF invoices and record the totals in the ledger.'),
+]
+
+
+def router_with(agents=AGENTS, **options):
+    router = AgentRouter(**options)
+    router.update_many(agents)
+    return router
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize('Please send the emails to our Companies') == ['send', 'email', 'company']
+    assert tokenize('a I is x') == []
+    assert tokenize('access class') == ['access', 'class']  # 'ss' is not a plural
+
+
+def test_best_matching_agent_ranks_first():
+    ranked = router_with().route('send an email to the team')
+
+    assert [doc_id for doc_id, _ in ranked] == ['Email', 'Calendar']
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_name_and_description_outweigh_a_body_mention():
+    # Both agents mention meetings once in the body; only one is named for them
+    router = router_with([
+        ('Meetings', 'Meeting Notes', 'Summarises meetings', [], 'Write up meeting notes.'),
+        ('Notes', 'Notes', 'Keeps notes', [], 'Sometimes used after meetings.'),
+    ])
+
+    assert router.route('meetings')[0][0] == 'Meetings'
+
+
+def test_task_without_a_shared_term_matches_nothing():
+    router = router_with()
+
+    assert router.route('the and of') == []
+    assert router.route('quantum chromodynamics') == []
+
+
+def test_limit_caps_the_results():
+    assert len(router_with().route('send email meetings invoices', limit=2)) == 2
+
+
+@pytest.mark.parametrize('min_merge', [0, 1000])
+def test_incremental_changes_rank_like_a_fresh_compile(min_merge):
+    # min_merge=0 recompiles on every route; 1000 keeps changes in the delta segment,
+    # scored against the previous compile's statistics (so only the order must match)
+    router = router_with(min_merge=min_merge, merge_ratio=0)
+    router.route('email')
+    router.update('Slack', 'Slack Poster', 'Posts messages to Slack', ['slack'], 'Send a message to a channel.')
+    router.update('Invoices', 'Invoice Processor', 'Emails invoice totals', [], 'Email the totals.')
+    router.remove('Calendar')
+
+    fresh = router_with([
+        AGENTS[0],
+        ('Invoices', 'Invoice Processor', 'Emails invoice totals', [], 'Email the totals.'),
+        ('Slack', 'Slack Poster', 'Posts messages to Slack', ['slack'], 'Send a message to a channel.'),
+    ])
+    for task in ('send email', 'post a slack message', 'invoice totals'):
+        assert [doc_id for doc_id, _ in router.route(task)] == [doc_id for doc_id, _ in fresh.route(task)]
+
+
+def test_removed_agent_is_never_returned():
+    router = router_with()
+    router.route('meetings')  # Compile, so the removal masks a compiled row
+    router.remove('Calendar')
+
+    assert 'Calendar' not in router
+    assert [doc_id for doc_id, _ in router.route('meetings invites email')] == ['Email']
@@ -0,0 +1,77 @@
+"""Tests for the agent search and routing endpoints."""
+import pytest
+from flask import Flask
+
+from app.routes.agents import agents_bp
+from app.services.agent_registry import AgentRegistry
+
+
+class RecordingPool:
+    """Stands in for the execution pool: records submitted jobs."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, execution_id, agent_folder, task, context=None):
+        self.submitted.append((execution_id, agent_folder, task))
+        return 0
+
+
+def add_agent(root, folder, skill):
+    path = root / folder
+    path.mkdir(parents=True)
+    (path / 'SKILL.md').write_bytes(skill)
+
+
+@pytest.fixture
+def app(tmp_path, db_path):
+    agents = tmp_path / 'agents'
+    add_agent(agents, 'Cafe', b'# Caf\xe9 Orders\n\nTakes caf\xe9 orders for the espresso bar.\n')
+    add_agent(agents, 'Invoices', b'# Invoices\n\nPrepares and sends monthly customer invoices.\n')
+    app = Flask(__name__)
+    app.config.update(AGENTS_ROOT=str(agents), DATABASE_PATH=db_path,
+                      AGENT_ROUTE_MIN_SCORE=1.0, MCP_REJECT_UNHEALTHY=True)
+    app.extensions['agent_registry'] = AgentRegistry(str(agents))
+    app.extensions['execution_pool'] = RecordingPool()
+    app.register_blueprint(agents_bp, url_prefix='/api')
+    return app
+
+
+def test_route_ranks_agents_despite_undecodable_skill_file(app):
+    response = app.test_client().post('/api/agents/route', json={'task': 'send the monthly invoices'})
+
+    assert response.status_code == 200
+    assert [r['folder'] for r in response.get_json()['results']][0] == 'Invoices'
+
+
+def test_route_execute_queues_best_match_despite_undecodable_skill_file(app):
+    response = app.test_client().post('/api/agents/route/execute', json={'task': 'espresso orders'})
+
+    body = response.get_json()
+    assert response.status_code == 202
+    assert body['routing']['agent'] == 'Cafe'
+    assert app.extensions['execution_pool'].submitted == [(body['id'], 'Cafe', 'espresso orders')]
+
+
+def test_search_answers_despite_undecodable_skill_file(app):
+    response = app.test_client().get('/api/agents/search?q=espresso')
+
+    assert response.status_code == 200
+    assert [r['folder'] for r in response.get_json()['results']] == ['Cafe']
+
+
+class StaleMonitor:
+    """A monitor whose results say every server is down, but which isn't probing."""
+    running = False
+
+    def unavailable(self, names):
+        return list(names)
+
+
+def test_execute_is_not_rejected_on_results_of_a_stopped_monitor(app, tmp_path):
+    (tmp_path / 'agents' / 'Invoices' / 'config.json').write_text('{"mcp_servers": ["gmail"]}')
+    app.extensions['mcp_monitor'] = StaleMonitor()
+
+    response = app.test_client().post('/api/agents/Invoices/execute', json={'task': 'send invoices'})
+
+    assert response.status_code == 202
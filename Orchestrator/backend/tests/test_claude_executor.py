@@ -0,0 +1,35 @@
+"""Tests for running the CLI process: streaming and the timeout."""
+import os
+import subprocess
+import sys
+import time
+
+from app.services.claude_executor import ClaudeExecutor
+
+
+def test_timeout_kills_the_cli_with_its_child_processes(tmp_path):
+    # A stand-in CLI whose child (like an MCP server) inherits stdout and outlives it
+    cli = tmp_path / 'claude'
+    cli.write_text('import subprocess, sys, time\n'
+                   f'child = subprocess.Popen([{sys.executable!r}, "-c", "import time; time.sleep(30)"])\n'
+                   'print(child.pid, flush=True)\n'
+                   'time.sleep(30)\n')
+    process = subprocess.Popen([sys.executable, str(cli)], start_new_session=True, text=True,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    lines = []
+
+    started = time.monotonic()
+    result = ClaudeExecutor(str(tmp_path), timeout=1)._stream_process(
+        process, 'task', on_output=lambda stream, line: lines.append(line))
+
+    assert result.return_code == -2
+    assert time.monotonic() - started < 10  # Not held open until the child exits
+    child_pid = int(lines[0])
+    for _ in range(50):
+        try:
+            os.kill(child_pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        raise AssertionError('CLI child process survived the timeout')
@@ -0,0 +1,103 @@
+"""Tests for pre-starting and retiring CLI processes."""
+import sys
+import time
+
+import pytest
+
+from app.services import cli_pool
+from app.services.cli_pool import CLIProcessPool
+
+# Stand-in CLI: waits for its prompt on stdin, echoes it and exits
+ECHO = [sys.executable, '-c', 'import sys; print("got " + sys.stdin.read(), end="")']
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail('Timed out waiting for the pool')
+        time.sleep(0.02)
+
+
+def idle_count(pool):
+    return sum(pool.stats()['idle'].values())
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(cli_pool, 'CHECK_SECONDS', 0.05)
+    pools = []
+
+    def make(**options):
+        pool = CLIProcessPool(**options)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_command_is_prestarted_once_hot_and_handed_over(make_pool, tmp_path):
+    pool = make_pool(hot_runs=2)
+
+    assert pool.acquire(ECHO, str(tmp_path)) is None
+    time.sleep(0.2)
+    assert pool.stats()['spawned'] == 0  # One run is not hot yet
+
+    assert pool.acquire(ECHO, str(tmp_path)) is None
+    wait_for(lambda: idle_count(pool) == 1)
+    process = pool.acquire(ECHO, str(tmp_path))
+
+    assert process is not None
+    out, _ = process.communicate('hello', timeout=5)
+    assert out == 'got hello'
+    assert pool.stats()['hits'] == 1 and pool.stats()['misses'] == 2
+    wait_for(lambda: idle_count(pool) == 1)  # Replacement started
+
+
+def test_idle_processes_are_capped_per_agent_and_overall(make_pool, tmp_path):
+    pool = make_pool(hot_runs=1, per_agent=2, max_processes=3)
+    for name in ('a', 'b'):
+        (tmp_path / name).mkdir()
+        pool.acquire(ECHO, str(tmp_path / name))
+
+    wait_for(lambda: idle_count(pool) == 3)
+    time.sleep(0.2)
+
+    assert idle_count(pool) == 3
+    assert max(pool.stats()['idle'].values()) == 2
+
+
+def test_idle_process_is_retired_after_idle_seconds(make_pool, tmp_path):
+    pool = make_pool(hot_runs=1, idle_seconds=1)
+    pool.acquire(ECHO, str(tmp_path))
+    wait_for(lambda: idle_count(pool) == 1)
+    (process, _), = next(iter(pool._idle.values()))
+
+    wait_for(lambda: pool.stats()['retired'] == 1)
+
+    assert process.wait(timeout=5) == 0  # Exited on stdin closing, not killed
+    assert idle_count(pool) == 0
+
+
+def test_shutdown_stops_idle_processes(make_pool, tmp_path):
+    pool = make_pool(hot_runs=1)
+    pool.acquire(ECHO, str(tmp_path))
+    wait_for(lambda: idle_count(pool) == 1)
+    (process, _), = next(iter(pool._idle.values()))
+
+    pool.shutdown()
+
+    assert process.poll() is not None
+    assert idle_count(pool) == 0
+    assert pool.acquire(ECHO, str(tmp_path)) is None
+
+
+def test_command_that_cannot_start_is_not_retried(make_pool, tmp_path):
+    pool = make_pool(hot_runs=1)
+
+    pool.acquire(ECHO, str(tmp_path / 'missing'))
+    time.sleep(0.3)
+
+    assert pool.stats()['spawned'] == 0
+    assert pool._runs == {}
@@ -0,0 +1,63 @@
+"""Tests for relevance-ranked packing of attached files into the context budget."""
+from app.services.claude_executor import ClaudeExecutor
+from app.services.context_budget import ContextBudget
+
+FILLER = 'Quarterly planning notes about office logistics and catering.\n\n'
+NEEDLE = 'The zeppelin hangar inspection found corroded mooring bolts.'
+
+
+def make_executor(tmp_path, **budget):
+    return ClaudeExecutor(str(tmp_path), context_budget=ContextBudget(max_tokens=2000, **budget))
+
+
+def write_document(tmp_path, name, needle_at):
+    """A filler document with the needle paragraph after ``needle_at`` chars."""
+    head = FILLER * (needle_at // len(FILLER) + 1)
+    path = tmp_path / name
+    path.write_text(head + NEEDLE + '\n\n' + FILLER * 100)
+    return path, len(head)
+
+
+def test_relevant_chunk_past_200k_chars_is_kept(tmp_path):
+    path, offset = write_document(tmp_path, 'notes.md', needle_at=250_000)
+    assert offset > 200_000
+
+    section = make_executor(tmp_path)._build_context_section(
+        {'file_paths': [str(path)]}, 'zeppelin mooring bolts inspection')
+
+    assert NEEDLE in section
+    assert 'Truncated' not in section
+    assert len(section) < 2000 * 4 + 1000
+
+
+def test_file_over_400kb_is_budgeted_not_rejected(tmp_path):
+    path, _ = write_document(tmp_path, 'big.md', needle_at=450_000)
+    assert path.stat().st_size > 400_000
+
+    section = make_executor(tmp_path)._build_context_section(
+        {'file_paths': [str(path)]}, 'zeppelin mooring bolts inspection')
+
+    assert 'File too large' not in section
+    assert NEEDLE in section
+
+
+def test_file_past_hard_cap_notes_truncation_outside_ranking(tmp_path):
+    path, _ = write_document(tmp_path, 'huge.md', needle_at=150_000)
+
+    section = make_executor(tmp_path, document_chars=100_000)._build_context_section(
+        {'file_paths': [str(path)]}, 'zeppelin mooring bolts inspection')
+
+    assert NEEDLE not in section  # Beyond the cap, never read
+    assert section.rstrip().endswith(
+        f"[Truncated at 100000 chars - original size: {path.stat().st_size} bytes]\n</document>\n</context>")
+
+
+def test_missing_file_note_is_not_ranked(tmp_path):
+    path, _ = write_document(tmp_path, 'notes.md', needle_at=50_000)
+    missing = tmp_path / 'zeppelin-mooring-bolts.md'
+
+    section = make_executor(tmp_path)._build_context_section(
+        {'file_paths': [str(missing), str(path)]}, 'zeppelin mooring bolts inspection')
+
+    assert f'<document path="{missing}">\n[File not found: {missing}]\n</document>' in section
+    assert NEEDLE in section
@@ -0,0 +1,52 @@
+"""Tests for database initialization and migrations."""
+import sqlite3
+
+from app.models import execution_stats
+from app.models.database import SCHEMA_VERSION, init_db
+
+
+def test_rollup_backfill_runs_once_even_if_rollups_stay_empty(db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(execution_stats, 'rebuild_rollups', lambda conn: calls.append(conn))
+
+    init_db(db_path)
+    init_db(db_path)
+
+    assert calls == []  # Done by the first init_db (the fixture's)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute('SELECT COUNT(*) FROM execution_rollups').fetchone()[0] == 0
+
+
+def test_rollups_are_backfilled_for_a_database_without_the_marker(db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(execution_stats, 'rebuild_rollups', lambda conn: calls.append(conn))
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA user_version = 0')
+    conn.close()
+
+    init_db(db_path)
+    init_db(db_path)
+
+    assert len(calls) == 1
+
+
+def test_created_at_is_backfilled_from_the_original_queue_time(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executemany('''
+        INSERT INTO executions (id, agent_folder, task, status, started_at, queued_at)
+        VALUES (?, 'Agent', 'task', 'success', ?, ?)
+    ''', [
+        ('queued', '2026-01-01T10:05:00', '2026-01-01T10:00:00'),  # started_at reset on start
+        ('legacy', '2026-01-01T09:00:00', None),  # From before queued_at existed
+    ])
+    conn.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+
+    init_db(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert dict(conn.execute('SELECT id, created_at FROM executions').fetchall()) == {
+        'queued': '2026-01-01T10:00:00', 'legacy': '2026-01-01T09:00:00'}
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
@@ -0,0 +1,31 @@
+"""Tests for incremental execution output capture."""
+from app.models.database import get_db_connection
+from app.models.execution_output import OutputCapture, read_output
+
+
+def segments(db_path, execution_id):
+    with get_db_connection(db_path) as conn:
+        return [(row['stream'], row['data']) for row in read_output(conn, execution_id)]
+
+
+def test_lines_are_flushed_as_segments_on_close(db_path):
+    capture = OutputCapture(db_path, 'exec-1', flush_interval=60)
+    capture.write('stdout', 'one')
+    capture.write('stdout', 'two')
+    capture.write('stderr', 'warning')
+    capture.close()
+
+    assert segments(db_path, 'exec-1') == [('stdout', 'one\ntwo'), ('stderr', 'warning')]
+
+
+def test_writes_after_close_are_dropped_without_touching_the_connection(db_path):
+    capture = OutputCapture(db_path, 'exec-1', flush_bytes=1, flush_interval=60)
+    capture.write('stdout', 'kept')
+    capture.close()
+
+    capture.write('stderr', 'late line from a reader thread')
+    capture.flush()
+
+    assert capture._conn is None
+    assert capture.bytes_dropped == len('late line from a reader thread') + 1
+    assert segments(db_path, 'exec-1') == [('stdout', 'kept')]
@@ -0,0 +1,179 @@
+"""Tests for the execution history and live output endpoints."""
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.models.database import get_db_connection, get_pool
+from app.routes import executions as executions_routes
+from app.routes.executions import executions_bp
+
+
+@pytest.fixture
+def app(db_path, monkeypatch):
+    monkeypatch.setattr(executions_routes, 'STREAM_POLL_SECONDS', 0.01)
+    app = Flask(__name__)
+    app.config.update(DATABASE_PATH=db_path)
+    app.register_blueprint(executions_bp, url_prefix='/api')
+    return app
+
+
+def add_execution(db_path, execution_id, status='running', created_at=None):
+    created_at = created_at or datetime.utcnow().isoformat()
+    with get_db_connection(db_path) as conn:
+        conn.execute('''
+            INSERT INTO executions (id, agent_folder, task, status, started_at, queued_at, created_at)
+            VALUES (?, 'Agent', 'task', ?, ?, ?, ?)
+        ''', (execution_id, status, created_at, created_at, created_at))
+        conn.commit()
+
+
+def set_status(db_path, execution_id, status):
+    with get_db_connection(db_path) as conn:
+        conn.execute('UPDATE executions SET status = ? WHERE id = ?', (status, execution_id))
+        conn.commit()
+
+
+def add_output(db_path, execution_id, seq, data, stream='stdout'):
+    with get_db_connection(db_path) as conn:
+        conn.execute('''
+            INSERT INTO execution_output (execution_id, seq, stream, data, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (execution_id, seq, stream, data, datetime.utcnow().isoformat()))
+        conn.commit()
+
+
+class EventReader:
+    """Parses Server-Sent Events from a streamed response, one at a time."""
+
+    def __init__(self, response):
+        self._chunks = iter(response.response)
+        self._buffer = ''
+
+    def next(self) -> dict:
+        while '\n\n' not in self._buffer:
+            self._buffer += next(self._chunks).decode()
+        block, self._buffer = self._buffer.split('\n\n', 1)
+        event = {}
+        for line in block.split('\n'):
+            field, _, value = line.partition(': ')
+            if field == 'data':
+                event['data'] = f"{event['data']}\n{value}" if 'data' in event else value
+            elif field in ('id', 'event', 'retry'):
+                event[field] = value
+        return event if event.get('event') else self.next()
+
+    def until(self, name: str) -> list[dict]:
+        events = []
+        while True:
+            events.append(self.next())
+            if events[-1]['event'] == name:
+                return events
+
+
+def stream(app, execution_id, **kwargs):
+    response = app.test_client().get(f'/api/executions/{execution_id}/stream', buffered=False, **kwargs)
+    assert response.status_code == 200
+    return EventReader(response)
+
+
+def test_stream_tails_output_as_it_arrives(app, db_path):
+    add_execution(db_path, 'run')
+    add_output(db_path, 'run', 1, '{"type": "system"}')
+    events = stream(app, 'run')
+
+    assert events.next() == {'id': '1', 'event': 'output', 'data': '{"type": "system"}'}
+    assert events.next() == {'event': 'status', 'data': '{"status": "running"}'}
+
+    add_output(db_path, 'run', 2, 'warning: slow network', stream='stderr')
+    assert events.next() == {'id': '2', 'event': 'stderr', 'data': 'warning: slow network'}
+
+
+def test_stream_resumes_after_last_event_id(app, db_path):
+    add_execution(db_path, 'run', status='success')
+    for seq in (1, 2, 3):
+        add_output(db_path, 'run', seq, f'line {seq}')
+
+    from_header = stream(app, 'run', headers={'Last-Event-ID': '1'}).until('end')
+    from_query = stream(app, 'run', query_string={'last_event_id': '2'}).until('end')
+
+    assert [e['id'] for e in from_header if e['event'] == 'output'] == ['2', '3']
+    assert [e['id'] for e in from_query if e['event'] == 'output'] == ['3']
+
+
+def test_stream_ends_with_final_status_after_draining_output(app, db_path):
+    add_execution(db_path, 'run')
+    events = stream(app, 'run')
+    assert events.next()['event'] == 'status'
+
+    add_output(db_path, 'run', 1, 'done')
+    set_status(db_path, 'run', 'success')
+
+    rest = events.until('end')
+    assert [e['event'] for e in rest] == ['output', 'status', 'end']
+    assert rest[-1]['data'] == '{"status": "success"}'
+
+
+def test_open_stream_does_not_hold_a_pooled_connection(app, db_path):
+    pool = get_pool(db_path)
+    with pool.connection():
+        pass
+    idle = pool.stats()['idle']
+    add_execution(db_path, 'run')
+
+    events = stream(app, 'run')
+    events.next()  # Waiting between polls
+
+    assert pool.stats()['idle'] == idle
+
+
+def list_pages(client, limit, **params):
+    """Every page of the listing, following X-Next-Cursor."""
+    pages, after = [], None
+    while True:
+        query = {'limit': limit, **params, **({'after': after} if after else {})}
+        response = client.get('/api/executions', query_string=query)
+        assert response.status_code == 200
+        pages.append([e['id'] for e in response.get_json()])
+        after = response.headers.get('X-Next-Cursor')
+        if not after:
+            return pages
+
+
+def test_cursor_pages_cover_every_row_once_with_tied_timestamps(app, db_path):
+    # Five runs created in the same instant, two more just before
+    for i in range(5):
+        add_execution(db_path, f'tie-{i}', status='success', created_at='2026-01-01T10:00:00')
+    add_execution(db_path, 'early-a', status='success', created_at='2026-01-01T09:00:00')
+    add_execution(db_path, 'early-b', status='success', created_at='2026-01-01T09:00:00')
+
+    pages = list_pages(app.test_client(), limit=2)
+
+    assert all(len(page) <= 2 for page in pages)
+    assert [row for page in pages for row in page] == [
+        'tie-4', 'tie-3', 'tie-2', 'tie-1', 'tie-0', 'early-b', 'early-a']
+
+
+def test_queued_run_starting_does_not_move_between_pages(app, db_path):
+    for i in range(4):
+        add_execution(db_path, f'run-{i}', status='queued', created_at=f'2026-01-01T10:00:0{i}')
+    client = app.test_client()
+    first = client.get('/api/executions', query_string={'limit': 2})
+    assert [e['id'] for e in first.get_json()] == ['run-3', 'run-2']
+
+    # The oldest queued run starts now: started_at moves, created_at does not
+    with get_db_connection(db_path) as conn:
+        conn.execute("UPDATE executions SET status = 'running', started_at = ? WHERE id = 'run-0'",
+                     (datetime.utcnow().isoformat(),))
+        conn.commit()
+    second = client.get('/api/executions',
+                        query_string={'limit': 2, 'after': first.headers['X-Next-Cursor']})
+
+    assert [e['id'] for e in second.get_json()] == ['run-1', 'run-0']
+
+
+def test_invalid_cursor_is_rejected(app):
+    response = app.test_client().get('/api/executions', query_string={'after': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert response.get_json()['code'] == 'INVALID_CURSOR'
@@ -0,0 +1,60 @@
+"""Tests for the health endpoint's overall status."""
+from flask import Flask
+
+from app.routes.health import health_bp
+
+
+class FakeMonitor:
+    def __init__(self, statuses, running=True):
+        self._statuses = statuses
+        self.running = running
+
+    def statuses(self):
+        return self._statuses
+
+    def stats(self):
+        return {'servers': len(self._statuses)}
+
+
+def make_client(tmp_path, db_path, monitor=None):
+    app = Flask(__name__)
+    app.config.update(AGENTS_ROOT=str(tmp_path), DATABASE_PATH=db_path)
+    app.register_blueprint(health_bp)
+    if monitor:
+        app.extensions['mcp_monitor'] = monitor
+    return app.test_client()
+
+
+def test_healthy_when_every_check_passes(tmp_path, db_path):
+    response = make_client(tmp_path, db_path, FakeMonitor({'github': {'status': 'healthy'}})).get('/api/health')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'healthy'
+
+
+def test_unhealthy_mcp_server_degrades_without_failing(tmp_path, db_path):
+    monitor = FakeMonitor({'github': {'status': 'healthy'}, 'gmail': {'status': 'unhealthy'}})
+
+    response = make_client(tmp_path, db_path, monitor).get('/api/health')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['status'] == 'degraded'
+    assert body['checks']['mcp_servers'] == 'unhealthy: gmail'
+    assert body['mcp']['servers_status']['gmail']['status'] == 'unhealthy'
+
+
+def test_missing_agents_directory_fails(tmp_path, db_path):
+    response = make_client(tmp_path / 'missing', db_path).get('/api/health')
+
+    assert response.status_code == 503
+    assert response.get_json()['checks']['agents_directory'] == 'not_found'
+
+
+def test_results_of_a_monitor_not_running_here_are_not_counted(tmp_path, db_path):
+    monitor = FakeMonitor({'gmail': {'status': 'unhealthy'}}, running=False)
+
+    body = make_client(tmp_path, db_path, monitor).get('/api/health').get_json()
+
+    assert body['status'] == 'healthy'
+    assert 'mcp_servers' not in body['checks']
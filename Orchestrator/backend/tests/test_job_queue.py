@@ -0,0 +1,202 @@
+"""Tests for the durable execution job queue."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.database import get_db_connection
+from app.models.job_queue import JobQueue, _kill_orphan
+
+DEAD_WORKER = 'elsewhere:1:0'  # A claim held by a process on another host
+
+
+def add_execution(db_path, execution_id, status='queued', pid=None):
+    with get_db_connection(db_path) as conn:
+        conn.execute('''
+            INSERT INTO executions (id, agent_folder, task, status, started_at, pid)
+            VALUES (?, 'Agent', 'task', ?, ?, ?)
+        ''', (execution_id, status, datetime.utcnow().isoformat(), pid))
+        conn.commit()
+
+
+def execution_row(db_path, execution_id):
+    with get_db_connection(db_path) as conn:
+        return dict(conn.execute('SELECT * FROM executions WHERE id = ?', (execution_id,)).fetchone())
+
+
+def job_row(db_path, execution_id):
+    with get_db_connection(db_path) as conn:
+        row = conn.execute('SELECT * FROM execution_jobs WHERE execution_id = ?', (execution_id,)).fetchone()
+        return dict(row) if row else None
+
+
+@pytest.fixture
+def queue(db_path):
+    return JobQueue(db_path, max_queue=10, max_attempts=2)
+
+
+def enqueue(queue, execution_id):
+    add_execution(queue.db_path, execution_id)
+    return queue.enqueue(execution_id, 'Agent', 'task')
+
+
+def test_claim_takes_oldest_pending_job(queue):
+    assert enqueue(queue, 'a') == 0
+    assert enqueue(queue, 'b') == 1
+
+    job = queue.claim('w1', lease_seconds=60)
+
+    assert job.execution_id == 'a'
+    assert job.state == 'claimed' and job.claimed_by == 'w1' and job.attempt == 1
+    assert job_row(queue.db_path, 'a')['state'] == 'claimed'
+    assert queue.position('b') == 0
+
+
+def test_claim_returns_none_when_empty_or_at_in_flight_cap(queue):
+    assert queue.claim('w1', lease_seconds=60) is None
+
+    enqueue(queue, 'a')
+    enqueue(queue, 'b')
+    assert queue.claim('w1', lease_seconds=60, max_in_flight=1).execution_id == 'a'
+    assert queue.claim('w2', lease_seconds=60, max_in_flight=1) is None
+
+
+def test_renew_extends_only_the_holders_lease(queue):
+    enqueue(queue, 'a')
+    queue.claim('w1', lease_seconds=1)
+    before = job_row(queue.db_path, 'a')['lease_expires_at']
+
+    assert queue.renew(['a'], 'w2', lease_seconds=60) == 0
+    assert job_row(queue.db_path, 'a')['lease_expires_at'] == before
+
+    assert queue.renew(['a'], 'w1', lease_seconds=60) == 1
+    assert job_row(queue.db_path, 'a')['lease_expires_at'] > before + 30
+
+
+def test_expired_lease_is_counted_and_requeued(queue):
+    enqueue(queue, 'a')
+    queue.claim(DEAD_WORKER, lease_seconds=-1)
+    assert queue.stats()['expired_leases'] == 1
+
+    result = queue.requeue_expired()
+
+    assert result == {'requeued': ['a'], 'failed': []}
+    job = job_row(queue.db_path, 'a')
+    assert job['state'] == 'pending' and job['claimed_by'] is None and job['attempt'] == 1
+    assert execution_row(queue.db_path, 'a')['status'] == 'queued'
+    assert queue.claim('w1', lease_seconds=60).attempt == 2
+
+
+def test_live_lease_is_not_requeued(queue):
+    enqueue(queue, 'a')
+    queue.claim(DEAD_WORKER, lease_seconds=60)
+
+    assert queue.requeue_expired() == {'requeued': [], 'failed': []}
+    assert job_row(queue.db_path, 'a')['state'] == 'claimed'
+
+
+def test_job_fails_after_max_attempts(queue):
+    enqueue(queue, 'a')
+    for _ in range(2):
+        queue.claim(DEAD_WORKER, lease_seconds=-1)
+        result = queue.requeue_expired()
+
+    assert result == {'requeued': [], 'failed': ['a']}
+    assert job_row(queue.db_path, 'a') is None
+    assert execution_row(queue.db_path, 'a')['status'] == 'failed'
+
+
+def test_expired_job_of_live_local_holder_is_left_to_it(db_path):
+    queue = JobQueue(db_path, holder_grace=600)
+    enqueue(queue, 'a')
+    queue.claim(f'{socket.gethostname()}:{os.getpid()}:0', lease_seconds=-1)
+
+    assert queue.requeue_expired() == {'requeued': [], 'failed': []}
+
+    queue.holder_grace = 0  # Missed renewals for too long: treated as dead
+    assert queue.requeue_expired()['requeued'] == ['a']
+
+
+def test_finished_execution_job_is_dropped(queue):
+    enqueue(queue, 'a')
+    queue.claim(DEAD_WORKER, lease_seconds=-1)
+    with get_db_connection(queue.db_path) as conn:
+        conn.execute("UPDATE executions SET status = 'success' WHERE id = 'a'")
+        conn.commit()
+
+    assert queue.requeue_expired() == {'requeued': [], 'failed': []}
+    assert job_row(queue.db_path, 'a') is None
+
+
+def spawn(args, new_session=True):
+    return subprocess.Popen(args, start_new_session=new_session,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def test_kill_orphan_spares_unrelated_process():
+    # Same pid a dead run may have recorded, but not a CLI run: must survive
+    process = spawn([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        assert _kill_orphan(process.pid, 'claude') is False
+        assert process.poll() is None
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_kill_orphan_kills_cli_process_group(tmp_path):
+    # A stand-in CLI (named like the real one, run with --print) with a child "MCP server"
+    cli = tmp_path / 'claude'
+    cli.write_text(f'#!{sys.executable}\n'
+                   'import subprocess, sys, time\n'
+                   f'child = subprocess.Popen([{sys.executable!r}, "-c", "import time; time.sleep(30)"])\n'
+                   'print(child.pid, flush=True)\n'
+                   'time.sleep(30)\n')
+    cli.chmod(0o755)
+    process = subprocess.Popen([str(cli), '--print'], start_new_session=True,
+                               stdout=subprocess.PIPE, text=True)
+    child_pid = int(process.stdout.readline())
+
+    assert _kill_orphan(process.pid, 'claude') is True
+    process.wait(timeout=5)
+    for _ in range(50):
+        try:
+            os.kill(child_pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail('CLI child process survived')
+
+
+def test_orphan_whose_pid_was_reused_is_failed(db_path):
+    # The run's pid now belongs to an unrelated process
+    process = spawn([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        add_execution(db_path, 'reused', status='running', pid=process.pid)
+
+        assert JobQueue(db_path).fail_orphans(grace_seconds=0) == ['reused']
+        assert execution_row(db_path, 'reused')['status'] == 'failed'
+        assert process.poll() is None
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_orphan_whose_cli_is_still_running_is_left_alone(db_path, tmp_path):
+    cli = tmp_path / 'claude'
+    cli.write_text(f'#!{sys.executable}\nimport time\ntime.sleep(30)\n')
+    cli.chmod(0o755)
+    process = spawn([str(cli), '--print'])
+    try:
+        add_execution(db_path, 'live', status='running', pid=process.pid)
+
+        assert JobQueue(db_path).fail_orphans(grace_seconds=0) == []
+        assert execution_row(db_path, 'live')['status'] == 'running'
+    finally:
+        process.kill()
+        process.wait()
@@ -0,0 +1,28 @@
+"""Tests for the MCP health monitor's lifecycle."""
+import os
+
+from app.services.mcp_monitor import MCPHealthMonitor
+
+
+def test_monitor_runs_only_between_start_and_stop():
+    monitor = MCPHealthMonitor(lambda: {})
+    assert monitor.running is False
+
+    monitor.start()
+    try:
+        assert monitor.running is True
+        assert monitor.stats()['running'] is True
+    finally:
+        monitor.stop()
+    assert monitor.running is False
+
+
+def test_monitor_inherited_across_fork_is_not_running():
+    monitor = MCPHealthMonitor(lambda: {})
+    monitor.start()
+    try:
+        monitor._pid = os.getpid() + 1  # As seen from a forked child, before start()
+        assert monitor.running is False
+    finally:
+        monitor._pid = os.getpid()
+        monitor.stop()
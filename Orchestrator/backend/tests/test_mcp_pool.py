@@ -0,0 +1,115 @@
+"""Tests for warm MCP servers shared through the pool."""
+import logging
+import sys
+import threading
+import time
+
+import pytest
+
+from app.services.mcp_pool import SERVER_ERROR, PoolError, _WarmServer
+
+# A minimal MCP server: answers initialize, echoes tools/call, never answers "hang"
+SERVER = '''
+import json, sys
+sys.stderr.write("fake server starting\\n"); sys.stderr.flush()
+for line in sys.stdin:
+    message = json.loads(line)
+    if message.get("method") == "initialize":
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": {"serverInfo": {"name": "fake"}}}
+    elif message.get("method") == "tools/call" and message["params"]["name"] == "exit":
+        sys.stderr.write("fatal: lost the mailbox\\n"); sys.stderr.flush()
+        sys.exit(3)
+    elif message.get("method") == "tools/call" and message["params"]["name"] != "hang":
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": {"echo": message["params"]["name"]}}
+    else:
+        continue
+    print(json.dumps(reply), flush=True)
+'''
+
+
+class RecordingClient:
+    """Stands in for a bridge connection: records what it is sent."""
+
+    def __init__(self):
+        self.sent = []
+        self.received = threading.Event()
+
+    def send(self, message):
+        self.sent.append(message)
+        self.received.set()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def server_config(tmp_path):
+    script = tmp_path / 'server.py'
+    script.write_text(SERVER)
+    return {'command': sys.executable, 'args': [str(script)]}
+
+
+def call(server, client, request_id, tool):
+    server.from_client(client, {'jsonrpc': '2.0', 'id': request_id, 'method': 'tools/call',
+                                'params': {'name': tool, 'arguments': {}}})
+
+
+def wait_for(client, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(client.sent) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return client.sent
+
+
+def test_requests_are_relayed_with_the_client_ids(server_config):
+    server = _WarmServer('fake', server_config, max_concurrency=2, startup_timeout=5)
+    client = RecordingClient()
+    server.attach(client)
+    try:
+        call(server, client, 'a', 'inbox')
+
+        assert wait_for(client, 1) == [{'jsonrpc': '2.0', 'id': 'a', 'result': {'echo': 'inbox'}}]
+    finally:
+        server.stop()
+
+
+def test_request_waiting_for_a_slot_gets_an_error_after_the_timeout(server_config):
+    server = _WarmServer('fake', server_config, max_concurrency=1, startup_timeout=5,
+                         request_timeout=0.2)
+    client = RecordingClient()
+    server.attach(client)
+    try:
+        call(server, client, 1, 'hang')  # Takes the only slot and never returns
+        started = time.monotonic()
+        call(server, client, 2, 'inbox')
+
+        assert time.monotonic() - started < 2
+        assert client.sent == [{'jsonrpc': '2.0', 'id': 2, 'error': {
+            'code': SERVER_ERROR, 'message': "MCP server 'fake' is busy: no request finished within 0.2s"}}]
+    finally:
+        server.stop()
+
+
+def test_startup_failure_reports_the_stderr_tail(tmp_path):
+    script = tmp_path / 'broken.py'
+    script.write_text('import sys\nsys.stderr.write("missing API token\\n")\nsys.exit(1)\n')
+    server = _WarmServer('broken', {'command': sys.executable, 'args': [str(script)]},
+                         max_concurrency=1, startup_timeout=5)
+
+    with pytest.raises(PoolError, match='missing API token'):
+        server.attach(RecordingClient())
+
+
+def test_unexpected_exit_logs_the_stderr_tail(server_config, caplog):
+    server = _WarmServer('fake', server_config, max_concurrency=1, startup_timeout=5)
+    client = RecordingClient()
+    server.attach(client)
+    with caplog.at_level(logging.WARNING, logger='app.services.mcp_pool'):
+        call(server, client, 1, 'exit')
+        deadline = time.monotonic() + 5
+        while 'lost the mailbox' not in caplog.text and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert "MCP server 'fake' exited (code 3)" in caplog.text
+    assert 'fatal: lost the mailbox' in caplog.text
+    assert wait_for(client, 1)[0]['error']['message'] == 'MCP server exited'
@@ -0,0 +1,163 @@
+"""Tests for the on-disk URL cache and conditional fetching through it."""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.url_cache import URLCache
+from app.services.url_fetcher import URLFetcher
+
+TEXT = {'Content-Type': 'text/plain'}
+
+
+def age(cache, entry, seconds):
+    """Pretend an entry was fetched ``seconds`` ago."""
+    entry.fetched_at = time.time() - seconds
+    cache._write(entry)
+
+
+def test_entry_is_fresh_within_ttl_and_max_age(tmp_path):
+    cache = URLCache(str(tmp_path), ttl=60)
+    plain = cache.put('http://x/a', b'a', TEXT, truncated=False, max_bytes=100)
+    short = cache.put('http://x/b', b'b', {**TEXT, 'Cache-Control': 'max-age=5'}, truncated=False, max_bytes=100)
+    no_cache = cache.put('http://x/c', b'c', {**TEXT, 'Cache-Control': 'no-cache'}, truncated=False, max_bytes=100)
+
+    assert cache.get('http://x/a').body == b'a'
+    assert cache.is_fresh(plain) and cache.is_fresh(short)
+    assert not cache.is_fresh(no_cache)
+    age(cache, short, 10)
+    assert not cache.is_fresh(cache.get('http://x/b'))
+    assert cache.is_fresh(cache.get('http://x/a'))
+
+
+def test_no_store_response_is_not_cached_and_drops_the_old_entry(tmp_path):
+    cache = URLCache(str(tmp_path))
+    cache.put('http://x/a', b'old', TEXT, truncated=False, max_bytes=100)
+
+    assert cache.put('http://x/a', b'new', {'Cache-Control': 'no-store'}, truncated=False, max_bytes=100) is None
+    assert cache.get('http://x/a') is None
+    assert cache.stats()['size_bytes'] == 0
+
+
+def test_entry_truncated_at_a_smaller_cap_is_a_miss(tmp_path):
+    cache = URLCache(str(tmp_path))
+    cache.put('http://x/a', b'abc', TEXT, truncated=True, max_bytes=3)
+
+    assert cache.get('http://x/a', max_bytes=3) is not None
+    assert cache.get('http://x/a', max_bytes=10) is None
+
+
+def test_renew_refreshes_an_entry_and_takes_new_validators(tmp_path):
+    cache = URLCache(str(tmp_path), ttl=60)
+    entry = cache.put('http://x/a', b'a', {**TEXT, 'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Jan 2026 10:00:00 GMT'},
+                      truncated=False, max_bytes=100)
+    age(cache, entry, 120)
+    stale = cache.get('http://x/a')
+    assert not cache.is_fresh(stale)
+    assert stale.validators() == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 05 Jan 2026 10:00:00 GMT'}
+
+    cache.renew(stale, {'ETag': '"v2"'})
+
+    renewed = cache.get('http://x/a')
+    assert cache.is_fresh(renewed)
+    assert renewed.body == b'a'
+    assert renewed.validators() == {'If-None-Match': '"v2"', 'If-Modified-Since': 'Mon, 05 Jan 2026 10:00:00 GMT'}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = URLCache(str(tmp_path), max_bytes=10_000)
+    body = b'x' * 3000
+    for name in ('a', 'b', 'c'):
+        cache.put(f'http://x/{name}', body, TEXT, truncated=False, max_bytes=len(body))
+    # 'a' is the oldest write but was read last; 'b' is now least recently used
+    for name, used in (('a', 300), ('b', 200), ('c', 100)):
+        os.utime(cache._path(f'http://x/{name}'), (time.time() - used,) * 2)
+    cache.get('http://x/a')
+
+    cache.put('http://x/d', body, TEXT, truncated=False, max_bytes=len(body))
+
+    assert cache.get('http://x/b') is None
+    assert all(cache.get(f'http://x/{name}') for name in ('a', 'c', 'd'))
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size_bytes'] <= 10_000
+
+
+class Origin(BaseHTTPRequestHandler):
+    """Serves ``body`` with an ETag, answering matching conditional requests with 304."""
+    body = b'version one'
+    etag = '"v1"'
+    status = 200
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.headers.get('If-None-Match'))
+        if self.status != 200:
+            self.send_response(self.status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(self.body)))
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    Origin.body, Origin.etag, Origin.status, Origin.requests = b'version one', '"v1"', 200, []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Origin)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/doc'
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetcher_serves_fresh_entries_without_a_request(tmp_path, origin):
+    cache = URLCache(str(tmp_path), ttl=60)
+    fetcher = URLFetcher(cache=cache)
+
+    assert fetcher.fetch(origin) == 'version one'
+    assert fetcher.fetch(origin) == 'version one'
+
+    assert Origin.requests == [None]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_fetcher_revalidates_stale_entries(tmp_path, origin):
+    cache = URLCache(str(tmp_path), ttl=0)
+    fetcher = URLFetcher(cache=cache)
+
+    assert fetcher.fetch(origin) == 'version one'
+    assert fetcher.fetch(origin) == 'version one'  # 304: body from the cache
+    Origin.body, Origin.etag = b'version two', '"v2"'
+    assert fetcher.fetch(origin) == 'version two'  # Changed: downloaded again
+
+    assert Origin.requests == [None, '"v1"', '"v1"']
+    assert cache.stats()['revalidated'] == 1 and cache.stats()['misses'] == 2
+    assert cache.get(origin).etag == '"v2"'
+
+
+def test_fetcher_serves_stale_entry_when_the_origin_fails(tmp_path, origin):
+    cache = URLCache(str(tmp_path), ttl=0)
+    fetcher = URLFetcher(cache=cache)
+    fetcher.fetch(origin)
+
+    Origin.status = 503
+    assert fetcher.fetch(origin) == 'version one'
+    assert cache.stats()['stale_served'] == 1
+
+    Origin.status = 404  # Gone: the entry is dropped
+    assert fetcher.fetch(origin).startswith('[Error fetching URL')
+    assert cache.get(origin) is None
@@ -25,15 +25,20 @@ export interface Execution {
   id: string;
   agent_folder: string;
   task: string;
-  status: 'running' | 'success' | 'failed' | 'timeout';
-  output: string | null;
-  error: string | null;
+  status: 'queued' | 'running' | 'success' | 'failed' | 'timeout';
+  // Omitted from list responses unless requested via `fields`
+  output?: string | null;
+  error?: string | null;
   started_at: string;
   completed_at: string | null;
   duration_seconds: number | null;
   triggered_by: string;
   pid?: number | null;
   context?: string | null;
+  queued_at?: string | null;
+  created_at?: string | null;
+  wait_seconds?: number | null;
+  queue_position?: number;
 }
 
 export interface ExecutionContext {
@@ -44,9 +49,11 @@ export interface ExecutionContext {
 
 export interface ExecutionStatus {
   id: string;
-  status: 'running' | 'success' | 'failed' | 'timeout';
+  status: 'queued' | 'running' | 'success' | 'failed' | 'timeout';
   pid: number | null;
   process_alive: boolean;
+  queue_position: number | null;
+  wait_seconds: number | null;
   started_at: string;
   completed_at: string | null;
   duration_seconds: number | null;
@@ -55,8 +62,67 @@ export interface ExecutionStatus {
 export interface ExecutionStats {
   total: number;
   running: number;
+  queued?: number;
   recent_24h: number;
   failed_24h: number;
+  window?: ExecutionWindowStats;
+  agents?: (ExecutionWindowStats & { agent_folder: string })[];
+}
+
+export interface ExecutionWindowStats {
+  hours: number;
+  total: number;
+  success: number;
+  failed: number;
+  timeout: number;
+  success_rate: number | null;
+  avg_duration_seconds: number | null;
+  min_duration_seconds: number | null;
+  max_duration_seconds: number | null;
+}
+
+export interface LatencyDistribution {
+  count: number;
+  p50: number | null;
+  p90: number | null;
+  p95: number | null;
+  p99: number | null;
+  histogram?: { lower: number; upper: number; count: number }[];
+}
+
+export interface LatencyStats {
+  hours: number;
+  relative_accuracy: number;
+  overall: LatencyDistribution;
+  agents: (LatencyDistribution & { agent_folder: string })[];
+  interval?: 'hour' | 'day';
+  buckets?: (LatencyDistribution & { bucket: string })[];
+}
+
+export interface QueueStats {
+  max_workers: number;
+  max_queue: number;
+  lease_seconds: number;
+  running: number;
+  queued: number;
+  expired_leases: number;
+  local_running: number;
+  completed: number;
+  rejected: number;
+  oldest_wait_seconds: number;
+  avg_wait_seconds: number;
+  max_wait_seconds: number;
+  pending: Array<{ execution_id: string; agent_folder: string; wait_seconds: number; attempt: number }>;
+}
+
+export interface MCPServerHealth {
+  status: 'healthy' | 'degraded' | 'unhealthy';
+  message: string;
+  latency_ms: number | null;
+  tool_count: number | null;
+  checked_at: string;
+  consecutive_failures: number;
+  last_success_at: string | null;
 }
 
 export interface MCPServer {
@@ -66,17 +132,44 @@ export interface MCPServer {
   env: Record<string, string>;
   source?: 'user' | 'orchestrator';
   description?: string;
+  // Present when the background health monitor is enabled; null until first probed
+  health?: MCPServerHealth | null;
 }
 
 export interface MCPTestResult {
   success: boolean;
   message: string;
+  latency_ms?: number | null;
+  total_ms?: number | null;
+  tool_count?: number | null;
+  tools?: string[];
+  server_info?: { name?: string; version?: string } | null;
+  protocol_version?: string | null;
+}
+
+export interface MCPTestAllResult {
+  results: (MCPTestResult & { name: string })[];
+  healthy: number;
+  total: number;
+  took_ms: number;
 }
 
 export interface HealthStatus {
   status: 'healthy' | 'degraded';
   checks: Record<string, string>;
   timestamp: string;
+  mcp?: {
+    servers: number;
+    healthy: number;
+    degraded: number;
+    unhealthy: number;
+    unknown: number;
+    in_flight: number;
+    probes: number;
+    interval_seconds: number;
+    running: boolean;
+    servers_status: Record<string, MCPServerHealth>;
+  };
 }
 
 async function request<T>(endpoint: string, options?: RequestInit): Promise<T> {
@@ -114,9 +207,47 @@ async function requestFormData<T>(endpoint: string, formData: FormData): Promise
 }
 
 // Agent API
+export interface AgentSearchResponse {
+  query: string;
+  results: (Agent & { score: number })[];
+  took_ms: number;
+}
+
+export interface AgentRouteResponse {
+  task: string;
+  results: (Agent & { score: number })[];
+  took_ms: number;
+}
+
+export interface RoutedExecution extends Execution {
+  routing: {
+    agent: string;
+    score: number;
+    candidates: { folder: string; score: number }[];
+    took_ms: number;
+  };
+}
+
 export const agentsApi = {
   list: () => request<Agent[]>('/api/agents'),
 
+  search: (q: string, limit?: number) => {
+    const query = new URLSearchParams({ q });
+    if (limit) query.set('limit', String(limit));
+    return request<AgentSearchResponse>(`/api/agents/search?${query.toString()}`);
+  },
+
+  route: (task: string, limit?: number) => request<AgentRouteResponse>('/api/agents/route', {
+    method: 'POST',
+    body: JSON.stringify({ task, limit }),
+  }),
+
+  routeAndExecute: (task: string, context?: Omit<ExecutionContext, 'images'>) =>
+    request<RoutedExecution>('/api/agents/route/execute', {
+      method: 'POST',
+      body: JSON.stringify({ task, urls: context?.urls, file_paths: context?.file_paths }),
+    }),
+
   get: (folder: string) => request<Agent>(`/api/agents/${encodeURIComponent(folder)}`),
 
   create: (data: {
@@ -194,12 +325,14 @@ export interface KillResponse {
 
 // Executions API
 export const executionsApi = {
-  list: (params?: { agent?: string; status?: string; limit?: number; offset?: number }) => {
+  list: (params?: { agent?: string; status?: string; limit?: number; offset?: number; after?: string; fields?: string[] }) => {
     const query = new URLSearchParams();
     if (params?.agent) query.set('agent', params.agent);
     if (params?.status) query.set('status', params.status);
     if (params?.limit) query.set('limit', String(params.limit));
     if (params?.offset) query.set('offset', String(params.offset));
+    if (params?.after) query.set('after', params.after);
+    if (params?.fields?.length) query.set('fields', params.fields.join(','));
     const queryString = query.toString();
     return request<Execution[]>(`/api/executions${queryString ? `?${queryString}` : ''}`);
   },
@@ -208,12 +341,26 @@ export const executionsApi = {
 
   status: (id: string) => request<ExecutionStatus>(`/api/executions/${encodeURIComponent(id)}/status`),
 
+  streamUrl: (id: string) => `${API_BASE}/api/executions/${encodeURIComponent(id)}/stream`,
+
   kill: (id: string) => request<KillResponse>(`/api/executions/${encodeURIComponent(id)}/kill`, {
     method: 'POST',
   }),
 
+  queue: () => request<QueueStats>('/api/executions/queue'),
+
   stats: (hours?: number) => request<ExecutionStats>(`/api/executions/stats${hours ? `?hours=${hours}` : ''}`),
 
+  latency: (params?: { hours?: number; agent?: string; interval?: 'hour' | 'day'; histogram?: boolean }) => {
+    const query = new URLSearchParams();
+    if (params?.hours) query.set('hours', String(params.hours));
+    if (params?.agent) query.set('agent', params.agent);
+    if (params?.interval) query.set('interval', params.interval);
+    if (params?.histogram) query.set('histogram', 'true');
+    const queryString = query.toString();
+    return request<LatencyStats>(`/api/executions/latency${queryString ? `?${queryString}` : ''}`);
+  },
+
   delete: (id: string) => request<{ success: boolean; message: string }>(`/api/executions/${encodeURIComponent(id)}`, {
     method: 'DELETE',
   }),
@@ -225,13 +372,13 @@ export const mcpApi = {
 
   get: (name: string) => request<MCPServer>(`/api/mcp/servers/${encodeURIComponent(name)}`),
 
-  create: (server: Omit<MCPServer, 'source' | 'description'>) =>
+  create: (server: Omit<MCPServer, 'source' | 'description' | 'health'>) =>
     request<MCPServer>('/api/mcp/servers', {
       method: 'POST',
       body: JSON.stringify(server),
     }),
 
-  update: (name: string, server: Omit<MCPServer, 'name' | 'source' | 'description'>) =>
+  update: (name: string, server: Omit<MCPServer, 'name' | 'source' | 'description' | 'health'>) =>
     request<MCPServer>(`/api/mcp/servers/${encodeURIComponent(name)}`, {
       method: 'PUT',
       body: JSON.stringify(server),
@@ -252,6 +399,12 @@ export const mcpApi = {
     request<MCPTestResult>(`/api/mcp/servers/${encodeURIComponent(name)}/test`, {
       method: 'POST',
     }),
+
+  testAll: (names?: string[]) =>
+    request<MCPTestAllResult>('/api/mcp/servers/test', {
+      method: 'POST',
+      body: JSON.stringify(names ? { names } : {}),
+    }),
 };
 
 // Health API
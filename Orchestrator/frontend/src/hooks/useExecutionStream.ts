@@ -0,0 +1,52 @@
+/**
+ * Live execution output over Server-Sent Events
+ */
+import { useEffect, useState } from 'react';
+import { executionsApi } from '../api/client';
+
+interface StreamEvent {
+  type?: string;
+  message?: { content?: Array<{ type: string; text?: string }> };
+}
+
+export function useExecutionStream(id: string | undefined, enabled: boolean) {
+  const [text, setText] = useState('');
+  const [status, setStatus] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!id || !enabled) return;
+
+    setText('');
+    // EventSource resends Last-Event-ID on reconnect, so output resumes where it stopped
+    const source = new EventSource(executionsApi.streamUrl(id));
+
+    // Each event is a segment of one or more stream-json lines
+    source.addEventListener('output', (e) => {
+      const chunks = (e as MessageEvent).data.split('\n').map((line: string) => {
+        try {
+          const event: StreamEvent = JSON.parse(line);
+          if (event.type !== 'assistant') return '';
+          return (event.message?.content || [])
+            .filter((block) => block.type === 'text' && block.text)
+            .map((block) => block.text + '\n')
+            .join('');
+        } catch {
+          return line + '\n';
+        }
+      });
+      const added = chunks.join('');
+      if (added) setText((prev) => prev + added);
+    });
+    source.addEventListener('status', (e) => {
+      setStatus(JSON.parse((e as MessageEvent).data).status);
+    });
+    source.addEventListener('end', (e) => {
+      setStatus(JSON.parse((e as MessageEvent).data).status);
+      source.close();
+    });
+
+    return () => source.close();
+  }, [id, enabled]);
+
+  return { text, status };
+}
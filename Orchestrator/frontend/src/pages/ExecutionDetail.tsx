@@ -3,6 +3,7 @@ import { useParams, Link, useNavigate } from 'react-router-dom';
 import { ArrowLeft, CheckCircle, XCircle, Clock, Activity, Loader2, StopCircle, MessageSquare, X, Play, Trash2, Link as LinkIcon, FileText, Image } from 'lucide-react';
 import { executionsApi, agentsApi, type Execution, type ExecutionStatus } from '../api/client';
 import { useSpeechRecognition } from '../hooks/useSpeechRecognition';
+import { useExecutionStream } from '../hooks/useExecutionStream';
 import { VoiceInputButton } from '../components/common/VoiceInputButton';
 
 export function ExecutionDetail() {
@@ -18,6 +19,9 @@ export function ExecutionDetail() {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [isDeleting, setIsDeleting] = useState(false);
 
+  const isActive = execution?.status === 'running' || execution?.status === 'queued';
+  const liveOutput = useExecutionStream(executionId, isActive);
+
   const {
     isListening,
     isSupported: isSpeechSupported,
@@ -55,17 +59,17 @@ export function ExecutionDetail() {
     fetchExecution();
   }, [executionId]);
 
-  // Poll status for running executions
+  // Poll status for queued and running executions
   useEffect(() => {
-    if (!executionId || !execution || execution.status !== 'running') return;
+    if (!executionId || !execution || (execution.status !== 'running' && execution.status !== 'queued')) return;
 
     async function fetchStatus() {
       try {
         const data = await executionsApi.status(executionId!);
         setStatus(data);
 
-        // If execution completed, refresh the full execution data
-        if (data.status !== 'running') {
+        // If execution started or completed, refresh the full execution data
+        if (data.status !== execution!.status) {
           const fullData = await executionsApi.get(executionId!);
           setExecution(fullData);
         }
@@ -369,6 +373,20 @@ Follow-up question: ${followUpTask}`;
         }
       })()}
 
+      {/* Live output while the agent works */}
+      {isActive && liveOutput.text && (
+        <div className="card">
+          <div className="p-6 border-b border-gray-200">
+            <h3 className="text-lg font-semibold text-gray-900">Live Output</h3>
+          </div>
+          <div className="p-6">
+            <pre className="bg-gray-900 text-gray-100 p-4 rounded-lg overflow-x-auto text-sm whitespace-pre-wrap max-h-[500px] overflow-y-auto">
+              {liveOutput.text}
+            </pre>
+          </div>
+        </div>
+      )}
+
       {/* Output */}
       {execution.output && (
         <div className="card">